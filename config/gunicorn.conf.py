@@ -0,0 +1,50 @@
+"""
+Gunicorn configuration for the Customer Segmentation Analytics System
+
+Usage (from the project root): gunicorn -c config/gunicorn.conf.py
+
+Worker model: gthread workers, so a request blocked in a long fit does not
+hold up the polling, status and SSE requests of the same process. The CPU
+heavy work runs outside the GIL (scikit-learn / BLAS native threads) or in
+the JOB_WORKERS process pool, so threads rather than extra workers carry the
+concurrency. Workspaces live in process memory: run more than one worker only
+behind a proxy that pins a session (or X-Workspace-ID) to one worker.
+See docs/DEPLOYMENT.md.
+"""
+
+import gc
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+wsgi_app = 'wsgi:app'
+pythonpath = os.path.join(_ROOT, 'src')
+chdir = _ROOT
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('SERVER_PORT', 5000)}")
+
+# Import the app, its heavy modules and the restored state once in the master
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True').lower() == 'true'
+
+worker_class = 'gthread'
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+# Sweeps on large uploads can run for minutes
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 300))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'INFO').lower()
+
+
+def when_ready(server):
+    # Move everything preloaded into the permanent generation, so the cyclic
+    # GC in the workers never writes to (and so copies) the shared pages
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Preloaded app frozen for {workers} worker(s) x {threads} thread(s)")
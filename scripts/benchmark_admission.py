@@ -0,0 +1,98 @@
+"""
+Benchmark light-request latency while heavy requests saturate the server.
+
+Starts the gunicorn profile (1 worker x 8 threads) and has `heavy_clients`
+clients, each in its own workspace, repeatedly POST /api/cluster on a
+synthetic n_rows dataset, backing off for Retry-After when turned away.
+Meanwhile one probe client measures GET /health latency; probes still
+unanswered when the run ends count as timed out. Runs once with
+admission control effectively off (heavy pool as large as the thread pool)
+and once with the defaults from config/.env.example.
+
+Usage: python scripts/benchmark_admission.py [heavy_clients] [seconds] [n_rows]
+"""
+
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_server import request, start_server, stop_server
+
+
+def run(port: int, heavy_clients: int, seconds: float, csv_body: bytes) -> dict:
+    for i in range(heavy_clients):
+        request(port, '/api/upload?filename=bench.csv', f'heavy-{i}', csv_body, 'text/csv')
+    stop = time.time() + seconds
+    counts = {'ok': 0, 'rejected': 0, 'probe_timeouts': 0}
+    latencies = []
+
+    def heavy(i):
+        while time.time() < stop:
+            try:
+                request(port, '/api/cluster', f'heavy-{i}', json.dumps({'n_clusters': 8}).encode(), 'application/json')
+                counts['ok'] += 1
+            except urllib.error.HTTPError as e:
+                counts['rejected'] += 1
+                time.sleep(min(float(e.headers.get('Retry-After', 1)), max(0.0, stop - time.time())))
+            except OSError:
+                return  # the server is stopped with requests still in flight
+
+    def probe():
+        time.sleep(1)  # let the heavy clients fill the server first
+        while time.time() < stop:
+            start = time.perf_counter()
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=max(0.1, stop - time.time())).read()
+            except OSError:
+                counts['probe_timeouts'] += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.1)
+
+    threads = [threading.Thread(target=heavy, args=(i,)) for i in range(heavy_clients)]
+    threads.append(threading.Thread(target=probe))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies = sorted(latencies) or [float('nan')]
+    return {**counts, 'answered': len(latencies), 'p50': statistics.median(latencies),
+            'p95': latencies[max(0, int(len(latencies) * 0.95) - 1)], 'max': latencies[-1]}
+
+
+def main() -> None:
+    heavy_clients = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 20
+    n_rows = int(sys.argv[3]) if len(sys.argv) > 3 else 5000
+    rng = np.random.RandomState(0)
+    frame = pd.DataFrame(rng.rand(n_rows, 6), columns=[f'f{i}' for i in range(6)])
+    csv_body = frame.to_csv(index=False).encode()
+    print(f"heavy_clients={heavy_clients} seconds={seconds} n_rows={n_rows} cpus={os.cpu_count()}")
+
+    settings = {
+        'off': {'HEAVY_CONCURRENCY': '8', 'HEAVY_QUEUE': '8', 'HEAVY_PER_WORKSPACE': '0'},
+        'default': {},
+    }
+    for name, env in settings.items():
+        proc = start_server('gunicorn', 5104, env)
+        try:
+            result = run(5104, heavy_clients, seconds, csv_body)
+        finally:
+            stop_server(proc)
+        print(f"admission {name:<8} /health answered {result['answered']:4d} timed out {result['probe_timeouts']:2d}  "
+              f"p50 {result['p50']:8.1f} ms  p95 {result['p95']:8.1f} ms  max {result['max']:8.1f} ms   "
+              f"/api/cluster ok {result['ok']:4d} rejected {result['rejected']:4d}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark conditional GETs on the read-only analysis endpoints.
+
+Uploads a synthetic dataset of n_rows rows, clusters it, then times each
+endpoint's full response against a revalidation with the ETag it returned
+(304 Not Modified), using the Flask test client.
+
+Usage: python scripts/benchmark_etag.py [n_rows] [runs]
+"""
+
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from app import app
+from utils.logger import app_logger
+
+ENDPOINTS = ('/api/status', '/api/data-quality', '/api/correlation-matrix', '/api/cluster-data',
+             '/api/feature-importance', '/api/visualizations')
+
+
+def median_ms(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    app.config['SAVE_UPLOADS'] = False
+    app_logger.setLevel('WARNING')
+    rng = np.random.RandomState(0)
+    frame = pd.DataFrame({'Age': rng.randint(18, 80, n_rows), 'Income': rng.gamma(2, 30000, n_rows),
+                          'Score': rng.randint(1, 100, n_rows), 'Tenure': rng.randint(0, 20, n_rows)})
+    client = app.test_client()
+    client.post('/api/upload?filename=bench.csv', data=frame.to_csv(index=False).encode(), content_type='text/csv')
+    client.post('/api/cluster', json={'n_clusters': 4})
+    print(f"n_rows={n_rows} runs={runs}")
+
+    for path in ENDPOINTS:
+        response = client.get(path, headers={'Accept-Encoding': 'gzip'})
+        headers = {'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']}
+        assert client.get(path, headers=headers).status_code == 304
+        full = median_ms(lambda: client.get(path, headers={'Accept-Encoding': 'gzip'}), runs)
+        revalidated = median_ms(lambda: client.get(path, headers=headers), runs)
+        print(f"{path:<26} 200 {full:8.1f} ms {len(response.data) / 1024:8.1f} KB   304 {revalidated:6.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
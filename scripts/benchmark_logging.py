@@ -0,0 +1,116 @@
+"""
+Benchmark what logging costs the thread that logs.
+
+Times logger.info() calls made from `threads` concurrent threads with the
+handlers writing synchronously (the previous setup) and through the
+background queue listener, once with console output going to a file and
+once to a slow stream (each write takes `slow_ms`, like a terminal or a
+pipe that is not drained fast enough). Then times GET /api/data-quality
+through the Flask test client, which logs once per request, in both modes
+against the slow stream.
+
+Usage: python scripts/benchmark_logging.py [threads] [calls_per_thread] [slow_ms]
+"""
+
+import io
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from utils.logger import setup_logger, flush_logger
+
+
+class SlowStream(io.StringIO):
+    """Stream whose writes block for a fixed time."""
+
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+
+    def write(self, s: str) -> int:
+        time.sleep(self.delay)
+        return len(s)
+
+
+def percentiles(samples: list) -> tuple:
+    samples = sorted(samples)
+    return (statistics.median(samples) * 1000, samples[max(0, int(len(samples) * 0.99) - 1)] * 1000)
+
+
+def configure(name: str, log_file: str, queued: bool, stream):
+    # The console handler binds to sys.stderr when it is created
+    stderr, sys.stderr = sys.stderr, stream
+    try:
+        return setup_logger(name, log_level='INFO', log_file=log_file, max_bytes=0, queued=queued)
+    finally:
+        sys.stderr = stderr
+
+
+def time_calls(logger, threads: int, calls: int) -> tuple:
+    samples = [[] for _ in range(threads)]
+
+    def worker(i):
+        for n in range(calls):
+            start = time.perf_counter()
+            logger.info("request %d/%d handled for workspace %s", i, n, 'bench')
+            samples[i].append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    flush_logger(logger)
+    return percentiles([s for per_thread in samples for s in per_thread]) + (elapsed,)
+
+
+def main() -> None:
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    slow_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    print(f"threads={threads} calls_per_thread={calls} slow_ms={slow_ms} cpus={os.cpu_count()}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        console_file = open(os.path.join(tmp, 'console.log'), 'w')
+        streams = {'file': console_file, 'slow': SlowStream(slow_ms / 1000)}
+        for stream_name, stream in streams.items():
+            for queued in (False, True):
+                logger = configure('bench', os.path.join(tmp, 'bench.log'), queued, stream)
+                p50, p99, elapsed = time_calls(logger, threads, calls)
+                mode = 'queued' if queued else 'sync'
+                print(f"logger.info  console={stream_name:<4} {mode:<6}  p50 {p50:7.3f} ms  p99 {p99:7.3f} ms  "
+                      f"threads done in {elapsed * 1000:8.1f} ms")
+
+        from app import app
+        rng = np.random.RandomState(0)
+        frame = pd.DataFrame(rng.rand(2000, 6), columns=[f'f{i}' for i in range(6)])
+        client = app.test_client()
+        client.post('/api/upload?filename=bench.csv', data=frame.to_csv(index=False).encode(),
+                    headers={'Content-Type': 'text/csv'})
+        for queued in (False, True):
+            configure('CustomerSegmentation', os.path.join(tmp, 'app.log'), queued, streams['slow'])
+            samples = []
+            for _ in range(200):
+                start = time.perf_counter()
+                client.get('/api/data-quality')
+                samples.append(time.perf_counter() - start)
+            p50, p99 = percentiles(samples)
+            mode = 'queued' if queued else 'sync'
+            print(f"/api/data-quality console=slow {mode:<6}  p50 {p50:7.3f} ms  p99 {p99:7.3f} ms")
+        console_file.close()
+
+
+if __name__ == '__main__':
+    main()
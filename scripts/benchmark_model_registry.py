@@ -0,0 +1,73 @@
+"""
+Benchmark what saving and loading a clustering model costs the request.
+
+Fits K-Means (k=8) on a synthetic n_rows x 6 dataset, then times, per call:
+the previous joblib.dump() to model/kmeans_model.pkl on the request thread,
+ModelRegistry.register() (serialize + hand off the write), a new version's
+background write including fsync and garbage collection (register + flush),
+and load_model() from memory and from disk.
+
+Usage: python scripts/benchmark_model_registry.py [n_rows] [runs]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+from sklearn.cluster import KMeans
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.registry import ModelRegistry
+
+
+def median_ms(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    X = np.random.RandomState(0).rand(n_rows, 6)
+    model = KMeans(n_clusters=8, n_init=1, random_state=0).fit(X)
+    print(f"n_rows={n_rows} runs={runs} cpus={os.cpu_count()}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'kmeans_model.pkl')
+        registry = ModelRegistry(os.path.join(tmp, 'registry'))
+        results = {
+            'joblib.dump (previous)': median_ms(lambda: joblib.dump(model, path), runs),
+            'register (request thread)': median_ms(lambda: registry.register(model, {'n_clusters': 8}), runs),
+        }
+        registry.flush()
+
+        seeds = iter(range(1, runs + 1))
+
+        def register_and_flush():
+            # A new seed changes the dump, so each call writes and fsyncs a new version
+            model.random_state = next(seeds)
+            registry.register(model, {'n_clusters': 8})
+            registry.flush()
+        results['register + background write'] = median_ms(register_and_flush, runs)
+
+        version = registry.register(model, {'n_clusters': 8})
+        registry.flush()
+        results['load_model (memory)'] = median_ms(lambda: registry.load_model('latest'), runs)
+        results['load_model (disk)'] = median_ms(
+            lambda: ModelRegistry(registry.root).load_model(version), runs)
+        for name, ms in results.items():
+            print(f"{name:<28} {ms:8.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark peak memory of the copy and matrix preprocessing modes.
+
+Writes a synthetic customer CSV, runs preprocess_data in both modes under a
+MemoryTracker and prints the per-stage peaks relative to the raw data size.
+
+Usage: python scripts/benchmark_preprocessing_memory.py [n_rows]
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.preprocessing import preprocess_data
+from utils.memory import MemoryTracker, frame_memory_mb
+
+
+def make_csv(path: str, n_rows: int, seed: int = 42) -> None:
+    rng = np.random.RandomState(seed)
+    df = pd.DataFrame({
+        'CustomerID': np.arange(n_rows),
+        'Age': rng.randint(18, 70, n_rows).astype(float),
+        'Annual_Income': rng.normal(60000, 15000, n_rows),
+        'Spending_Score': rng.randint(1, 100, n_rows),
+        'Purchase_Frequency': rng.poisson(8, n_rows),
+        'Average_Order_Value': rng.gamma(2, 80, n_rows),
+        'Membership_Years': rng.randint(0, 15, n_rows),
+        'Product_Category_Preference': rng.choice(['Electronics', 'Fashion', 'Home', 'Luxury'], n_rows),
+    })
+    df.loc[rng.rand(n_rows) < 0.01, 'Age'] = np.nan
+    df.to_csv(path, index=False)
+
+
+def main() -> None:
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'customers.csv')
+        make_csv(path, n_rows)
+        raw_mb = frame_memory_mb(pd.read_csv(path))
+        print(f"rows={n_rows} raw DataFrame={raw_mb:.1f} MB")
+        for mode in ('copy', 'matrix'):
+            tracker = MemoryTracker()
+            preprocess_data(path, mode=mode, tracker=tracker)
+            report = tracker.report(raw_mb=raw_mb)
+            tracker.close()
+            stages = ', '.join(f"{name} {s['peak_mb']:.1f} MB" for name, s in report['stages'].items())
+            print(f"{mode:<7} peak {report['peak_mb']:.1f} MB ({report['peak_to_raw_ratio']}x raw) | {stages}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark JSON serialization and response compression.
+
+Builds the clustering scatter chart the way /api/visualizations does for a
+synthetic dataset of n_rows rows and compares the previous encoding path
+(plotly.io.to_json, json.loads, then Flask's standard-library encoder) with
+the current one (plotly.io.to_json embedded as RawJSON, encoded by
+utils.serialization.dumps). The /api/cluster-data payload is encoded with
+both encoders as well. Reports the payload size raw, gzipped at levels 1 and 6 and, when the
+brotli package is installed, brotli-compressed, with the time each takes.
+
+Usage: python scripts/benchmark_serialization.py [n_rows] [runs]
+"""
+
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from flask.json.provider import DefaultJSONProvider
+
+from app import app
+from utils.serialization import RawJSON, available_encodings, compress, dumps
+
+
+def median_ms(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def scatter_figure(n_rows: int):
+    import plotly.express as px
+    rng = np.random.RandomState(0)
+    frame = pd.DataFrame({'x': rng.randn(n_rows), 'y': rng.randn(n_rows),
+                          'Cluster': rng.randint(0, 4, n_rows).astype(str)})
+    fig = px.scatter(frame, x='x', y='y', color='Cluster')
+    fig.update_traces(marker=dict(size=10, line=dict(width=1, color='white'), opacity=0.8))
+    return fig
+
+
+def cluster_data_payload(n_rows: int) -> dict:
+    rng = np.random.RandomState(0)
+    frame = pd.DataFrame({'Age': rng.randint(18, 80, n_rows), 'Income': rng.gamma(2, 30000, n_rows),
+                          'Score': rng.randint(1, 100, n_rows), 'Tenure': rng.randint(0, 20, n_rows)})
+    client = app.test_client()
+    client.post('/api/upload?filename=bench.csv', data=frame.to_csv(index=False).encode(),
+                content_type='text/csv')
+    client.post('/api/cluster', json={'n_clusters': 4})
+    return client.get('/api/cluster-data').get_json()
+
+
+def report_sizes(name: str, body: bytes, runs: int) -> None:
+    print(f"  {name} size: raw {len(body) / 1024:8.1f} KB", end='')
+    for encoding, level in [('gzip', 1), ('gzip', 6)] + [('br', 4)] * ('br' in available_encodings()):
+        options = {'gzip_level': level} if encoding == 'gzip' else {'brotli_quality': level}
+        packed = compress(body, encoding, **options)
+        elapsed = median_ms(lambda: compress(body, encoding, **options), runs)
+        print(f"   {encoding}-{level} {len(packed) / 1024:7.1f} KB ({elapsed:.1f} ms)", end='')
+    print()
+
+
+def main() -> None:
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    app.config['SAVE_UPLOADS'] = False
+    stdlib = DefaultJSONProvider(app)
+    import plotly.io
+    print(f"n_rows={n_rows} runs={runs} encodings={available_encodings()}")
+
+    fig = scatter_figure(n_rows)
+    before = median_ms(lambda: stdlib.dumps({'scatter_chart': json.loads(plotly.io.to_json(fig))}), runs)
+    after = median_ms(lambda: dumps({'scatter_chart': RawJSON(plotly.io.to_json(fig))}), runs)
+    to_json = median_ms(lambda: plotly.io.to_json(fig), runs)
+    print(f"scatter chart: before {before:8.2f} ms   after {after:8.2f} ms   (plotly.io.to_json alone {to_json:.1f} ms)")
+    report_sizes('scatter chart', dumps({'scatter_chart': RawJSON(plotly.io.to_json(fig))}), runs)
+
+    payload = cluster_data_payload(n_rows)
+    before = median_ms(lambda: stdlib.dumps(payload), runs)
+    after = median_ms(lambda: dumps(payload), runs)
+    print(f"cluster data:  before {before:8.2f} ms   after {after:8.2f} ms")
+    report_sizes('cluster data', dumps(payload), runs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark the development server against the gunicorn production profile.
+
+Starts each server as a subprocess, uploads data/customers.csv into one
+workspace per client, then measures requests/sec for a light endpoint
+(GET /api/status) and a CPU-heavy one (POST /api/cluster) with concurrent
+clients. Also reports the proportional set size (PSS) of the gunicorn master
+plus two workers with and without preload_app, which shows how much of the
+preloaded imports and state the workers share copy-on-write.
+
+Usage: python scripts/benchmark_server.py [clients] [seconds]
+"""
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSV_PATH = os.path.join(ROOT, 'data', 'customers.csv')
+
+
+def start_server(kind: str, port: int, extra_env: dict = None) -> subprocess.Popen:
+    env = dict(os.environ, SERVER_PORT=str(port), SAVE_UPLOADS='False', LOG_LEVEL='WARNING', **(extra_env or {}))
+    if kind == 'dev':
+        cmd = [sys.executable, os.path.join(ROOT, 'src', 'app.py')]
+    else:
+        cmd = [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT, 'config', 'gunicorn.conf.py'),
+               '--bind', f'127.0.0.1:{port}']
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=1).read()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    stop_server(proc)
+    raise RuntimeError(f'{kind} server did not start')
+
+
+def stop_server(proc: subprocess.Popen) -> None:
+    os.killpg(proc.pid, signal.SIGTERM)
+    proc.wait(timeout=30)
+
+
+def request(opener, port: int, path: str, body: bytes = None, content_type: str = None) -> bytes:
+    req = urllib.request.Request(f'http://127.0.0.1:{port}{path}', data=body)
+    if content_type:
+        req.add_header('Content-Type', content_type)
+    return opener.open(req, timeout=120).read()
+
+
+def run_load(port: int, openers: list, seconds: float, path: str, body: bytes = None) -> float:
+    counts = [0] * len(openers)
+    stop = time.time() + seconds
+
+    def client(i):
+        while time.time() < stop:
+            request(openers[i], port, path, body, 'application/json' if body else None)
+            counts[i] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(len(openers))]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / (time.time() - start)
+
+
+def pss_mb(pid: int) -> float:
+    """PSS of a process and its children, in MB (Linux only)."""
+    pids = [pid] + [int(p) for p in subprocess.run(['pgrep', '-P', str(pid)], capture_output=True,
+                                                   text=True).stdout.split()]
+    total = 0
+    for p in pids:
+        with open(f'/proc/{p}/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    total += int(line.split()[1])
+    return total / 1024
+
+
+def main() -> None:
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    with open(CSV_PATH, 'rb') as f:
+        csv_body = f.read()
+    print(f"clients={clients} seconds={seconds} cpus={os.cpu_count()}")
+
+    for kind, port in (('dev', 5101), ('gunicorn', 5102)):
+        proc = start_server(kind, port)
+        try:
+            # Each client keeps its session cookie, and so its own workspace
+            openers = [urllib.request.build_opener(urllib.request.HTTPCookieProcessor()) for _ in range(clients)]
+            for opener in openers:
+                request(opener, port, '/api/upload?filename=customers.csv', csv_body, 'text/csv')
+            status_rps = run_load(port, openers, seconds, '/api/status')
+            cluster_rps = run_load(port, openers, seconds, '/api/cluster', json.dumps({'n_clusters': 4}).encode())
+        finally:
+            stop_server(proc)
+        print(f"{kind:<10} /api/status {status_rps:8.1f} req/s   /api/cluster {cluster_rps:6.1f} req/s")
+
+    if sys.platform.startswith('linux'):
+        for preload in (True, False):
+            proc = start_server('gunicorn', 5103, {'GUNICORN_WORKERS': '2', 'GUNICORN_PRELOAD': str(preload)})
+            try:
+                time.sleep(2)
+                print(f"gunicorn 2 workers preload={preload!s:<5} PSS {pss_mb(proc.pid):6.1f} MB")
+            finally:
+                stop_server(proc)
+
+
+if __name__ == '__main__':
+    main()
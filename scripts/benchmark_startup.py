@@ -0,0 +1,82 @@
+"""
+Benchmark application cold start.
+
+Runs `import app` in fresh interpreters with -X importtime and reports the
+cumulative import time of each module the app imports directly, the total
+wall time of the import, and the time to the first /api/status response for
+each STATE_RESTORE mode, with a synthetic saved state of n_rows rows for
+the shared workspace of WORKSPACE_MODE=single in a temporary STATE_DIR.
+
+Usage: python scripts/benchmark_startup.py [runs] [n_rows]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.state import save_state
+from utils.workspace import DEFAULT_WORKSPACE
+
+IMPORT_APP = "import sys, time; sys.path.insert(0, 'src'); t = time.perf_counter(); import app; "
+# The first request for the default workspace (WORKSPACE_MODE=single) is the one that pays a lazy restore
+FIRST_REQUEST = "app.app.test_client().get('/api/status'); "
+
+
+def run(code: str, env: dict = None, importtime: bool = False) -> subprocess.CompletedProcess:
+    cmd = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', code]
+    return subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True, check=True,
+                          env=dict(os.environ, LOG_LEVEL='WARNING', **(env or {})))
+
+
+def direct_imports(stderr: str) -> dict:
+    """Cumulative microseconds of each module imported directly by app."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line.split('|')
+        # Names are indented two spaces per nesting level below app
+        if len(name) - len(name.lstrip(' ')) == 3:
+            times[name.strip()] = int(cumulative_us)
+    return times
+
+
+def timed(code: str, runs: int, env: dict = None) -> float:
+    samples = [float(run(code + "print(time.perf_counter() - t)", env).stdout.split()[-1]) for _ in range(runs)]
+    return statistics.median(samples)
+
+
+def main() -> None:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    n_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+
+    per_module = direct_imports(run(IMPORT_APP, importtime=True).stderr)
+    print("Direct imports of app (cumulative ms):")
+    for name, micros in sorted(per_module.items(), key=lambda item: -item[1])[:12]:
+        print(f"  {name:<28} {micros / 1000:8.1f}")
+    loaded = run(IMPORT_APP + "print(sorted(m for m in ('sklearn', 'scipy', 'plotly') if m in sys.modules))").stdout
+    print(f"Heavy packages loaded by import: {loaded.strip()}")
+    print(f"import app (median of {runs}): {timed(IMPORT_APP, runs):.3f} s")
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        rng = np.random.RandomState(0)
+        frame = pd.DataFrame(rng.rand(n_rows, 8), columns=[f'f{i}' for i in range(8)])
+        path = save_state({'PROCESSED_DATA': frame, 'ORIGINAL_DATA': frame.copy(), 'METADATA': {}},
+                          os.path.join(state_dir, f'{DEFAULT_WORKSPACE}.pkl'))
+        print(f"Saved state: {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+        for mode in ('eager', 'lazy'):
+            env = {'STATE_RESTORE': mode, 'WORKSPACE_MODE': 'single', 'STATE_DIR': state_dir}
+            ready = timed(IMPORT_APP, runs, env)
+            first = timed(IMPORT_APP + FIRST_REQUEST, runs, env)
+            print(f"  STATE_RESTORE={mode:<6} import {ready:.3f} s   import + first default-workspace request {first:.3f} s")
+
+if __name__ == '__main__':
+    main()
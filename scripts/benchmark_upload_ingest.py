@@ -0,0 +1,88 @@
+"""
+Benchmark save-then-reread uploads against streamed ingest.
+
+The old path hashes the upload into a file under data/, parses it back from
+disk and profiles the frame; the streamed path hashes, parses and profiles
+the upload stream in one read while the disk copy is written in the
+background. The gzip row streams a .csv.gz upload through the same path,
+decompressing as the parser reads.
+
+Usage: python scripts/benchmark_upload_ingest.py [n_rows]
+"""
+
+import gzip
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ingest import ingest_csv
+from utils.data_profile import profile_dataframe
+
+
+def make_csv_bytes(n_rows: int, seed: int = 42) -> bytes:
+    rng = np.random.RandomState(seed)
+    df = pd.DataFrame({
+        'CustomerID': np.arange(n_rows),
+        'Age': rng.randint(18, 70, n_rows),
+        'Annual_Income': rng.normal(60000, 15000, n_rows).round(2),
+        'Spending_Score': rng.randint(1, 100, n_rows),
+        'Product_Category_Preference': rng.choice(['Electronics', 'Fashion', 'Home', 'Luxury'], n_rows),
+    })
+    return df.to_csv(index=False).encode()
+
+
+def save_then_reread(content: bytes, path: str) -> float:
+    start = time.perf_counter()
+    stream = io.BytesIO(content)
+    digest = hashlib.sha256()
+    with open(path, 'wb') as f:
+        for chunk in iter(lambda: stream.read(1024 * 1024), b''):
+            digest.update(chunk)
+            f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+    profile_dataframe(pd.read_csv(path))
+    return time.perf_counter() - start
+
+
+def streamed(content: bytes, path: str) -> float:
+    start = time.perf_counter()
+    result = ingest_csv(io.BytesIO(content), save_path=path)
+    elapsed = time.perf_counter() - start
+    result['writer'].close(keep=True, wait=True)
+    return elapsed
+
+
+def streamed_gzip(content: bytes, path: str) -> float:
+    start = time.perf_counter()
+    result = ingest_csv(io.BytesIO(content), save_path=path, compression='gzip')
+    elapsed = time.perf_counter() - start
+    result['writer'].close(keep=True, wait=True)
+    return elapsed
+
+
+def main() -> None:
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    content = make_csv_bytes(n_rows)
+    print(f"rows={n_rows} size={len(content) / 1024 / 1024:.1f} MB")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'upload.csv')
+        for name, fn in (('save-then-reread', save_then_reread), ('streamed ingest', streamed)):
+            best = min(fn(content, path) for _ in range(3))
+            print(f"{name:<17} {best:.3f} s to parsed and profiled frame")
+        compressed = gzip.compress(content, compresslevel=6)
+        best = min(streamed_gzip(compressed, path + '.gz') for _ in range(3))
+        print(f"{'streamed gzip':<17} {best:.3f} s to parsed and profiled frame "
+              f"({len(compressed) / 1024 / 1024:.1f} MB upload)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark the cached projection and figure of /api/visualizations.
+
+Uploads a synthetic dataset of n_rows rows and clusters it, then times the
+2D projection on its own, the first /api/visualizations request after the
+run (renders the figures) and repeated requests without an ETag (figure
+cache lookup), for the default point budget and for every row, using the
+Flask test client.
+
+Usage: python scripts/benchmark_viz_cache.py [n_rows] [runs]
+"""
+
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express  # noqa: F401 - imported up front so 'first' times rendering, not the import
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+import app as app_module
+from app import app
+from utils.logger import app_logger
+from utils.reduction import fit_projection_2d
+
+
+def median_ms(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    app.config['SAVE_UPLOADS'] = False
+    app_logger.setLevel('WARNING')
+    rng = np.random.RandomState(0)
+    frame = pd.DataFrame({'CustomerID': np.arange(n_rows), 'Age': rng.randint(18, 80, n_rows),
+                          'Income': rng.gamma(2, 30000, n_rows), 'Score': rng.randint(1, 100, n_rows),
+                          'Tenure': rng.randint(0, 20, n_rows)})
+    client = app.test_client()
+    client.post('/api/upload?filename=bench.csv', data=frame.to_csv(index=False).encode(), content_type='text/csv')
+    workspace_id = client.get('/api/status').get_json()['workspace_id']
+    print(f"n_rows={n_rows} runs={runs} cpus={os.cpu_count()}")
+
+    with app_module.WORKSPACES.checkout(workspace_id) as ws:
+        processed = ws.processed_data
+    print(f"{'fit_projection_2d':<34} {median_ms(lambda: fit_projection_2d(processed), runs):8.1f} ms")
+
+    for query in ('', '?max_points=0'):
+        client.post('/api/cluster', json={'n_clusters': 4})
+        path = f'/api/visualizations{query}'
+        start = time.perf_counter()
+        client.get(path)
+        first = (time.perf_counter() - start) * 1000
+        cached = median_ms(lambda: client.get(path), runs)
+        print(f"{path:<34} first {first:8.1f} ms   cached {cached:6.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark /api/visualizations with and without a scatter point budget.
+
+Uploads a synthetic dataset of n_rows rows, clusters it into 6 segments of
+very different sizes, then times the full response and reports its size
+(uncompressed and gzip) for every row, the default budget (stratified or
+binned, as chosen by 'auto'), and explicit stratified and binned sampling,
+using the Flask test client.
+
+Usage: python scripts/benchmark_viz_downsampling.py [n_rows] [runs]
+"""
+
+import gzip
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from app import app
+from utils.logger import app_logger
+
+QUERIES = ('max_points=0', '', 'sampling=stratified', 'sampling=binned')
+
+
+def median_ms(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    app.config['SAVE_UPLOADS'] = False
+    app_logger.setLevel('WARNING')
+    rng = np.random.RandomState(0)
+    # Segments from 60% down to 0.5% of the customers
+    sizes = (np.array([0.6, 0.2, 0.1, 0.06, 0.035, 0.005]) * n_rows).astype(int)
+    centers = rng.uniform(0, 100, (len(sizes), 4))
+    frame = pd.DataFrame(np.vstack([rng.normal(c, 6, (s, 4)) for c, s in zip(centers, sizes)]),
+                         columns=['Age', 'Income', 'Score', 'Tenure'])
+    client = app.test_client()
+    client.post('/api/upload?filename=bench.csv', data=frame.to_csv(index=False).encode(), content_type='text/csv')
+    client.post('/api/cluster', json={'n_clusters': len(sizes)})
+    print(f"n_rows={len(frame)} runs={runs} VIZ_MAX_POINTS={app.config['VIZ_MAX_POINTS']}")
+
+    for query in QUERIES:
+        path = f'/api/visualizations?{query}' if query else '/api/visualizations'
+        response = client.get(path)
+        summary = response.get_json()['sampling']
+        smallest = min(c['markers'] for c in summary['per_cluster'].values())
+        ms = median_ms(lambda: client.get(path), runs)
+        print(f"{query or '(default)':<20} {summary['method']:<10} markers {summary['markers']:7d} "
+              f"(smallest cluster {smallest:5d})  {ms:8.1f} ms  {len(response.data) / 1024 / 1024:7.2f} MB  "
+              f"gzip {len(gzip.compress(response.data, 1)) / 1024 / 1024:6.2f} MB")
+
+
+if __name__ == '__main__':
+    main()
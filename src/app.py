@@ -7,11 +7,19 @@ Version: 1.0.0
 Last Updated: 2024
 """
 
-from flask import Flask, render_template, request, jsonify, flash, redirect, url_for
+from flask import Flask, Response, render_template, request, jsonify, flash, redirect, url_for, session, g, send_file
+from flask import has_request_context
 import os
 import sys
 import json
 import time
+import uuid
+import queue
+import threading
+import functools
+import contextlib
+import shutil
+import zlib
 from dotenv import load_dotenv
 from werkzeug.utils import secure_filename
 import pandas as pd
@@ -20,17 +28,20 @@ import numpy as np
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
-from utils.preprocessing import preprocess_data, get_feature_statistics, get_data_quality_metrics, get_correlation_matrix
+
+# Load environment variables before the utils modules read them (utils.logger does at import)
+load_dotenv()
+
+from utils.preprocessing import preprocess_data, preprocess_frame, get_feature_statistics, get_data_quality_metrics
 from utils.clustering import (
     find_optimal_clusters,
+    silhouette_for_k,
     perform_clustering,
     calculate_cluster_metrics,
     analyze_clusters,
     get_cluster_recommendations,
     get_cluster_profiles,
-    get_cluster_centroids,
-    save_model,
-    load_model
+    get_cluster_centroids
 )
 from utils.feature_importance import (
     calculate_feature_importance_in_clusters,
@@ -38,14 +49,23 @@ from utils.feature_importance import (
     generate_cluster_summary
 )
 from utils.export import export_to_csv, export_to_json, export_html_report
-from utils.state import save_state, load_state, get_state_history
-from utils.logger import app_logger
-import plotly
-import plotly.graph_objs as go
-import plotly.express as px
-
-# Load environment variables
-load_dotenv()
+from utils.state import save_state, load_state, get_state_history, STATE_FILE
+from utils.data_profile import profile_dataframe
+from utils.cache import LRUCache, SingleFlight
+from utils.ingest import ingest_csv, upload_compression, UploadTooLargeError, UnsupportedCompressionError
+from utils.memory import MemoryTracker, frame_memory_mb, track_stage, process_rss_bytes
+from utils.metrics import REGISTRY, time_stage
+from utils.profiling import RequestProfiler
+from utils.reduction import (fit_reduction, reduction_summary, reduction_features, select_features, project_2d,
+                             fit_projection_2d, IDENTIFIER_COLUMNS)
+from utils.correlation import compute_correlation, matrix_to_list
+from utils.workspace import WorkspaceStore, DEFAULT_WORKSPACE
+from utils.jobs import JobManager
+from utils.admission import AdmissionPool, AdmissionRejected
+from utils.registry import ModelRegistry
+from utils.downsample import downsample_scatter, DOWNSAMPLE_METHODS
+from utils.serialization import FastJSONProvider, RawJSON, available_encodings, negotiate_encoding, compress
+from utils.logger import app_logger, RouteSampler, parse_sample_rates
 
 TEMPLATE_DIR = os.path.join(BASE_DIR, 'templates')
 STATIC_DIR = os.path.join(BASE_DIR, 'static')
@@ -54,6 +74,8 @@ STATIC_DIR = os.path.join(BASE_DIR, 'static')
 app = Flask(__name__,
             template_folder=TEMPLATE_DIR,
             static_folder=STATIC_DIR)
+# orjson-backed encoder that also embeds pre-serialized RawJSON (e.g. plotly figures) verbatim
+app.json = FastJSONProvider(app)
 
 # Verify paths exist
 if not os.path.exists(TEMPLATE_DIR):
@@ -66,35 +88,534 @@ app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-pro
 app.config['UPLOAD_FOLDER'] = os.path.join(BASE_DIR, os.getenv('UPLOAD_FOLDER', 'data'))
 app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_UPLOAD_SIZE', 16)) * 1024 * 1024  # Default 16MB
 app.config['JSON_SORT_KEYS'] = False
+app.config['CATEGORICAL_ENCODING'] = os.getenv('CATEGORICAL_ENCODING', 'label')  # label, codes or onehot
+app.config['PREPROCESS_MODE'] = os.getenv('PREPROCESS_MODE', 'copy')  # copy or matrix
+app.config['PREPROCESS_WORKERS'] = int(os.getenv('PREPROCESS_WORKERS', 1))  # parallel categorical columns; 1 = serial
+app.config['PREPROCESS_EXECUTOR'] = os.getenv('PREPROCESS_EXECUTOR', 'thread')  # thread or process
+app.config['TRACK_PREPROCESS_MEMORY'] = os.getenv('TRACK_PREPROCESS_MEMORY', 'False').lower() == 'true'
+app.config['REDUCTION_METHOD'] = os.getenv('REDUCTION_METHOD', 'none')  # none, pca or random
+app.config['REDUCTION_VARIANCE'] = float(os.getenv('REDUCTION_VARIANCE', 0.95))
+app.config['REDUCTION_COMPONENTS'] = os.getenv('REDUCTION_COMPONENTS', 'auto')
+app.config['SAVE_UPLOADS'] = os.getenv('SAVE_UPLOADS', 'True').lower() == 'true'  # background copy to UPLOAD_FOLDER
+app.config['INGEST_CHUNK_ROWS'] = int(os.getenv('INGEST_CHUNK_ROWS', 200000))
+app.config['MAX_DECOMPRESSED_SIZE'] = int(os.getenv('MAX_DECOMPRESSED_SIZE', 512)) * 1024 * 1024  # CSV size after decompression
+app.config['MAX_UPLOAD_ROWS'] = int(os.getenv('MAX_UPLOAD_ROWS', 5000000))
+app.config['UPLOAD_CACHE_SIZE'] = int(os.getenv('UPLOAD_CACHE_SIZE', 4))  # processed uploads kept for reuse
+app.config['WORKSPACE_MODE'] = os.getenv('WORKSPACE_MODE', 'session')  # session or single
+app.config['MAX_SESSION_WORKSPACES'] = int(os.getenv('MAX_SESSION_WORKSPACES', 16))  # Extra workspaces per session
+app.config['WORKSPACE_MEMORY_BUDGET'] = int(os.getenv('WORKSPACE_MEMORY_BUDGET', 1024)) * 1024 * 1024  # resident workspaces
+app.config['WORKSPACE_SPILL_DIR'] = os.path.join(BASE_DIR, os.getenv('WORKSPACE_SPILL_DIR', 'model/workspaces'))
+app.config['WORKSPACE_IDLE_TTL'] = int(os.getenv('WORKSPACE_IDLE_TTL', 86400))  # seconds; idle workspaces are dropped, 0 = never
+app.config['MAX_WORKSPACES'] = int(os.getenv('MAX_WORKSPACES', 1000))  # per process; 0 = no limit
+app.config['STATE_DIR'] = os.path.join(BASE_DIR, os.getenv('STATE_DIR', 'model/state'))  # one saved state per workspace
+app.config['STATE_RESTORE'] = os.getenv('STATE_RESTORE', 'lazy')  # lazy, background or eager
+app.config['JOB_WORKERS'] = int(os.getenv('JOB_WORKERS', 2))  # background sweep / clustering workers
+app.config['JOB_EXECUTOR'] = os.getenv('JOB_EXECUTOR', 'process')  # process or thread
+app.config['SSE_KEEPALIVE_SECONDS'] = float(os.getenv('SSE_KEEPALIVE_SECONDS', 15))
+app.config['SPECULATIVE_SWEEP'] = os.getenv('SPECULATIVE_SWEEP', 'False').lower() == 'true'  # sweep right after upload
+app.config['SPECULATIVE_NICENESS'] = int(os.getenv('SPECULATIVE_NICENESS', 10))
+app.config['COMPRESS_RESPONSES'] = os.getenv('COMPRESS_RESPONSES', 'True').lower() == 'true'  # gzip / br by Accept-Encoding
+app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', 1024))  # bytes; smaller bodies are sent as-is
+app.config['COMPRESS_GZIP_LEVEL'] = int(os.getenv('COMPRESS_GZIP_LEVEL', 1))
+app.config['COMPRESS_BROTLI_QUALITY'] = int(os.getenv('COMPRESS_BROTLI_QUALITY', 4))
+# Heavy slots + queue should stay below the server's thread count so light requests always find a thread
+app.config['HEAVY_CONCURRENCY'] = int(os.getenv('HEAVY_CONCURRENCY', 2))
+app.config['HEAVY_QUEUE'] = int(os.getenv('HEAVY_QUEUE', 2))
+app.config['HEAVY_PER_WORKSPACE'] = int(os.getenv('HEAVY_PER_WORKSPACE', 2))  # running + queued; 0 = no limit
+app.config['LIGHT_CONCURRENCY'] = int(os.getenv('LIGHT_CONCURRENCY', 32))
+app.config['LIGHT_QUEUE'] = int(os.getenv('LIGHT_QUEUE', 64))
+app.config['ADMISSION_TIMEOUT'] = float(os.getenv('ADMISSION_TIMEOUT', 30))  # max seconds queued
+app.config['ENABLE_PROFILING'] = os.getenv('ENABLE_PROFILING', 'False').lower() == 'true'  # X-Profile / ?profile=1
+app.config['PROFILE_SAMPLE_RATE'] = float(os.getenv('PROFILE_SAMPLE_RATE', 0.0))  # fraction of requests profiled
+app.config['PROFILE_DIR'] = os.path.join(BASE_DIR, os.getenv('PROFILE_DIR', 'logs/profiles'))
+app.config['PROFILE_MAX_FILES'] = int(os.getenv('PROFILE_MAX_FILES', 50))
+app.config['MODEL_REGISTRY_DIR'] = os.path.join(BASE_DIR, os.getenv('MODEL_REGISTRY_DIR', 'model/registry'))
+app.config['MODEL_REGISTRY_MAX_VERSIONS'] = int(os.getenv('MODEL_REGISTRY_MAX_VERSIONS', 20))  # aliased versions are always kept
+app.config['MODEL_ALIAS_WRITES'] = os.getenv('MODEL_ALIAS_WRITES', 'False').lower() == 'true'  # POST /api/models/<ref>/alias
+# Scatter view point budget (0 = every row) and rows each cluster keeps when sampled
+app.config['VIZ_MAX_POINTS'] = int(os.getenv('VIZ_MAX_POINTS', 20000))
+app.config['VIZ_MIN_POINTS_PER_CLUSTER'] = int(os.getenv('VIZ_MIN_POINTS_PER_CLUSTER', 200))
+# Fraction of DEBUG/INFO records kept per route rule; WARNING and above are always kept
+app.config['LOG_SAMPLE_RATES'] = os.getenv('LOG_SAMPLE_RATES', '/health=0,/metrics=0,/api/status=0.1,/api/jobs/<job_id>=0.1')
+
+# Ensure required directories exist (the logger, model registry and saved state create their own)
+os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-# Ensure required directories exist
-for directory in [app.config['UPLOAD_FOLDER'], 
-                  os.path.join(BASE_DIR, 'model'), 
-                  os.path.join(BASE_DIR, 'logs')]:
-    os.makedirs(directory, exist_ok=True)
+def _log_route():
+    """URL rule of the request being served (e.g. /api/jobs/<job_id>), for log sampling."""
+    if not has_request_context():
+        return None
+    return request.url_rule.rule if request.url_rule is not None else request.path
+
+
+LOG_SAMPLER = RouteSampler(parse_sample_rates(app.config['LOG_SAMPLE_RATES']), route=_log_route)
+app_logger.addFilter(LOG_SAMPLER)
 
 app_logger.info("Application initialized")
 
-# Global state
-PROCESSED_DATA = None
-ORIGINAL_DATA = None
-CLUSTER_LABELS = None
-KMEANS_MODEL = None
-METADATA = None
+def _export_dir(workspace_id):
+    """Directory of a workspace's /api/export files, so workspaces never overwrite each other's."""
+    return os.path.join(app.config['UPLOAD_FOLDER'], 'exports', workspace_id)
+
+
+def _workspace_dropped(ws):
+    # Let the registry collect the dropped workspace's models, and remove its exports
+    MODELS.remove_alias(_latest_alias(ws.workspace_id))
+    shutil.rmtree(_export_dir(ws.workspace_id), ignore_errors=True)
+
+
+# Analysis state lives in per-session workspaces (see utils.workspace). Idle
+# session workspaces are dropped; the shared single-mode workspace never is.
+_SESSION_MODE = app.config['WORKSPACE_MODE'] != 'single'
+WORKSPACES = WorkspaceStore(memory_budget_bytes=app.config['WORKSPACE_MEMORY_BUDGET'],
+                            spill_dir=app.config['WORKSPACE_SPILL_DIR'], state_dir=app.config['STATE_DIR'],
+                            idle_ttl=(app.config['WORKSPACE_IDLE_TTL'] or None) if _SESSION_MODE else None,
+                            max_workspaces=(app.config['MAX_WORKSPACES'] or None) if _SESSION_MODE else None,
+                            on_drop=_workspace_dropped)
+
+# Long-running sweeps and clustering runs submitted through /api/jobs
+JOBS = JobManager(max_workers=app.config['JOB_WORKERS'], executor=app.config['JOB_EXECUTOR'])
+# Speculative post-upload sweeps: one low-priority worker, so they never crowd out requested work
+SPECULATIVE_JOBS = JobManager(max_workers=1, executor=app.config['JOB_EXECUTOR'],
+                              niceness=app.config['SPECULATIVE_NICENESS'])
+
+# Admission control: CPU-heavy routes get a few slots of their own, so a burst
+# of sweeps queues (or is turned away) instead of starving everything else
+HEAVY_ENDPOINTS = {'optimal_clusters', 'optimal_clusters_stream', 'cluster', 'export_results'}
+HEAVY_POOL = AdmissionPool('heavy', app.config['HEAVY_CONCURRENCY'], app.config['HEAVY_QUEUE'],
+                           queue_timeout=app.config['ADMISSION_TIMEOUT'],
+                           per_client=app.config['HEAVY_PER_WORKSPACE'] or None)
+LIGHT_POOL = AdmissionPool('light', app.config['LIGHT_CONCURRENCY'], app.config['LIGHT_QUEUE'],
+                           queue_timeout=app.config['ADMISSION_TIMEOUT'])
+
+# Dataset versions are unique across workspaces and key the per-dataset caches below
+PROFILE_CACHE = LRUCache(max_entries=8)
+CORRELATION_CACHE = LRUCache(max_entries=8)
+PROJECTION_CACHE = LRUCache(max_entries=8)
+# Rendered /api/visualizations bodies keyed by (analysis version, max_points, sampling)
+FIGURE_CACHE = LRUCache(max_entries=16)
+# Processed uploads keyed by (content SHA-256, categorical encoding), shared by all workspaces
+UPLOAD_CACHE = LRUCache(max_entries=app.config['UPLOAD_CACHE_SIZE'])
+# Identical concurrent sweeps / fits keyed by (dataset version, endpoint, parameters) share one computation
+COMPUTE_FLIGHTS = SingleFlight()
+
+# Request profiles captured when ENABLE_PROFILING is on, listed by /api/profiles
+PROFILER = RequestProfiler(app.config['PROFILE_DIR'], sample_rate=app.config['PROFILE_SAMPLE_RATE'],
+                           max_profiles=app.config['PROFILE_MAX_FILES'])
+
+# Every clustering run's model, stored by content hash; 'latest-<workspace>' points at each workspace's newest
+# Garbage collection keeps the versions workspaces in this process still refer to
+MODELS = ModelRegistry(app.config['MODEL_REGISTRY_DIR'], max_versions=app.config['MODEL_REGISTRY_MAX_VERSIONS'],
+                       in_use=WORKSPACES.model_versions, logger=app_logger)
+
+
+def _process_rss_samples():
+    # Left out of the scrape on platforms where the RSS cannot be read
+    rss = process_rss_bytes()
+    return {} if rss is None else {(): rss}
+
+
+# Prometheus metrics served at /metrics; pipeline stages report into REGISTRY themselves
+REQUEST_SECONDS = REGISTRY.histogram('segmentation_request_seconds', 'Request latency, including admission wait',
+                                     ['endpoint'])
+ERRORS_TOTAL = REGISTRY.counter('segmentation_errors_total', 'Responses with a 4xx or 5xx status',
+                                ['endpoint', 'status'])
+_CACHES = {'profile': PROFILE_CACHE, 'correlation': CORRELATION_CACHE, 'upload': UPLOAD_CACHE,
+           'projection': PROJECTION_CACHE, 'figure': FIGURE_CACHE}
+REGISTRY.counter_callback('segmentation_cache_hits_total', 'Per-dataset cache hits',
+                          lambda: {(name, ): cache.hits for name, cache in _CACHES.items()}, ['cache'])
+REGISTRY.counter_callback('segmentation_cache_misses_total', 'Per-dataset cache misses',
+                          lambda: {(name, ): cache.misses for name, cache in _CACHES.items()}, ['cache'])
+REGISTRY.counter_callback('segmentation_log_records_sampled_out_total', 'DEBUG/INFO records dropped by log sampling',
+                          lambda: {(): LOG_SAMPLER.dropped})
+REGISTRY.counter_callback('segmentation_coalesced_requests_total', 'Requests that joined an identical computation',
+                          lambda: {(): COMPUTE_FLIGHTS.coalesced})
+REGISTRY.gauge_callback('segmentation_workspace_memory_bytes', 'Approximate memory held by resident workspace datasets',
+                        lambda: {(): WORKSPACES.resident_bytes()})
+REGISTRY.gauge_callback('segmentation_workspaces', 'Workspaces known to this process',
+                        lambda: {(): len(WORKSPACES.report()['workspaces'])})
+REGISTRY.gauge_callback('segmentation_process_resident_memory_bytes', 'Resident set size of this process',
+                        _process_rss_samples)
+REGISTRY.gauge_callback('segmentation_admission_queue_depth', 'Requests waiting for an admission slot',
+                        lambda: {(pool.name, ): pool.stats()['queue_depth'] for pool in (HEAVY_POOL, LIGHT_POOL)}, ['pool'])
+REGISTRY.gauge_callback('segmentation_admission_active', 'Requests holding an admission slot',
+                        lambda: {(pool.name, ): pool.stats()['active'] for pool in (HEAVY_POOL, LIGHT_POOL)}, ['pool'])
+REGISTRY.counter_callback('segmentation_admission_wait_seconds_total', 'Time admitted requests spent queued',
+                          lambda: {(pool.name, ): pool.wait_seconds_total for pool in (HEAVY_POOL, LIGHT_POOL)}, ['pool'])
+REGISTRY.counter_callback('segmentation_admission_rejected_total', 'Requests turned away by admission control',
+                          lambda: {(pool.name, reason): count for pool in (HEAVY_POOL, LIGHT_POOL)
+                                   for reason, count in pool.stats()['rejected'].items()}, ['pool', 'reason'])
+
+def restore_saved_states(workspace_ids):
+    """Load the pending saved states of these workspaces now."""
+    start = time.perf_counter()
+    restored = 0
+    for workspace_id in workspace_ids:
+        with WORKSPACES.checkout(workspace_id) as ws:  # checkout performs a pending restore
+            restored += ws.original_data is not None
+    if restored:
+        app_logger.info(f"Saved analysis state of {restored} workspace(s) restored from disk in "
+                        f"{time.perf_counter() - start:.2f}s")
+
+
+# Each workspace's saved state is restored into that workspace: on its first
+# use (lazy), or at start-up on a background thread (background) or before
+# serving (eager). Session workspaces keep their ID across restarts in the
+# signed session cookie. In single mode, a state saved by an earlier version
+# to the one global file is restored into the shared workspace.
+if app.config['WORKSPACE_MODE'] == 'single' and not os.path.exists(WORKSPACES.state_path(DEFAULT_WORKSPACE)):
+    WORKSPACES.defer_restore(DEFAULT_WORKSPACE, STATE_FILE)
+SAVED_WORKSPACES = [DEFAULT_WORKSPACE] if app.config['WORKSPACE_MODE'] == 'single' else WORKSPACES.saved_workspaces()
+if app.config['STATE_RESTORE'] == 'eager':
+    restore_saved_states(SAVED_WORKSPACES)
+elif app.config['STATE_RESTORE'] == 'background':
+    threading.Thread(target=restore_saved_states, args=(SAVED_WORKSPACES, ), name='state-restore',
+                     daemon=True).start()
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Observe request latency and count error responses per endpoint."""
+    endpoint = request.endpoint or 'unmatched'
+    if 'request_start' in g:
+        REQUEST_SECONDS.observe(time.perf_counter() - g.request_start, endpoint=endpoint)
+    if response.status_code >= 400:
+        ERRORS_TOTAL.inc(endpoint=endpoint, status=str(response.status_code))
+    return response
+
+
+@app.before_request
+def admit_request():
+    """
+    Take a slot in the heavy or light pool for the rest of the request.
+    
+    A full queue or a queue timeout answers 503, and a workspace over its
+    heavy-request limit 429, both with Retry-After.
+    """
+    heavy = request.endpoint in HEAVY_ENDPOINTS
+    client = None
+    if heavy:
+        try:
+            client = WorkspaceStore.validate_id(_workspace_id())
+        except (ValueError, PermissionError):
+            pass  # the view reports the invalid workspace ID
+    g.admission = contextlib.ExitStack()
+    try:
+        g.admission.enter_context((HEAVY_POOL if heavy else LIGHT_POOL).admit(client))
+    except AdmissionRejected as e:
+        app_logger.warning(f"Request to {request.path} rejected: {e}")
+        status = 429 if e.reason == 'client_limit' else 503
+        response = jsonify({'error': str(e), 'reason': e.reason, 'retry_after': e.retry_after})
+        response.status_code = status
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+
+
+@app.teardown_request
+def release_admission(exc):
+    admission = g.pop('admission', None)
+    if admission is not None:
+        admission.close()
+
+
+def _hold_admission(*holders):
+    """
+    Take the request's admission slot past the end of the request.
+    
+    Teardown then releases nothing; the slot is released once each of
+    holders has called the returned release(holder). Repeated calls are
+    ignored.
+    """
+    stack = g.admission.pop_all() if 'admission' in g else contextlib.ExitStack()
+    pending, lock = set(holders), threading.Lock()
+    
+    def release(holder):
+        with lock:
+            if holder not in pending:
+                return
+            pending.discard(holder)
+            if pending:
+                return
+        stack.close()
+    
+    return release
+
+
+@app.before_request
+def start_profiling():
+    """
+    Profile this request when asked to with X-Profile: 1 or ?profile=1, or when sampled.
+    
+    Runs after admission, so queueing time is not part of the profile.
+    """
+    if not app.config['ENABLE_PROFILING'] or request.endpoint in ('static', 'list_profiles', 'get_profile'):
+        return
+    requested = (request.headers.get('X-Profile') or request.args.get('profile', '')).lower() in ('1', 'true')
+    trigger = PROFILER.trigger(requested)
+    if trigger:
+        g.profile = (PROFILER.start(), trigger, time.perf_counter())
+
+
+@app.after_request
+def finish_profiling(response):
+    # Response compression runs before this hook, so its cost is part of the profile
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profiler, trigger, start = profile
+        summary = PROFILER.finish(profiler, {
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'trigger': trigger,
+            'wall_seconds': round(time.perf_counter() - start, 6)
+        })
+        response.headers['X-Profile-ID'] = summary['profile_id']
+        app_logger.info(f"Profiled {request.method} {request.path} as {summary['profile_id']}")
+    return response
+
+
+@app.teardown_request
+def discard_profiling(exc):
+    profile = g.pop('profile', None)
+    if profile is not None:  # the request failed before finish_profiling ran
+        profile[0].disable()
+
+
+# Text bodies worth compressing; images and downloads are left alone
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'text/plain', 'text/csv', 'text/css', 'application/javascript'}
+
+
+@app.after_request
+def compress_response(response):
+    """Compress large text responses with the client's preferred encoding (see utils.serialization)."""
+    if (not app.config['COMPRESS_RESPONSES']
+            or response.direct_passthrough or response.is_streamed
+            or response.status_code in (204, 304) or response.status_code < 200
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if len(body) < app.config['COMPRESS_MIN_SIZE']:
+        return response
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding', ''))
+    if encoding is None:
+        return response
+    response.set_data(compress(body, encoding, gzip_level=app.config['COMPRESS_GZIP_LEVEL'],
+                               brotli_quality=app.config['COMPRESS_BROTLI_QUALITY']))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # A strong ETag names one exact byte sequence, so each encoding gets its own
+        response.set_etag(f'{etag}-{encoding}')
+    return response
+
+
+def _session_workspaces():
+    """Workspace IDs the server issued to this browser session, its default first."""
+    if 'workspace_id' not in session:
+        session['workspace_id'] = uuid.uuid4().hex
+    return [session['workspace_id']] + session.get('workspace_ids', [])
+
+
+def _workspace_id():
+    """
+    Resolve the workspace of the current request.
+    
+    Each browser session gets its own workspace. An X-Workspace-ID header or
+    ?workspace= parameter selects another workspace, but only one that the
+    server issued to this session (see POST /api/workspaces), so a client
+    cannot reach another session's data by naming its ID. WORKSPACE_MODE=single
+    shares one workspace between all clients (the pre-workspace behaviour).
+    
+    Raises:
+        ValueError: The requested ID is malformed
+        PermissionError: The requested ID was not issued to this session
+    """
+    if app.config['WORKSPACE_MODE'] == 'single':
+        return DEFAULT_WORKSPACE
+    allowed = _session_workspaces()
+    requested = request.headers.get('X-Workspace-ID') or request.args.get('workspace')
+    if not requested:
+        return allowed[0]
+    WorkspaceStore.validate_id(requested)
+    if requested not in allowed:
+        raise PermissionError('Workspace not found for this session')
+    return requested
+
+
+def with_workspace_id(view):
+    """
+    Pass the request's validated workspace ID without checking the workspace out.
+    
+    For views that hold the workspace lock only around state access and run
+    long computations outside it.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            workspace_id = WorkspaceStore.validate_id(_workspace_id())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except PermissionError as e:
+            return jsonify({'error': str(e)}), 403
+        return view(workspace_id, *args, **kwargs)
+    return wrapper
+
+
+def _read_only():
+    """Whether the request only reads state, so an unknown workspace is not created for it."""
+    return request.method in ('GET', 'HEAD')
+
+
+def with_workspace(view):
+    """Run a view with the request's workspace checked out (and locked) as its first argument."""
+    @functools.wraps(view)
+    @with_workspace_id
+    def wrapper(workspace_id, *args, **kwargs):
+        with WORKSPACES.checkout(workspace_id, create=not _read_only()) as ws:
+            return view(ws, *args, **kwargs)
+    return wrapper
+
+
+# Analysis versions restart with the process and are counted separately in
+# each forked worker; the boot ID keeps ETags from an earlier run, or from
+# another worker, from matching
+BOOT_ID = uuid.uuid4().hex[:12]
+
+
+def _new_boot_id():
+    global BOOT_ID
+    BOOT_ID = uuid.uuid4().hex[:12]
+
+
+if hasattr(os, 'register_at_fork'):  # not on Windows, which does not fork
+    os.register_at_fork(after_in_child=_new_boot_id)
+
+
+def conditional_get(view):
+    """
+    Serve a read-only workspace view with a strong ETag and answer 304 when it matches.
+    
+    The ETag is the workspace's analysis version, which changes on upload,
+    clustering, load-state and reset, plus a checksum of the query string
+    for views with parameters, so a matching If-None-Match returns Not
+    Modified without running the view. Apply below with_workspace.
+    """
+    @functools.wraps(view)
+    def wrapper(ws, *args, **kwargs):
+        etag = f'{BOOT_ID}-{ws.analysis_version}'
+        if request.query_string:
+            etag += f'-{zlib.crc32(request.query_string):08x}'
+        candidates = [etag] + [f'{etag}-{encoding}' for encoding in available_encodings()]
+        if any(request.if_none_match.contains_weak(tag) for tag in candidates):
+            response = app.response_class(status=304)
+        else:
+            response = app.make_response(view(ws, *args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        if app.config['COMPRESS_RESPONSES']:
+            response.vary.add('Accept-Encoding')
+        return response
+    return wrapper
+
+
+def _apply_reduction(ws):
+    """
+    Fit the configured reduction on the processed data once per dataset.
+    
+    The reducer and its summary are stored in the metadata so they are persisted
+    with the analysis state and the saved model. K-Prototypes needs the raw
+    category codes, so the mixed-type path is never reduced. Identifier
+    columns (CustomerID) are unscaled codes that would take the first
+    component, so they are left out, as in the scatter projection.
+    """
+    ws.reduced_data = None
+    method = app.config['REDUCTION_METHOD']
+    if method == 'none' or ws.processed_data is None or _categorical_cols(ws):
+        return
+    components = app.config['REDUCTION_COMPONENTS']
+    ws.reduced_data, reducer = fit_reduction(
+        ws.processed_data,
+        method=method,
+        variance_target=app.config['REDUCTION_VARIANCE'],
+        n_components=int(components) if components != 'auto' else 'auto',
+        exclude=IDENTIFIER_COLUMNS
+    )
+    features = reduction_features(ws.processed_data, IDENTIFIER_COLUMNS)
+    ws.metadata['reducer'] = reducer
+    ws.metadata['reduction'] = reduction_summary(reducer, features)
+    app_logger.info(f"Reduced {len(features)} features to {ws.reduced_data.shape[1]} with {method}")
+
+
+def _clustering_input(ws):
+    """Features the clustering model is trained on: reduced when a reduction is active."""
+    return ws.reduced_data if ws.reduced_data is not None else ws.processed_data
+
+
+def _cluster_metrics(ws):
+    """Quality metrics of the workspace clustering, on the distance its model was fitted with."""
+    return calculate_cluster_metrics(_clustering_input(ws), ws.cluster_labels, categorical_cols=_categorical_cols(ws),
+                                     gamma=getattr(ws.kmeans_model, 'gamma_', None))
+
+
+def _reducer(ws):
+    return ws.metadata.get('reducer') if ws.metadata and ws.reduced_data is not None else None
+
+
+def _feature_names(ws):
+    """Columns the model's centroids map back to: the reduction's input columns when a reduction is active."""
+    if _reducer(ws) is not None:
+        # States saved before identifiers were excluded reduced every column
+        return ws.metadata['reduction'].get('features', ws.processed_data.columns.tolist())
+    return ws.processed_data.columns.tolist()
+
+
+def _cancel_speculative_sweep(ws):
+    """Cancel the workspace's speculative sweep, if one is still running."""
+    if ws.sweep_job is not None:
+        if ws.sweep_job.cancel():
+            app_logger.info(f"Speculative sweep {ws.sweep_job.job_id} cancelled")
+        ws.sweep_job = None
+
+
+def _dataset_replaced(ws):
+    """Drop results tied to the previous dataset and give the new one a fresh version."""
+    _cancel_speculative_sweep(ws)
+    ws.silhouette_scores = None
+    ws.bump_version()
+
 
-# Attempt to restore previous state on startup
-_loaded = load_state()
-if _loaded:
-    PROCESSED_DATA = _loaded.get('PROCESSED_DATA')
-    ORIGINAL_DATA = _loaded.get('ORIGINAL_DATA')
-    CLUSTER_LABELS = _loaded.get('CLUSTER_LABELS')
-    KMEANS_MODEL = _loaded.get('KMEANS_MODEL')
-    METADATA = _loaded.get('METADATA')
-    app_logger.info("Previous analysis state restored from disk")
+def _start_speculative_sweep(ws):
+    """Start the post-upload sweep when SPECULATIVE_SWEEP is on and the data is large enough."""
+    if app.config['SPECULATIVE_SWEEP'] and _sweep_max_k(ws) >= 2:
+        ws.sweep_job = _submit_sweep_job(ws, manager=SPECULATIVE_JOBS)
+        app_logger.info(f"Speculative sweep {ws.sweep_job.job_id} started for dataset version {ws.dataset_version}")
+
+
+def _get_profile(ws):
+    """Return the single-pass profile of the original data, computed once per dataset version."""
+    return PROFILE_CACHE.get_or_compute(ws.dataset_version, lambda: profile_dataframe(ws.original_data))
+
+
+def _categorical_cols(ws):
+    """Return the code-encoded categorical columns for the K-Prototypes path, if any."""
+    if ws.metadata and ws.metadata.get('categorical_encoding') == 'codes':
+        return ws.metadata.get('categorical_features') or None
+    return None
 
 
 @app.route('/api/upload', methods=['POST'])
-def upload_file():
+@with_workspace
+def upload_file(ws):
     """
     Handle CSV file upload and perform initial data preprocessing.
     
@@ -106,66 +627,131 @@ def upload_file():
     try:
         app_logger.info("File upload initiated")
         
-        # Validate file presence
-        if 'file' not in request.files:
+        # Multipart uploads use the 'file' field; a raw text/csv body is parsed
+        # straight off the request stream without multipart spooling
+        if 'file' in request.files:
+            file = request.files['file']
+            filename, stream = file.filename, file.stream
+        elif request.mimetype == 'text/csv':
+            filename, stream = request.args.get('filename', 'upload.csv'), request.stream
+        else:
             app_logger.warning("Upload attempted without file")
             return jsonify({'error': 'No file provided'}), 400
         
-        file = request.files['file']
-        
-        if file.filename == '':
+        if filename == '':
             app_logger.warning("Upload attempted with empty filename")
             return jsonify({'error': 'No file selected'}), 400
         
-        # Validate file extension
-        if not file.filename.lower().endswith('.csv'):
-            app_logger.warning(f"Invalid file type uploaded: {file.filename}")
-            return jsonify({'error': 'Only CSV files are allowed'}), 400
+        # Validate file extension (.csv, or gzip/zstd compressed .csv.gz / .csv.zst)
+        accepted, compression = upload_compression(filename)
+        if not accepted:
+            app_logger.warning(f"Invalid file type uploaded: {filename}")
+            return jsonify({'error': 'Only CSV files (.csv, .csv.gz, .csv.zst) are allowed'}), 400
         
-        # Validate file size (before saving)
-        file.seek(0, 2)  # Seek to end
-        file_size = file.tell()
+        # Size is enforced while streaming, before the limit is ever buffered;
+        # compressed uploads are also held to the decompressed size and row budgets
         max_size = int(os.getenv('MAX_UPLOAD_SIZE', 16)) * 1024 * 1024
-        
-        if file_size > max_size:
-            app_logger.warning(f"File too large: {file_size} bytes")
-            return jsonify({'error': f'File size exceeds {int(os.getenv("MAX_UPLOAD_SIZE", 16))}MB limit'}), 400
-        
-        file.seek(0)  # Reset to beginning
-        
-        # Save and process file
-        filename = secure_filename(file.filename)
+        filename = secure_filename(filename)
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        
-        app_logger.info(f"File saved: {filename}")
         
-        # Preprocess the data
-        global PROCESSED_DATA, ORIGINAL_DATA, METADATA
+        # Hash, parse and profile in one read; the on-disk copy is written in the background
         start_time = time.time()
-        PROCESSED_DATA, METADATA, ORIGINAL_DATA = preprocess_data(filepath)
+        memory_profile = None
+        tracker = MemoryTracker() if app.config['TRACK_PREPROCESS_MEMORY'] else None
+        try:
+            with track_stage(tracker, 'parse'):
+                ingest = ingest_csv(stream, chunk_rows=app.config['INGEST_CHUNK_ROWS'], max_bytes=max_size,
+                                    save_path=filepath if app.config['SAVE_UPLOADS'] else None,
+                                    compression=compression,
+                                    max_decompressed_bytes=app.config['MAX_DECOMPRESSED_SIZE'],
+                                    max_rows=app.config['MAX_UPLOAD_ROWS'])
+            content_hash = ingest['content_hash']
+            app_logger.info(f"Upload {filename} parsed: {ingest['bytes']} bytes "
+                            f"({ingest['decompressed_bytes']} decompressed) in {ingest['parse_seconds']:.2f}s")
+            
+            cache_key = (content_hash, app.config['CATEGORICAL_ENCODING'], app.config['REDUCTION_METHOD'])
+            cached = UPLOAD_CACHE.get(cache_key)
+            if ingest['writer'] is not None:
+                ingest['writer'].close(keep=cached is None)
+            
+            if cached is not None:
+                app_logger.info(f"Upload {filename} matches cached content {content_hash[:12]}, reusing processed data")
+                ws.processed_data, ws.metadata, ws.original_data = cached['processed'], cached['metadata'], cached['original']
+                ws.reduced_data = cached['reduced']
+                _dataset_replaced(ws)
+                PROFILE_CACHE.set(ws.dataset_version, cached['profile'])
+            else:
+                ws.processed_data, ws.metadata = preprocess_frame(
+                    ingest['frame'],
+                    categorical_encoding=app.config['CATEGORICAL_ENCODING'],
+                    mode=app.config['PREPROCESS_MODE'],
+                    tracker=tracker,
+                    workers=app.config['PREPROCESS_WORKERS'],
+                    executor=app.config['PREPROCESS_EXECUTOR']
+                )
+                ws.original_data = ingest['frame']
+                _apply_reduction(ws)
+                _dataset_replaced(ws)
+                PROFILE_CACHE.set(ws.dataset_version, ingest['profile'])
+            # Dataset fingerprint recorded with every model fitted on it
+            ws.metadata['content_hash'] = content_hash
+        finally:
+            if tracker is not None:
+                tracker.close()
+        if tracker is not None:
+            memory_profile = tracker.report(raw_mb=frame_memory_mb(ws.original_data))
         processing_time = time.time() - start_time
         
         # Validate minimum data requirements
-        if len(PROCESSED_DATA) < 2:
-            app_logger.error(f"Insufficient data: {len(PROCESSED_DATA)} rows")
+        if len(ws.processed_data) < 2:
+            app_logger.error(f"Insufficient data: {len(ws.processed_data)} rows")
             return jsonify({'error': 'Dataset must have at least 2 rows'}), 400
         
-        # Get data statistics
-        stats = get_feature_statistics(ORIGINAL_DATA)
-        
-        app_logger.info(f"Data processed successfully in {processing_time:.2f}s. Shape: {PROCESSED_DATA.shape}")
+        # Get data statistics (profile is cached for /api/data-quality)
+        if cached is not None:
+            stats = cached['statistics']
+        else:
+            stats = get_feature_statistics(ws.original_data, profile=_get_profile(ws))
+            UPLOAD_CACHE.set(cache_key, {
+                'processed': ws.processed_data,
+                'metadata': ws.metadata,
+                'original': ws.original_data,
+                'reduced': ws.reduced_data,
+                'profile': _get_profile(ws),
+                'statistics': stats
+            })
+        
+        app_logger.info(f"Data processed successfully in {processing_time:.2f}s. Shape: {ws.processed_data.shape}")
+        _start_speculative_sweep(ws)
+        
+        if cached is not None:
+            message = f'File uploaded successfully. Identical content already processed; reused {len(ws.processed_data)} rows.'
+        else:
+            message = f'File uploaded successfully. {len(ws.processed_data)} rows processed in {processing_time:.2f}s.'
         
         return jsonify({
             'success': True,
-            'message': f'File uploaded successfully. {len(PROCESSED_DATA)} rows processed in {processing_time:.2f}s.',
-            'shape': list(PROCESSED_DATA.shape),
+            'message': message,
+            'shape': list(ws.processed_data.shape),
             'statistics': stats,
-            'features': METADATA['features'],
-            'processing_time': round(processing_time, 2)
+            'features': ws.metadata['features'],
+            'processing_time': round(processing_time, 2),
+            'cached': cached is not None,
+            'content_hash': content_hash,
+            'memory_profile': memory_profile,
+            'reduction': ws.metadata.get('reduction')
         }), 200
     
-    except pd.errors.ParserError as e:
+    except UploadTooLargeError as e:
+        app_logger.warning(f"Upload exceeded size limit while streaming: {str(e)}")
+        if e.limit == 'rows':
+            return jsonify({'error': f'File exceeds the {app.config["MAX_UPLOAD_ROWS"]} row limit'}), 400
+        return jsonify({'error': f'File size exceeds {int(os.getenv("MAX_UPLOAD_SIZE", 16))}MB limit '
+                                 f'({app.config["MAX_DECOMPRESSED_SIZE"] // (1024 * 1024)}MB decompressed)'}), 400
+    except UnsupportedCompressionError as e:
+        app_logger.error(f"Compressed upload error: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+    except (pd.errors.ParserError, pd.errors.EmptyDataError) as e:
         app_logger.error(f"CSV parsing error: {str(e)}")
         return jsonify({'error': 'Invalid CSV file format'}), 400
     except Exception as e:
@@ -174,7 +760,9 @@ def upload_file():
 
 
 @app.route('/api/data-quality', methods=['GET'])
-def data_quality():
+@with_workspace
+@conditional_get
+def data_quality(ws):
     """
     Get data quality metrics for uploaded data.
     
@@ -186,11 +774,11 @@ def data_quality():
     try:
         app_logger.info("Data quality metrics requested")
         
-        if ORIGINAL_DATA is None:
+        if ws.original_data is None:
             app_logger.warning("Data quality metrics requested without data loaded")
             return jsonify({'error': 'No data loaded'}), 400
         
-        metrics = get_data_quality_metrics(ORIGINAL_DATA)
+        metrics = get_data_quality_metrics(ws.original_data, profile=_get_profile(ws))
         
         return jsonify({
             'success': True,
@@ -203,101 +791,400 @@ def data_quality():
 
 
 @app.route('/api/correlation-matrix', methods=['GET'])
-def correlation_matrix():
+@with_workspace
+@conditional_get
+def correlation_matrix(ws):
     """
     Return correlation matrix for numeric features to support heatmap visualization.
+    
+    Query params:
+        method (str): 'pearson' (default) or 'spearman'
     """
     try:
         app_logger.info("Correlation matrix requested")
         
-        if ORIGINAL_DATA is None:
+        if ws.original_data is None:
             app_logger.warning("Correlation matrix requested without data loaded")
             return jsonify({'error': 'No data loaded'}), 400
         
-        numeric_df = ORIGINAL_DATA.select_dtypes(include=[np.number])
-        if numeric_df.empty:
+        method = request.args.get('method', 'pearson').lower()
+        if method not in ('pearson', 'spearman'):
+            return jsonify({'error': f'Unsupported correlation method: {method}'}), 400
+        
+        features, matrix = CORRELATION_CACHE.get_or_compute(
+            (ws.dataset_version, method), lambda: compute_correlation(ws.original_data, method=method)
+        )
+        if not features:
             app_logger.warning("Correlation matrix requested but no numeric columns found")
             return jsonify({'error': 'No numeric columns available for correlation'}), 400
         
-        corr_dict = get_correlation_matrix(numeric_df)
-        features = list(corr_dict.keys())
-        matrix = [[corr_dict[row].get(col, 0) for col in features] for row in features]
-        
         return jsonify({
             'success': True,
+            'method': method,
             'features': features,
-            'matrix': matrix
+            'matrix': matrix_to_list(matrix)
         }), 200
     except Exception as e:
         app_logger.error(f"Correlation matrix error: {str(e)}", exc_info=True)
         return jsonify({'error': f'Correlation error: {str(e)}'}), 500
 
 
+def _sweep_max_k(ws):
+    """Largest k tried by the silhouette sweep: 10, or 1/5 of the rows."""
+    return min(10, len(ws.processed_data) // 5)
+
+
+def _sweep_payload(silhouette_scores, analysis_time):
+    """Response body of a finished silhouette sweep."""
+    optimal_k = max(silhouette_scores, key=silhouette_scores.get)
+    app_logger.info(f"Optimal clusters analysis completed. Optimal k: {optimal_k} in {analysis_time:.2f}s")
+    return {
+        'success': True,
+        'silhouette_scores': silhouette_scores,
+        'optimal_k': optimal_k,
+        'chart_data': {
+            'x': list(silhouette_scores.keys()),
+            'y': list(silhouette_scores.values())
+        },
+        'analysis_time': round(analysis_time, 2)
+    }
+
+
+def _apply_clustering(ws, labels, model):
+    """Store a fitted clustering in the workspace and prepare its scatter projection."""
+    ws.cluster_labels, ws.kmeans_model = labels, model
+    ws.model_version = None
+    ws.bump_analysis_version()
+    # Once per dataset, so the first /api/visualizations after the run only renders
+    _get_projection(ws)
+
+
+def _latest_alias(workspace_id):
+    """Alias of a workspace's newest model; /api/models/latest resolves to it."""
+    return f'latest-{workspace_id}'
+
+
+def _register_model(ws, n_clusters, metrics, clustering_time):
+    """
+    Add the workspace's model to the registry and return its version.
+    
+    The model is stored behind its column selection and reduction, so
+    scoring takes the processed feature frame directly. Only serialization
+    happens here; the write is done by the registry's background thread.
+    """
+    model = ws.kmeans_model
+    reducer = _reducer(ws)
+    if reducer is not None:
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import FunctionTransformer
+        select = FunctionTransformer(select_features, kw_args={'columns': _feature_names(ws)})
+        model = Pipeline([('select', select), ('reduce', reducer), ('cluster', model)])
+    metadata = ws.metadata or {}
+    ws.model_version = MODELS.register(model, {
+        'dataset_fingerprint': metadata.get('content_hash'),
+        'n_rows': len(ws.processed_data),
+        'features': ws.processed_data.columns.tolist(),
+        'n_clusters': n_clusters,
+        'algorithm': type(ws.kmeans_model).__name__,
+        'reduction': metadata.get('reduction'),
+        'metrics': metrics,
+        'training_seconds': round(clustering_time, 3),
+        'workspace_id': ws.workspace_id
+    }, aliases=(_latest_alias(ws.workspace_id),))
+    return ws.model_version
+
+
+def _cluster_payload(ws, n_clusters, start_time):
+    """Response body of a finished clustering: metrics, analysis, profiles and centroids."""
+    # Calculate metrics
+    metrics = _cluster_metrics(ws)
+    
+    # Analyze clusters
+    with time_stage('analysis'):
+        cluster_analysis = analyze_clusters(ws.processed_data, ws.original_data, ws.cluster_labels)
+        cluster_profiles = get_cluster_profiles(ws.processed_data, ws.original_data, ws.cluster_labels)
+        centroids = get_cluster_centroids(ws.kmeans_model, _feature_names(ws), reducer=_reducer(ws))
+        
+        # Get recommendations
+        recommendations = get_cluster_recommendations(cluster_analysis)
+    
+    clustering_time = time.time() - start_time
+    model_version = _register_model(ws, n_clusters, metrics, clustering_time)
+    
+    app_logger.info(f"Clustering completed with {n_clusters} clusters in {clustering_time:.2f}s (model {model_version})")
+    
+    return {
+        'success': True,
+        'metrics': metrics,
+        'cluster_analysis': cluster_analysis,
+        'recommendations': recommendations,
+        'cluster_profiles': cluster_profiles,
+        'centroids': centroids,
+        'n_clusters': n_clusters,
+        'clustering_time': round(clustering_time, 2),
+        'model_version': model_version
+    }
+
+
+def _follow_sweep_job(job, on_step=None):
+    """
+    Wait for a speculative sweep job, passing each completed k to on_step.
+    
+    Steps are reported in completion order, as {k, silhouette_score,
+    step_seconds, completed, total}; when on_step returns False the job is
+    left running and no longer followed.
+    
+    Returns:
+        Scores by k once every step has completed, or None if the job ended
+        without them or was no longer followed
+    """
+    changed = threading.Event()
+    
+    def listener(_job):
+        changed.set()
+    
+    job.subscribe(listener)
+    sent = set()
+    try:
+        while True:
+            changed.clear()
+            status = job.to_dict()
+            completed, total = status['progress']['completed'], status['progress']['total']
+            for key, score in status['partial_results'].items():
+                if key in sent:
+                    continue
+                sent.add(key)
+                step = {'k': int(key), 'silhouette_score': score,
+                        'step_seconds': status['timing']['step_seconds'].get(key),
+                        'completed': len(sent), 'total': total}
+                if on_step is not None and on_step(step) is False:
+                    return None
+            if completed == total:
+                return {int(key): score for key, score in sorted(status['partial_results'].items(),
+                                                                 key=lambda item: int(item[0]))}
+            if status['state'] in ('failed', 'cancelled'):
+                return None
+            changed.wait()
+    finally:
+        job.unsubscribe(listener)
+
+
+def _shared_sweep(workspace_id, version, X, categorical_cols, max_k, job=None, on_progress=None, stop=None):
+    """
+    Run the dataset version's silhouette sweep, or join the one in flight.
+    
+    /api/optimal-clusters and its stream share one flight per dataset version
+    in COMPUTE_FLIGHTS, keyed (dataset_version, 'optimal-clusters'). Every
+    progress step is fanned out to each caller with on_progress, a late
+    joiner first getting the steps it missed. The sweep follows the
+    speculative job when one is given, and stops early only once no caller
+    listens or waits anymore. A caller that joined such an abandoned sweep
+    runs it again, unless its stop event is set.
+    
+    Returns:
+        Tuple of (scores, source, coalesced); scores cover fewer than
+        max_k - 1 values of k only if the sweep was abandoned
+    """
+    key = (version, 'optimal-clusters')
+    
+    def sweep():
+        listened = True
+        
+        def publish(step):
+            nonlocal listened
+            listened = COMPUTE_FLIGHTS.publish(key, step)
+            return listened
+        
+        if job is not None:
+            scores = _follow_sweep_job(job, publish)
+            if scores is not None:
+                return scores, 'speculative'
+            if not listened:
+                return {}, 'speculative'
+        return find_optimal_clusters(X, max_k=max_k, categorical_cols=categorical_cols,
+                                     progress_callback=publish), 'computed'
+    
+    while True:
+        (scores, source), coalesced = COMPUTE_FLIGHTS.do(key, sweep, on_progress=on_progress)
+        if len(scores) == max_k - 1 or not coalesced or (stop is not None and stop.is_set()):
+            break
+    if len(scores) == max_k - 1 and not coalesced:
+        with WORKSPACES.checkout(workspace_id) as ws:
+            if ws.dataset_version == version:
+                ws.silhouette_scores = scores
+    return scores, source, coalesced
+
+
 @app.route('/api/optimal-clusters', methods=['GET'])
-def optimal_clusters():
+@with_workspace_id
+def optimal_clusters(workspace_id):
     """
     Calculate optimal number of clusters using Silhouette Score analysis.
     
+    The sweep runs outside the workspace lock. Identical concurrent requests
+    (same dataset version), streamed or not, share one sweep.
+    
     Returns:
         JSON response with silhouette scores for each cluster count.
-        Success: {success: true, silhouette_scores, optimal_k, chart_data}
+        Success: {success: true, silhouette_scores, optimal_k, chart_data, source, coalesced}
         Error: {error: error_message}
     """
     try:
         app_logger.info("Optimal clusters analysis initiated")
-        
-        if PROCESSED_DATA is None:
-            app_logger.warning("Optimal clusters analysis without data loaded")
-            return jsonify({'error': 'No data loaded'}), 400
-        
         start_time = time.time()
-        max_k = min(10, len(PROCESSED_DATA) // 5)  # Max k is 10 or 1/5 of data
-        silhouette_scores = find_optimal_clusters(PROCESSED_DATA, max_k=max_k)
-        
-        # Find optimal k
-        optimal_k = max(silhouette_scores, key=silhouette_scores.get)
-        
-        analysis_time = time.time() - start_time
         
-        app_logger.info(f"Optimal clusters analysis completed. Optimal k: {optimal_k} in {analysis_time:.2f}s")
-        
-        return jsonify({
-            'success': True,
-            'silhouette_scores': silhouette_scores,
-            'optimal_k': optimal_k,
-            'chart_data': {
-                'x': list(silhouette_scores.keys()),
-                'y': list(silhouette_scores.values())
-            },
-            'analysis_time': round(analysis_time, 2)
-        }), 200
+        with WORKSPACES.checkout(workspace_id, create=False) as ws:
+            if ws.processed_data is None:
+                app_logger.warning("Optimal clusters analysis without data loaded")
+                return jsonify({'error': 'No data loaded'}), 400
+            # Answer from an earlier sweep of this dataset when there is one
+            if ws.silhouette_scores is not None:
+                payload = _sweep_payload(ws.silhouette_scores, time.time() - start_time)
+                return jsonify({**payload, 'source': 'cached', 'coalesced': False}), 200
+            X, categorical_cols, max_k = _clustering_input(ws), _categorical_cols(ws), _sweep_max_k(ws)
+            version, job = ws.dataset_version, ws.sweep_job
+        if job is not None and job.params['dataset_version'] != version:
+            job = None
+        
+        # Attaches to the speculative sweep of this dataset if one was started
+        scores, source, coalesced = _shared_sweep(workspace_id, version, X, categorical_cols, max_k, job=job)
+        
+        payload = _sweep_payload(scores, time.time() - start_time)
+        return jsonify({**payload, 'source': source, 'coalesced': coalesced}), 200
     
     except Exception as e:
         app_logger.error(f"Optimal clusters error: {str(e)}", exc_info=True)
         return jsonify({'error': f'Error: {str(e)}'}), 500
 
 
+def _sse(event, data):
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.route('/api/optimal-clusters/stream', methods=['GET'])
+@with_workspace
+def optimal_clusters_stream(ws):
+    """
+    Stream the silhouette sweep as server-sent events, one per completed k.
+    
+    Events: `start` {total, max_k}; `progress` {k, silhouette_score, inertia,
+    step_seconds, elapsed_seconds, completed, total}; then `done` with the
+    /api/optimal-clusters body, or `error`. An earlier sweep of this dataset
+    is replayed at once (source 'cached'), and a running speculative sweep is
+    followed, its steps forwarded as they complete (source 'speculative').
+    Otherwise the sweep runs on a thread outside the workspace lock, shared
+    with every concurrent stream or request for the same dataset version;
+    once all of their clients have disconnected the remaining values of k
+    are skipped. The stream's heavy admission slot is held until both the
+    sweep thread and the response have finished.
+    """
+    if ws.processed_data is None:
+        return jsonify({'error': 'No data loaded'}), 400
+    max_k = _sweep_max_k(ws)
+    if max_k < 2:
+        return jsonify({'error': 'Dataset is too small for an optimal clusters sweep'}), 400
+    
+    X, categorical_cols = _clustering_input(ws), _categorical_cols(ws)
+    workspace_id, version = ws.workspace_id, ws.dataset_version
+    cached, job = ws.silhouette_scores, ws.sweep_job
+    if job is not None and job.params['dataset_version'] != version:
+        job = None
+    events = queue.Queue()
+    disconnected = threading.Event()
+    start_time = time.time()
+    seen = set()
+    
+    def on_progress(step):
+        # A rerun of an abandoned sweep repeats the steps already sent
+        if step['k'] not in seen:
+            seen.add(step['k'])
+            events.put(('progress', {**step, 'elapsed_seconds': round(time.time() - start_time, 3)}))
+        return not disconnected.is_set()
+    
+    def sweep():
+        try:
+            scores, source, coalesced = _shared_sweep(workspace_id, version, X, categorical_cols, max_k, job=job,
+                                                      on_progress=on_progress, stop=disconnected)
+            if disconnected.is_set():
+                app_logger.info(f"Optimal clusters stream closed after {len(seen)} of {max_k - 1} values of k")
+                return
+            payload = _sweep_payload(scores, time.time() - start_time)
+            events.put(('done', {**payload, 'source': source, 'coalesced': coalesced}))
+        except Exception as e:
+            app_logger.error(f"Optimal clusters stream error: {str(e)}", exc_info=True)
+            events.put(('error', {'error': f'Error: {str(e)}'}))
+        finally:
+            release('sweep')
+    
+    def close():
+        disconnected.set()
+        release('response')
+    
+    def generate():
+        yield _sse('start', {'total': max_k - 1, 'max_k': max_k})
+        try:
+            while True:
+                try:
+                    event, data = events.get(timeout=app.config['SSE_KEEPALIVE_SECONDS'])
+                except queue.Empty:
+                    # Comment line; also how a silent disconnect is noticed
+                    yield ': keep-alive\n\n'
+                    continue
+                yield _sse(event, data)
+                if event in ('done', 'error'):
+                    return
+        finally:
+            # Runs on completion and when the server closes the stream after a disconnect
+            close()
+    
+    # The heavy slot stays taken while the sweep runs or the response is
+    # open; the request itself ends before the first event is sent
+    release = _hold_admission('response') if cached is not None else _hold_admission('response', 'sweep')
+    if cached is not None:
+        app_logger.info("Optimal clusters stream replayed from an earlier sweep")
+        for completed, (k, score) in enumerate(cached.items(), 1):
+            events.put(('progress', {'k': k, 'silhouette_score': score, 'completed': completed,
+                                     'total': len(cached)}))
+        payload = _sweep_payload(cached, time.time() - start_time)
+        events.put(('done', {**payload, 'source': 'cached', 'coalesced': False}))
+    else:
+        app_logger.info("Optimal clusters stream initiated" + (" (following the speculative sweep)" if job else ""))
+        threading.Thread(target=sweep, name='optimal-clusters-stream', daemon=True).start()
+    response = Response(generate(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # A response closed before its first event never runs the generator's finally
+    response.call_on_close(close)
+    return response
+
+
 @app.route('/api/cluster', methods=['POST'])
-def cluster():
+@with_workspace_id
+def cluster(workspace_id):
     """
     Perform K-Means clustering on preprocessed data.
     
+    The fit runs outside the workspace lock. Identical concurrent requests
+    (same dataset version and n_clusters) share one fit and one response.
+    
     Request JSON:
         n_clusters (int): Number of clusters (2-10)
     
     Returns:
         JSON response with clustering results and analysis.
-        Success: {success: true, metrics, cluster_analysis, recommendations, n_clusters}
+        Success: {success: true, metrics, cluster_analysis, recommendations, n_clusters, coalesced}
         Error: {error: error_message}
     """
     try:
         app_logger.info("Clustering initiated")
         
-        if PROCESSED_DATA is None:
-            app_logger.warning("Clustering attempted without data loaded")
-            return jsonify({'error': 'No data loaded'}), 400
+        data = request.get_json(silent=True)
         
-        data = request.get_json()
+        with WORKSPACES.checkout(workspace_id) as ws:
+            if ws.processed_data is None:
+                app_logger.warning("Clustering attempted without data loaded")
+                return jsonify({'error': 'No data loaded'}), 400
+            X, categorical_cols, version = _clustering_input(ws), _categorical_cols(ws), ws.dataset_version
         
         if not data:
             app_logger.warning("Clustering attempted without JSON data")
@@ -311,131 +1198,293 @@ def cluster():
             app_logger.warning(f"Invalid cluster count: {str(e)}")
             return jsonify({'error': f'Invalid cluster count: {str(e)}'}), 400
         
-        start_time = time.time()
-        
-        # Perform clustering
-        global CLUSTER_LABELS, KMEANS_MODEL
-        CLUSTER_LABELS, KMEANS_MODEL = perform_clustering(PROCESSED_DATA, n_clusters=n_clusters)
-        
-        # Save model
-        save_model(KMEANS_MODEL, 'model/kmeans_model.pkl')
-        
-        # Calculate metrics
-        metrics = calculate_cluster_metrics(PROCESSED_DATA, CLUSTER_LABELS)
-        
-        # Analyze clusters
-        cluster_analysis = analyze_clusters(PROCESSED_DATA, ORIGINAL_DATA, CLUSTER_LABELS)
-        cluster_profiles = get_cluster_profiles(PROCESSED_DATA, ORIGINAL_DATA, CLUSTER_LABELS)
-        centroids = get_cluster_centroids(KMEANS_MODEL, PROCESSED_DATA.columns.tolist())
-        
-        # Get recommendations
-        recommendations = get_cluster_recommendations(cluster_analysis)
-        
-        clustering_time = time.time() - start_time
-        
-        app_logger.info(f"Clustering completed with {n_clusters} clusters in {clustering_time:.2f}s")
-        
-        return jsonify({
-            'success': True,
-            'metrics': metrics,
-            'cluster_analysis': cluster_analysis,
-            'recommendations': recommendations,
-            'cluster_profiles': cluster_profiles,
-            'centroids': centroids,
-            'n_clusters': n_clusters,
-            'clustering_time': round(clustering_time, 2)
-        }), 200
+        def fit():
+            start_time = time.time()
+            labels, model = perform_clustering(X, n_clusters=n_clusters, categorical_cols=categorical_cols)
+            with WORKSPACES.checkout(workspace_id) as ws:
+                if ws.dataset_version != version:
+                    return {'error': 'Data changed while clustering; please retry'}, 409
+                _apply_clustering(ws, labels, model)
+                return _cluster_payload(ws, n_clusters, start_time), 200
+        
+        (payload, status_code), coalesced = COMPUTE_FLIGHTS.do((version, 'cluster', n_clusters), fit)
+        if status_code != 200:
+            return jsonify(payload), status_code
+        return jsonify({**payload, 'coalesced': coalesced}), 200
     
     except Exception as e:
         app_logger.error(f"Clustering error: {str(e)}", exc_info=True)
         return jsonify({'error': f'Clustering error: {str(e)}'}), 500
 
 
-@app.route('/api/visualizations', methods=['GET'])
-def visualizations():
+def _submit_sweep_job(ws, manager=JOBS):
+    """Queue one silhouette step per k; the finalizer stores the scores if the dataset is unchanged."""
+    X, categorical_cols, version = _clustering_input(ws), _categorical_cols(ws), ws.dataset_version
+    workspace_id = ws.workspace_id
+    steps = {k: (silhouette_for_k, (X, k), {'categorical_cols': categorical_cols})
+             for k in range(2, _sweep_max_k(ws) + 1)}
+    
+    def finalize(job, scores):
+        scores = {k: scores[k] for k in sorted(scores)}
+        with WORKSPACES.checkout(workspace_id) as current:
+            if current.dataset_version == version:
+                current.silhouette_scores = scores
+        return _sweep_payload(scores, time.time() - (job.started_at or job.submitted_at))
+    
+    return manager.submit('optimal-clusters', steps, workspace_id=workspace_id,
+                          params={'dataset_version': version}, finalize=finalize)
+
+
+def _submit_cluster_job(ws, n_clusters):
+    """Queue a clustering run; its result replaces the workspace clustering if the dataset is unchanged."""
+    X, categorical_cols, version = _clustering_input(ws), _categorical_cols(ws), ws.dataset_version
+    workspace_id = ws.workspace_id
+    steps = {'fit': (perform_clustering, (X,), {'n_clusters': n_clusters, 'categorical_cols': categorical_cols})}
+    
+    def finalize(job, results):
+        labels, model = results['fit']
+        with WORKSPACES.checkout(workspace_id) as current:
+            if current.dataset_version != version:
+                raise RuntimeError('Data changed while the clustering job was running')
+            _apply_clustering(current, labels, model)
+            return _cluster_payload(current, n_clusters, job.started_at or job.submitted_at)
+    
+    # Labels and fitted models are not JSON, so only the final payload is reported
+    return JOBS.submit('cluster', steps, workspace_id=workspace_id, params={'n_clusters': n_clusters},
+                       finalize=finalize, expose_partial=False)
+
+
+@app.route('/api/jobs', methods=['POST'])
+@with_workspace
+def submit_job(ws):
     """
-    Generate visualizations for clusters
+    Run an optimal-k sweep or a clustering in the background.
+    
+    Request JSON:
+        type (str): 'optimal-clusters' or 'cluster'
+        n_clusters (int): Number of clusters for 'cluster' jobs (2-10)
+    
+    Returns:
+        202 with {success: true, job_id, status_url, job}; poll status_url for
+        progress, partial results and the final result.
     """
     try:
-        if CLUSTER_LABELS is None:
-            return jsonify({'error': 'No clustering performed'}), 400
-        
-        # Create a copy with cluster labels
-        viz_data = PROCESSED_DATA.copy()
-        viz_data['Cluster'] = CLUSTER_LABELS.astype(str)  # Convert to string for categorical coloring
-        
-        # Get first two features for 2D visualization
-        features = [col for col in PROCESSED_DATA.columns if col not in ['CustomerID']][:2]
-        
-        if len(features) < 2:
-            features = PROCESSED_DATA.columns.tolist()[:2]
-        
-        # Create scatter plot
-        fig = px.scatter(
-            viz_data,
-            x=features[0] if len(features) > 0 else viz_data.columns[0],
-            y=features[1] if len(features) > 1 else viz_data.columns[1],
-            color='Cluster',
-            title='Customer Segments Visualization',
-            labels={'Cluster': 'Cluster ID'},
-            color_discrete_sequence=['#636EFA', '#EF553B', '#00CC96', '#AB63FA', '#FFA15A', '#19D3F3', '#FF6692', '#B6E880', '#FF97FF', '#FECB52']
-        )
+        if ws.processed_data is None:
+            return jsonify({'error': 'No data loaded'}), 400
         
-        # Update scatter markers to be more visible
-        fig.update_traces(
+        data = request.get_json(silent=True) or {}
+        job_type = data.get('type', 'optimal-clusters')
+        if job_type == 'optimal-clusters':
+            if _sweep_max_k(ws) < 2:
+                return jsonify({'error': 'Dataset is too small for an optimal clusters sweep'}), 400
+            job = _submit_sweep_job(ws)
+        elif job_type == 'cluster':
+            try:
+                n_clusters = int(data.get('n_clusters', 3))
+                if n_clusters < 2 or n_clusters > 10:
+                    raise ValueError("Clusters must be between 2 and 10")
+            except (ValueError, TypeError) as e:
+                return jsonify({'error': f'Invalid cluster count: {str(e)}'}), 400
+            job = _submit_cluster_job(ws, n_clusters)
+        else:
+            return jsonify({'error': f'Unknown job type: {job_type}'}), 400
+        
+        app_logger.info(f"Job {job.job_id} ({job_type}) submitted for workspace {ws.workspace_id}")
+        return jsonify({
+            'success': True,
+            'job_id': job.job_id,
+            'status_url': url_for('job_status', job_id=job.job_id),
+            'job': job.to_dict()
+        }), 202
+    
+    except Exception as e:
+        app_logger.error(f"Job submit error: {str(e)}", exc_info=True)
+        return jsonify({'error': f'Job submit error: {str(e)}'}), 500
+
+
+def _owned_job(job_id):
+    """Return the job if it belongs to the caller's workspace, else None."""
+    job = JOBS.get(job_id)
+    try:
+        if job is None or job.workspace_id != _workspace_id():
+            return None
+    except (ValueError, PermissionError):
+        return None
+    return job
+
+
+@app.route('/api/jobs', methods=['GET'])
+@with_workspace_id
+def list_jobs(workspace_id):
+    """List the jobs of the caller's workspace, oldest first."""
+    jobs = JOBS.list(workspace_id=workspace_id)
+    return jsonify({'success': True, 'jobs': [job.to_dict() for job in jobs]}), 200
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """
+    Poll a job: state, per-step progress, partial results and timing.
+    
+    The workspace is not checked out, so polling never waits behind a running request.
+    """
+    job = _owned_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job.to_dict()}), 200
+
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel a queued or running job; finished jobs are left unchanged."""
+    job = _owned_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    cancelled = job.cancel()
+    if cancelled:
+        app_logger.info(f"Job {job_id} cancelled")
+    return jsonify({'success': True, 'cancelled': cancelled, 'job': job.to_dict()}), 200
+
+
+def _get_projection(ws):
+    """
+    2D scatter coordinates of the workspace's rows, computed once per dataset version.
+    
+    With a reduction active, its leading components are plotted; otherwise
+    a PCA of the processed features (without CustomerID and code-encoded
+    categoricals) is fitted.
+    """
+    def compute():
+        with time_stage('projection'):
+            if ws.reduced_data is not None:
+                reduction = ws.metadata['reduction']
+                return project_2d(ws.reduced_data, _reducer(ws)), {
+                    'method': f"reduction:{reduction['method']}", 'features': ws.reduced_data.columns.tolist(),
+                    'explained_variance': None}
+            # Arbitrary category codes would dominate the axes, so K-Prototypes' categoricals are left out
+            return fit_projection_2d(ws.processed_data, exclude=(*IDENTIFIER_COLUMNS, *(_categorical_cols(ws) or ())))
+    return PROJECTION_CACHE.get_or_compute(ws.dataset_version, compute)
+
+
+def _render_visualizations(ws, max_points, sampling):
+    """Scatter and distribution figures as pre-serialized plotly JSON, plus the sampling and projection summaries."""
+    # plotly is imported on first use to keep it out of start-up
+    import plotly
+    import plotly.graph_objs as go
+    import plotly.express as px
+
+    coords, projection = _get_projection(ws)
+    features = [f'Component {i + 1}' for i in range(2)]
+    if projection['explained_variance']:
+        features = [f'{name} ({ratio:.1%} of variance)' for name, ratio in zip(features, projection['explained_variance'])]
+
+    # Keep the browser responsive on large datasets: sample per cluster, or bin dense regions
+    with time_stage('downsample'):
+        shown = downsample_scatter(coords, np.asarray(ws.cluster_labels), max_points, method=sampling,
+                                   min_per_cluster=app.config['VIZ_MIN_POINTS_PER_CLUSTER'])
+    viz_data = pd.DataFrame(shown['coords'], columns=features)
+    viz_data['Cluster'] = shown['labels'].astype(str)  # Convert to string for categorical coloring
+    if shown['counts'] is not None:
+        viz_data['Customers'] = shown['counts']
+
+    # Create scatter plot
+    fig = px.scatter(
+        viz_data,
+        x=features[0],
+        y=features[1],
+        color='Cluster',
+        size='Customers' if shown['counts'] is not None else None,
+        size_max=18,
+        title='Customer Segments Visualization',
+        labels={'Cluster': 'Cluster ID'},
+        color_discrete_sequence=['#636EFA', '#EF553B', '#00CC96', '#AB63FA', '#FFA15A', '#19D3F3', '#FF6692', '#B6E880', '#FF97FF', '#FECB52']
+    )
+
+    # Update scatter markers to be more visible (binned markers are sized by their customer count)
+    marker = dict(line=dict(width=1, color='white'), opacity=0.8)
+    if shown['counts'] is None:
+        marker['size'] = 10
+    fig.update_traces(marker=marker, selector=dict(mode='markers'))
+
+    fig.update_layout(
+        hovermode='closest',
+        plot_bgcolor='rgba(240,240,240,0.9)',
+        paper_bgcolor='white',
+        font=dict(family='Arial, sans-serif', size=12),
+        width=1000,
+        height=600
+    )
+
+    # Embedded as-is: parsing plotly's JSON only to re-encode it doubled the serialization cost
+    with time_stage('plotly_serialization'):
+        scatter_chart = RawJSON(plotly.io.to_json(fig))
+
+    # Create cluster distribution chart
+    cluster_counts = pd.Series(ws.cluster_labels).value_counts().sort_index()
+
+    fig_dist = go.Figure(data=[
+        go.Bar(
+            x=cluster_counts.index.astype(str),
+            y=cluster_counts.values.tolist(),
             marker=dict(
-                size=10,
-                line=dict(width=1, color='white'),
-                opacity=0.8
+                color=['#636EFA', '#EF553B', '#00CC96', '#AB63FA', '#FFA15A', '#19D3F3', '#FF6692', '#B6E880', '#FF97FF', '#FECB52'][:len(cluster_counts)],
+                line=dict(color='white', width=2)
             ),
-            selector=dict(mode='markers')
-        )
-        
-        fig.update_layout(
-            hovermode='closest',
-            plot_bgcolor='rgba(240,240,240,0.9)',
-            paper_bgcolor='white',
-            font=dict(family='Arial, sans-serif', size=12),
-            width=1000,
-            height=600
-        )
-        
-        scatter_chart = json.loads(plotly.io.to_json(fig))
-        
-        # Create cluster distribution chart
-        cluster_counts = pd.Series(CLUSTER_LABELS).value_counts().sort_index()
-        
-        fig_dist = go.Figure(data=[
-            go.Bar(
-                x=cluster_counts.index.astype(str),
-                y=cluster_counts.values.tolist(),
-                marker=dict(
-                    color=['#636EFA', '#EF553B', '#00CC96', '#AB63FA', '#FFA15A', '#19D3F3', '#FF6692', '#B6E880', '#FF97FF', '#FECB52'][:len(cluster_counts)],
-                    line=dict(color='white', width=2)
-                ),
-                text=cluster_counts.values.tolist(),
-                textposition='outside',
-                hovertemplate='Cluster %{x}<br>Count: %{y}<extra></extra>'
-            )
-        ])
-        
-        fig_dist.update_layout(
-            title='Cluster Distribution',
-            xaxis_title='Cluster ID',
-            yaxis_title='Number of Customers',
-            plot_bgcolor='rgba(240,240,240,0.9)',
-            paper_bgcolor='white',
-            height=500,
-            width=600
+            text=cluster_counts.values.tolist(),
+            textposition='outside',
+            hovertemplate='Cluster %{x}<br>Count: %{y}<extra></extra>'
         )
+    ])
+
+    fig_dist.update_layout(
+        title='Cluster Distribution',
+        xaxis_title='Cluster ID',
+        yaxis_title='Number of Customers',
+        plot_bgcolor='rgba(240,240,240,0.9)',
+        paper_bgcolor='white',
+        height=500,
+        width=600
+    )
+
+    with time_stage('plotly_serialization'):
+        dist_chart = RawJSON(plotly.io.to_json(fig_dist))
+
+    return {
+        'success': True,
+        'scatter_chart': scatter_chart,
+        'distribution_chart': dist_chart,
+        'sampling': shown['summary'],
+        'projection': projection
+    }
+
+
+@app.route('/api/visualizations', methods=['GET'])
+@with_workspace
+@conditional_get
+def visualizations(ws):
+    """
+    Generate visualizations for clusters
+    
+    The figures are cached per clustering run and query, so repeated
+    requests only look them up.
+    
+    Query params:
+        max_points (int): Scatter point budget (default VIZ_MAX_POINTS, 0 = every row)
+        sampling (str): auto, stratified, binned or none (default auto)
+    """
+    try:
+        if ws.cluster_labels is None:
+            return jsonify({'error': 'No clustering performed'}), 400
         
-        dist_chart = json.loads(plotly.io.to_json(fig_dist))
+        max_points = request.args.get('max_points', app.config['VIZ_MAX_POINTS'], type=int)
+        sampling = request.args.get('sampling', 'auto')
+        if sampling not in DOWNSAMPLE_METHODS:
+            return jsonify({'error': f'sampling must be one of {", ".join(DOWNSAMPLE_METHODS)}'}), 400
         
-        return jsonify({
-            'success': True,
-            'scatter_chart': scatter_chart,
-            'distribution_chart': dist_chart
-        }), 200
+        payload = FIGURE_CACHE.get_or_compute((ws.analysis_version, max_points, sampling),
+                                              lambda: _render_visualizations(ws, max_points, sampling))
+        return jsonify(payload), 200
     
     except Exception as e:
         app_logger.error(f"Visualization error: {str(e)}", exc_info=True)
@@ -443,7 +1492,9 @@ def visualizations():
 
 
 @app.route('/api/cluster-data', methods=['GET'])
-def get_cluster_data():
+@with_workspace
+@conditional_get
+def get_cluster_data(ws):
     """
     Retrieve cluster analysis and recommendations for results page.
     
@@ -453,21 +1504,22 @@ def get_cluster_data():
     try:
         app_logger.info("Cluster data requested")
         
-        if CLUSTER_LABELS is None:
+        if ws.cluster_labels is None:
             app_logger.warning("Cluster data requested without clustering performed")
             return jsonify({'error': 'No clustering performed'}), 400
         
-        # Analyze clusters
-        cluster_analysis = analyze_clusters(PROCESSED_DATA, ORIGINAL_DATA, CLUSTER_LABELS)
-        recommendations = get_cluster_recommendations(cluster_analysis)
-        metrics = calculate_cluster_metrics(PROCESSED_DATA, CLUSTER_LABELS)
-        cluster_profiles = get_cluster_profiles(PROCESSED_DATA, ORIGINAL_DATA, CLUSTER_LABELS)
-        centroids = get_cluster_centroids(KMEANS_MODEL, PROCESSED_DATA.columns.tolist()) if KMEANS_MODEL else {}
-        
-        # Calculate additional analytics
-        feature_importance = calculate_feature_importance_in_clusters(PROCESSED_DATA, ORIGINAL_DATA, CLUSTER_LABELS)
-        top_features = get_top_features_per_cluster(ORIGINAL_DATA, CLUSTER_LABELS, n_features=3)
-        cluster_summaries = generate_cluster_summary(ORIGINAL_DATA, PROCESSED_DATA, CLUSTER_LABELS, KMEANS_MODEL)
+        metrics = _cluster_metrics(ws)
+        with time_stage('analysis'):
+            # Analyze clusters
+            cluster_analysis = analyze_clusters(ws.processed_data, ws.original_data, ws.cluster_labels)
+            recommendations = get_cluster_recommendations(cluster_analysis)
+            cluster_profiles = get_cluster_profiles(ws.processed_data, ws.original_data, ws.cluster_labels)
+            centroids = get_cluster_centroids(ws.kmeans_model, _feature_names(ws), reducer=_reducer(ws)) if ws.kmeans_model else {}
+            
+            # Calculate additional analytics
+            feature_importance = calculate_feature_importance_in_clusters(ws.processed_data, ws.original_data, ws.cluster_labels)
+            top_features = get_top_features_per_cluster(ws.original_data, ws.cluster_labels, n_features=3)
+            cluster_summaries = generate_cluster_summary(ws.original_data, ws.processed_data, ws.cluster_labels, ws.kmeans_model)
         
         return jsonify({
             'success': True,
@@ -479,7 +1531,7 @@ def get_cluster_data():
             'feature_importance': feature_importance,
             'top_features': top_features,
             'cluster_summaries': cluster_summaries,
-            'n_clusters': len(np.unique(CLUSTER_LABELS))
+            'n_clusters': len(np.unique(ws.cluster_labels))
         }), 200
     
     except Exception as e:
@@ -488,14 +1540,17 @@ def get_cluster_data():
 
 
 @app.route('/api/feature-importance', methods=['GET'])
-def feature_importance_api():
+@with_workspace
+@conditional_get
+def feature_importance_api(ws):
     """Expose feature importance and top features via API."""
     try:
-        if CLUSTER_LABELS is None:
+        if ws.cluster_labels is None:
             return jsonify({'error': 'No clustering performed'}), 400
-        scores = calculate_feature_importance_in_clusters(PROCESSED_DATA, ORIGINAL_DATA, CLUSTER_LABELS)
-        top = get_top_features_per_cluster(ORIGINAL_DATA, CLUSTER_LABELS, n_features=5)
-        summaries = generate_cluster_summary(ORIGINAL_DATA, PROCESSED_DATA, CLUSTER_LABELS, KMEANS_MODEL)
+        with time_stage('analysis'):
+            scores = calculate_feature_importance_in_clusters(ws.processed_data, ws.original_data, ws.cluster_labels)
+            top = get_top_features_per_cluster(ws.original_data, ws.cluster_labels, n_features=5)
+            summaries = generate_cluster_summary(ws.original_data, ws.processed_data, ws.cluster_labels, ws.kmeans_model)
         return jsonify({'success': True, 'importance_scores': scores, 'top_features': top, 'summaries': summaries}), 200
     except Exception as e:
         app_logger.error(f"Feature importance API error: {str(e)}", exc_info=True)
@@ -503,29 +1558,39 @@ def feature_importance_api():
 
 
 @app.route('/api/sample-data', methods=['POST'])
-def load_sample_data():
+@with_workspace
+def load_sample_data(ws):
     """Load a bundled sample CSV to quickly demo the app."""
     try:
         sample_path = os.path.join(BASE_DIR, 'data', 'sample_customers.csv')
         if not os.path.exists(sample_path):
             return jsonify({'error': 'Sample dataset not found'}), 404
-        global PROCESSED_DATA, ORIGINAL_DATA, METADATA
-        PROCESSED_DATA, METADATA, ORIGINAL_DATA = preprocess_data(sample_path)
-        return jsonify({'success': True, 'shape': list(PROCESSED_DATA.shape), 'features': METADATA.get('features', [])}), 200
+        ws.processed_data, ws.metadata, ws.original_data = preprocess_data(
+            sample_path,
+            categorical_encoding=app.config['CATEGORICAL_ENCODING'],
+            mode=app.config['PREPROCESS_MODE'],
+            workers=app.config['PREPROCESS_WORKERS'],
+            executor=app.config['PREPROCESS_EXECUTOR']
+        )
+        _apply_reduction(ws)
+        _dataset_replaced(ws)
+        _start_speculative_sweep(ws)
+        return jsonify({'success': True, 'shape': list(ws.processed_data.shape), 'features': ws.metadata.get('features', [])}), 200
     except Exception as e:
         app_logger.error(f"Sample data load error: {str(e)}", exc_info=True)
         return jsonify({'error': f'Error: {str(e)}'}), 500
 
 
 @app.route('/results')
-def results():
+@with_workspace
+def results(ws):
     """
     Results page showing clustering results and recommendations.
     
     Redirects to home if no clustering has been performed.
     """
     app_logger.info("Results page accessed")
-    if CLUSTER_LABELS is None:
+    if ws.cluster_labels is None:
         app_logger.warning("Results page accessed without clustering performed")
         return redirect(url_for('index'))
     
@@ -533,10 +1598,13 @@ def results():
 
 
 @app.route('/api/export', methods=['GET'])
-def export_results():
+@with_workspace
+def export_results(ws):
     """
     Export clustering results to CSV file with cluster assignments.
     
+    Files are written to UPLOAD_FOLDER/exports/<workspace_id>/.
+    
     Returns:
         JSON response with export confirmation.
         Success: {success: true, message}
@@ -545,27 +1613,27 @@ def export_results():
     try:
         app_logger.info("Export results initiated")
         
-        if CLUSTER_LABELS is None:
+        if ws.cluster_labels is None:
             app_logger.warning("Export attempted without clustering performed")
             return jsonify({'error': 'No clustering performed'}), 400
         
-        export_data = ORIGINAL_DATA.copy()
-        export_data['Cluster'] = CLUSTER_LABELS
-        
-        # Export to CSV using utility
-        csv_path = os.path.join(app.config['UPLOAD_FOLDER'], 'clustered_results.csv')
-        export_to_csv(export_data, CLUSTER_LABELS, csv_path)
-        
-        # Also export to JSON and HTML for additional formats
-        json_path = os.path.join(app.config['UPLOAD_FOLDER'], 'clustering_report.json')
-        html_path = os.path.join(app.config['UPLOAD_FOLDER'], 'clustering_report.html')
-        
-        cluster_analysis = analyze_clusters(PROCESSED_DATA, ORIGINAL_DATA, CLUSTER_LABELS)
-        recommendations = get_cluster_recommendations(cluster_analysis)
-        metrics = calculate_cluster_metrics(PROCESSED_DATA, CLUSTER_LABELS)
-        
-        export_to_json(cluster_analysis, metrics, recommendations, json_path)
-        export_html_report(cluster_analysis, metrics, recommendations, html_path)
+        with time_stage('export'):
+            export_dir = _export_dir(ws.workspace_id)
+            os.makedirs(export_dir, exist_ok=True)
+            # Export to CSV using utility (labels are attached per slice, no full copy)
+            csv_path = os.path.join(export_dir, 'clustered_results.csv')
+            export_to_csv(ws.original_data, ws.cluster_labels, csv_path)
+            
+            # Also export to JSON and HTML for additional formats
+            json_path = os.path.join(export_dir, 'clustering_report.json')
+            html_path = os.path.join(export_dir, 'clustering_report.html')
+            
+            cluster_analysis = analyze_clusters(ws.processed_data, ws.original_data, ws.cluster_labels)
+            recommendations = get_cluster_recommendations(cluster_analysis)
+            metrics = _cluster_metrics(ws)
+            
+            export_to_json(cluster_analysis, metrics, recommendations, json_path)
+            export_html_report(cluster_analysis, metrics, recommendations, html_path)
         
         app_logger.info(f"Results exported to {csv_path}, {json_path}, {html_path}")
         
@@ -585,28 +1653,180 @@ def export_results():
 
 
 @app.route('/api/status', methods=['GET'])
-def status():
+@with_workspace
+@conditional_get
+def status(ws):
     """Return current application analysis status."""
     return jsonify({
-        'data_loaded': ORIGINAL_DATA is not None,
-        'processed_rows': int(len(PROCESSED_DATA)) if PROCESSED_DATA is not None else 0,
-        'clusters_performed': CLUSTER_LABELS is not None,
-        'n_clusters': int(len(np.unique(CLUSTER_LABELS))) if CLUSTER_LABELS is not None else 0
+        'data_loaded': ws.original_data is not None,
+        'processed_rows': int(len(ws.processed_data)) if ws.processed_data is not None else 0,
+        'clusters_performed': ws.cluster_labels is not None,
+        'n_clusters': int(len(np.unique(ws.cluster_labels))) if ws.cluster_labels is not None else 0,
+        'dataset_version': ws.dataset_version,
+        'workspace_id': ws.workspace_id
+    }), 200
+
+
+@app.route('/api/workspaces', methods=['GET'])
+def workspaces():
+    """
+    Report the memory budget and totals, and the memory usage of the caller's own workspaces.
+    
+    Other sessions' workspaces are only counted, never listed.
+    """
+    if app.config['WORKSPACE_MODE'] == 'single':
+        own = [DEFAULT_WORKSPACE]
+    else:
+        own = _session_workspaces()
+    return jsonify({'success': True, **WORKSPACES.report(visible=own)}), 200
+
+
+@app.route('/api/workspaces', methods=['POST'])
+def create_workspace():
+    """
+    Issue a new workspace ID to this session.
+    
+    Send it as X-Workspace-ID (together with the session cookie) to keep
+    several analyses apart. A session holds up to MAX_SESSION_WORKSPACES
+    extra workspaces; beyond that the oldest one is no longer accepted.
+    """
+    if app.config['WORKSPACE_MODE'] == 'single':
+        return jsonify({'error': 'WORKSPACE_MODE=single shares one workspace'}), 400
+    _session_workspaces()
+    workspace_id = uuid.uuid4().hex
+    session['workspace_ids'] = (session.get('workspace_ids', []) + [workspace_id])[-app.config['MAX_SESSION_WORKSPACES']:]
+    return jsonify({'success': True, 'workspace_id': workspace_id}), 201
+
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Process-wide counters: request coalescing, admission queues and cache hit rates."""
+    return jsonify({
+        'success': True,
+        'coalescing': COMPUTE_FLIGHTS.stats(),
+        'admission': {'heavy': HEAVY_POOL.stats(), 'light': LIGHT_POOL.stats()},
+        'caches': {
+            'profile': PROFILE_CACHE.stats(),
+            'correlation': CORRELATION_CACHE.stats(),
+            'upload': UPLOAD_CACHE.stats(),
+            'projection': PROJECTION_CACHE.stats(),
+            'figure': FIGURE_CACHE.stats()
+        }
     }), 200
 
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Request, pipeline stage, cache, admission and memory metrics in the Prometheus text format."""
+    return Response(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@app.route('/api/profiles', methods=['GET'])
+def list_profiles():
+    """
+    List stored request profiles, newest first, with their hotspots.
+    
+    Query params:
+        limit (int): Number of profiles (default 20)
+    """
+    if not app.config['ENABLE_PROFILING']:
+        return jsonify({'error': 'Profiling is disabled (set ENABLE_PROFILING=True)'}), 404
+    limit = request.args.get('limit', 20, type=int)
+    return jsonify({'success': True, 'profiles': PROFILER.list(limit=limit)}), 200
+
+
+@app.route('/api/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """Return one profile summary, or the raw pstats file with ?format=pstats."""
+    if not app.config['ENABLE_PROFILING']:
+        return jsonify({'error': 'Profiling is disabled (set ENABLE_PROFILING=True)'}), 404
+    try:
+        summary = PROFILER.get(profile_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if summary is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    if request.args.get('format') == 'pstats':
+        return send_file(PROFILER.stats_path(profile_id), mimetype='application/octet-stream',
+                         as_attachment=True, download_name=f'{profile_id}.prof')
+    return jsonify({'success': True, 'profile': summary}), 200
+
+
+@app.route('/api/models', methods=['GET'])
+@with_workspace_id
+def list_models(workspace_id):
+    """
+    List the model versions registered by this session's workspaces, newest first, and their aliases.
+    
+    Query params:
+        limit (int): Number of versions (default 20)
+    """
+    limit = request.args.get('limit', 20, type=int)
+    owners = _session_workspaces()
+    return jsonify({'success': True, 'models': MODELS.list(limit=limit, workspace_ids=owners),
+                    'aliases': MODELS.aliases(workspace_ids=owners), 'registry': MODELS.stats()}), 200
+
+
+def _owned_model_ref(ref, workspace_id):
+    """
+    Version ID of a ref the session may see; 'latest' means the workspace's newest model.
+    
+    Raises:
+        KeyError: Unknown ref, or a version registered by another session's workspace
+    """
+    if ref == 'latest':
+        ref = _latest_alias(workspace_id)
+    version = MODELS.resolve(ref)
+    if not MODELS.owned_by(version, _session_workspaces()):
+        raise KeyError(ref)
+    return version
+
+
+@app.route('/api/models/<ref>', methods=['GET'])
+@with_workspace_id
+def get_model(workspace_id, ref):
+    """Return the metadata of one of the session's model versions, by version ID or alias."""
+    try:
+        version = _owned_model_ref(ref, workspace_id)
+    except KeyError:
+        return jsonify({'error': 'Model not found'}), 404
+    return jsonify({'success': True, 'model': MODELS.get(version)}), 200
+
+
+@app.route('/api/models/<ref>/alias', methods=['POST'])
+@with_workspace_id
+def set_model_alias(workspace_id, ref):
+    """
+    Point an alias at one of the session's model versions, e.g. to promote a run to 'production'.
+    
+    Aliases are shared by every client of the registry, so this is only
+    enabled with MODEL_ALIAS_WRITES. The per-workspace 'latest-*' aliases
+    are maintained by clustering and cannot be set here.
+    
+    Request JSON:
+        alias (str): Alias name
+    """
+    if not app.config['MODEL_ALIAS_WRITES']:
+        return jsonify({'error': 'Alias writes are disabled on this server (MODEL_ALIAS_WRITES)'}), 403
+    data = request.get_json(silent=True) or {}
+    alias = str(data.get('alias', ''))
+    if alias == 'latest' or alias.startswith('latest-'):
+        return jsonify({'error': "Aliases named 'latest' or 'latest-*' are reserved"}), 400
+    try:
+        MODELS.set_alias(alias, _owned_model_ref(ref, workspace_id))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except KeyError:
+        return jsonify({'error': 'Model not found'}), 404
+    return jsonify({'success': True, 'aliases': MODELS.aliases(workspace_ids=_session_workspaces())}), 200
+
+
 @app.route('/api/save-state', methods=['POST'])
-def save_app_state():
-    """Persist current analysis state to disk."""
+@with_workspace
+def save_app_state(ws):
+    """Persist the workspace's analysis state to its own file under STATE_DIR."""
     try:
-        state = {
-            'PROCESSED_DATA': PROCESSED_DATA,
-            'ORIGINAL_DATA': ORIGINAL_DATA,
-            'CLUSTER_LABELS': CLUSTER_LABELS,
-            'KMEANS_MODEL': KMEANS_MODEL,
-            'METADATA': METADATA,
-        }
-        path = save_state(state)
+        path = save_state(ws.to_state(), WORKSPACES.state_path(ws.workspace_id))
         return jsonify({'success': True, 'path': path}), 200
     except Exception as e:
         app_logger.error(f"Save state error: {str(e)}", exc_info=True)
@@ -614,18 +1834,15 @@ def save_app_state():
 
 
 @app.route('/api/load-state', methods=['POST'])
-def load_app_state():
-    """Load persisted analysis state into memory."""
+@with_workspace
+def load_app_state(ws):
+    """Load the workspace's persisted analysis state into memory."""
     try:
-        global PROCESSED_DATA, ORIGINAL_DATA, CLUSTER_LABELS, KMEANS_MODEL, METADATA
-        state = load_state()
+        state = load_state(WORKSPACES.state_path(ws.workspace_id))
         if not state:
             return jsonify({'success': False, 'message': 'No saved state found'}), 404
-        PROCESSED_DATA = state.get('PROCESSED_DATA')
-        ORIGINAL_DATA = state.get('ORIGINAL_DATA')
-        CLUSTER_LABELS = state.get('CLUSTER_LABELS')
-        KMEANS_MODEL = state.get('KMEANS_MODEL')
-        METADATA = state.get('METADATA')
+        _cancel_speculative_sweep(ws)
+        ws.restore(state)
         return jsonify({'success': True, 'message': 'State restored'}), 200
     except Exception as e:
         app_logger.error(f"Load state error: {str(e)}", exc_info=True)
@@ -633,14 +1850,16 @@ def load_app_state():
 
 
 @app.route('/api/state-history', methods=['GET'])
-def state_history():
-    """Return metadata about saved analysis states."""
-    history = get_state_history()
+@with_workspace_id
+def state_history(workspace_id):
+    """Return metadata about the workspace's saved analysis state."""
+    history = get_state_history(WORKSPACES.state_path(workspace_id))
     return jsonify({'success': True, 'history': history}), 200
 
 
 @app.route('/api/reset', methods=['POST'])
-def reset():
+@with_workspace
+def reset(ws):
     """
     Reset all analysis and clear loaded data.
     
@@ -650,12 +1869,8 @@ def reset():
     try:
         app_logger.info("Analysis reset initiated")
         
-        global PROCESSED_DATA, ORIGINAL_DATA, CLUSTER_LABELS, KMEANS_MODEL, METADATA
-        PROCESSED_DATA = None
-        ORIGINAL_DATA = None
-        CLUSTER_LABELS = None
-        KMEANS_MODEL = None
-        METADATA = None
+        _cancel_speculative_sweep(ws)
+        ws.clear()
         
         app_logger.info("Analysis reset successfully")
         
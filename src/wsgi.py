@@ -0,0 +1,35 @@
+"""
+Customer Segmentation Analytics System - WSGI entry point
+Production server entry point; run with: gunicorn -c config/gunicorn.conf.py
+
+Importing this module builds the Flask app, restores the saved analysis state
+of every workspace (STATE_DIR/<workspace_id>.pkl) and imports the heavy
+numerical and plotting modules. With preload_app the gunicorn master does this
+once and forked workers share the pages copy-on-write instead of each loading
+its own copy. A restored workspace is reached by the session whose cookie
+carries its ID (or by every client in WORKSPACE_MODE=single); each worker
+holds its own copy from the fork on, so changes made in one worker are not
+seen by the others.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Restore the saved workspaces before gunicorn forks, so workers share them (an
+# explicit STATE_RESTORE in the environment still wins)
+os.environ.setdefault('STATE_RESTORE', 'eager')
+
+from app import app
+
+# Modules the request handlers need; imported here so the master process
+# loads them even where the app itself imports them lazily
+import sklearn.cluster  # noqa: F401
+import sklearn.metrics  # noqa: F401
+import sklearn.decomposition  # noqa: F401
+import sklearn.random_projection  # noqa: F401
+import plotly.graph_objs  # noqa: F401
+import plotly.express  # noqa: F401
+
+application = app
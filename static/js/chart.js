@@ -206,7 +206,7 @@ safeListen(fileInput, 'change', handleFileSelect);
 
 function handleFileSelect() {
     const file = fileInput.files[0];
-    if (file && file.name.endsWith('.csv')) {
+    if (file && /\.csv(\.gz|\.zst)?$/i.test(file.name)) {
         fileSelected = true;
         fileName.textContent = `✓ ${file.name}`;
         uploadBtn.style.display = 'inline-flex';
@@ -225,15 +225,14 @@ async function uploadFile() {
         return;
     }
 
-    const formData = new FormData();
-    formData.append('file', file);
-
     showLoading(true, 'Uploading and processing data...');
 
     try {
-        const response = await fetch('/api/upload', {
+        // Raw body: the server parses it straight off the socket, without multipart spooling
+        const response = await fetch('/api/upload?filename=' + encodeURIComponent(file.name), {
             method: 'POST',
-            body: formData
+            body: file,
+            headers: {'Content-Type': 'text/csv'}
         });
 
         const data = await response.json();
@@ -335,6 +334,11 @@ async function findOptimalClusters() {
         return;
     }
 
+    if (window.EventSource) {
+        streamOptimalClusters();
+        return;
+    }
+
     showLoading(true, 'Analyzing optimal clusters...');
 
     try {
@@ -355,6 +359,39 @@ async function findOptimalClusters() {
     }
 }
 
+// Render the sweep as each k completes; closing the stream cancels the rest
+function streamOptimalClusters() {
+    showLoading(true, 'Analyzing optimal clusters...');
+    const partial = { x: [], y: [] };
+    const source = new EventSource('/api/optimal-clusters/stream');
+
+    source.addEventListener('progress', (event) => {
+        const step = JSON.parse(event.data);
+        // Steps of a speculative sweep can complete out of order
+        const after = partial.x.findIndex((k) => k > step.k);
+        const index = after === -1 ? partial.x.length : after;
+        partial.x.splice(index, 0, step.k);
+        partial.y.splice(index, 0, step.silhouette_score);
+        showLoading(false);
+        displayOptimalChart(partial, null);
+        document.getElementById('optimalResult').innerHTML =
+            `<p style="color: #64748b;">Evaluated k = ${step.k} (${step.completed} of ${step.total})...</p>`;
+    });
+    source.addEventListener('done', (event) => {
+        source.close();
+        const data = JSON.parse(event.data);
+        optimalClusters = data.optimal_k;
+        displayOptimalChart(data.chart_data, data.optimal_k);
+        showToast(`Optimal clusters: ${data.optimal_k}`, 'success');
+    });
+    source.addEventListener('error', (event) => {
+        source.close();
+        showLoading(false);
+        const message = event.data ? JSON.parse(event.data).error : 'Analysis stream interrupted';
+        showToast(message || 'Analysis failed', 'error');
+    });
+}
+
 function displayOptimalChart(chartData, optimalK) {
     const optimalChart = document.getElementById('optimalChart');
     optimalChart.style.display = 'block';
@@ -391,6 +428,11 @@ function displayOptimalChart(chartData, optimalK) {
 
     Plotly.newPlot('silhouetteChart', [trace], layout, ChartAnimationConfig);
 
+    // Partial sweep: chart only
+    if (optimalK === null) {
+        return;
+    }
+
     const resultHTML = `
         <p style="color: #10b981; font-weight: bold; font-size: 1.1rem;">
             ✓ Optimal number of clusters: <span style="color: #2563eb; font-size: 1.3rem;">${optimalK}</span>
@@ -1,10 +1,24 @@
 import unittest
+import atexit
 import os
+import shutil
 import sys
+import tempfile
+
+# Keep test runs out of the repository's logs/, model/ and data/ directories
+_TEST_DIR = tempfile.mkdtemp(prefix='segmentation-tests-')
+atexit.register(shutil.rmtree, _TEST_DIR, True)
+for _name, _path in (('LOG_FILE', 'app.log'), ('MODEL_REGISTRY_DIR', 'registry'), ('STATE_DIR', 'state'),
+                     ('UPLOAD_FOLDER', 'uploads'), ('PROFILE_DIR', 'profiles')):
+    os.environ.setdefault(_name, os.path.join(_TEST_DIR, _path))
 
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'src'))
+import app as app_module
 from app import app
 
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'customers.csv')
+
+
 class ApiTestCase(unittest.TestCase):
     def setUp(self):
         self.client = app.test_client()
@@ -44,6 +58,518 @@ class ApiTestCase(unittest.TestCase):
         data = rv.get_json()
         self.assertIn('success', data)
 
+    def test_upload_profile_cached_for_data_quality(self):
+        rv = self._upload()
+        self.assertEqual(rv.status_code, 200)
+        misses = app_module.PROFILE_CACHE.misses
+        rv = self.client.get('/api/data-quality')
+        self.assertEqual(rv.status_code, 200)
+        self.assertEqual(rv.get_json()['metrics']['total_rows'], 100)
+        self.assertEqual(app_module.PROFILE_CACHE.misses, misses)
+
+    def test_repeat_upload_reuses_processed_data(self):
+        responses = []
+        for _ in range(2):
+            responses.append(self._upload().get_json())
+        self.assertTrue(responses[1]['cached'])
+        self.assertEqual(responses[0]['content_hash'], responses[1]['content_hash'])
+        self.assertEqual(responses[0]['statistics'], responses[1]['statistics'])
+
+    def test_raw_csv_body_upload(self):
+        with open(CSV_PATH, 'rb') as f:
+            body = f.read()
+        rv = self.client.post('/api/upload?filename=customers.csv', data=body, content_type='text/csv')
+        self.assertEqual(rv.status_code, 200)
+        self.assertEqual(rv.get_json()['shape'][0], 100)
+
+    def test_gzip_upload(self):
+        import gzip
+        from unittest import mock
+        with open(CSV_PATH, 'rb') as f:
+            body = gzip.compress(f.read())
+        with mock.patch.dict(app.config, {'SAVE_UPLOADS': False}):
+            rv = self._upload(body=body, filename='customers.csv.gz')
+        self.assertEqual(rv.status_code, 200)
+        self.assertEqual(rv.get_json()['shape'][0], 100)
+
+    def test_correlation_matrix_methods(self):
+        self._upload()
+        for method in ('pearson', 'spearman'):
+            rv = self.client.get(f'/api/correlation-matrix?method={method}')
+            self.assertEqual(rv.status_code, 200)
+            data = rv.get_json()
+            self.assertEqual(len(data['matrix']), len(data['features']))
+            self.assertEqual(data['matrix'][0][0], 1.0)
+        rv = self.client.get('/api/correlation-matrix?method=kendall')
+        self.assertEqual(rv.status_code, 400)
+
+    def test_workspaces_are_isolated(self):
+        self._upload()
+        other = app.test_client()
+        self.assertTrue(self.client.get('/api/status').get_json()['data_loaded'])
+        self.assertFalse(other.get('/api/status').get_json()['data_loaded'])
+        
+        # Another session cannot reach this workspace by naming its ID
+        workspace_id = self.client.get('/api/status').get_json()['workspace_id']
+        self.assertEqual(other.get('/api/status', headers={'X-Workspace-ID': workspace_id}).status_code, 403)
+        self.assertEqual(other.get(f'/api/status?workspace={workspace_id}').status_code, 403)
+        self.assertEqual(other.get('/api/status?workspace=../x').status_code, 400)
+        
+        # A second workspace issued to this session is reachable from it only
+        second = self.client.post('/api/workspaces').get_json()['workspace_id']
+        status = self.client.get('/api/status', headers={'X-Workspace-ID': second}).get_json()
+        self.assertEqual(status['workspace_id'], second)
+        self.assertFalse(status['data_loaded'])
+        self.assertEqual(other.get('/api/status', headers={'X-Workspace-ID': second}).status_code, 403)
+        
+        # The report lists the caller's own workspaces only
+        self._upload(other)
+        other_id = other.get('/api/status').get_json()['workspace_id']
+        report = self.client.get('/api/workspaces').get_json()
+        ids = [w['workspace_id'] for w in report['workspaces']]
+        self.assertIn(workspace_id, ids)
+        self.assertNotIn(other_id, ids)
+        self.assertGreaterEqual(report['total_workspaces'], 2)
+        # Read-only requests do not store a workspace for a session that has none
+        self.assertNotIn(second, ids)
+        total = report['total_workspaces']
+        for _ in range(20):
+            self.assertEqual(app.test_client().get('/api/status').status_code, 200)
+        self.assertEqual(self.client.get('/api/workspaces').get_json()['total_workspaces'], total)
+
+    def test_export_is_per_workspace(self):
+        files = []
+        for client in (self.client, app.test_client()):
+            self._upload(client)
+            client.post('/api/cluster', json={'n_clusters': 3})
+            workspace_id = client.get('/api/status').get_json()['workspace_id']
+            rv = client.get('/api/export')
+            self.assertEqual(rv.status_code, 200)
+            paths = rv.get_json()['files']
+            self.assertIn(workspace_id, paths['csv'])
+            self.assertTrue(all(os.path.exists(path) for path in paths.values()))
+            files.append(paths)
+        self.assertNotEqual(files[0]['csv'], files[1]['csv'])
+
+    def test_background_sweep_job(self):
+        self._upload()
+        rv = self.client.post('/api/jobs', json={'type': 'optimal-clusters'})
+        self.assertEqual(rv.status_code, 202)
+        job_id = rv.get_json()['job_id']
+        self.assertTrue(app_module.JOBS.get(job_id).wait(60))
+        
+        job = self.client.get(rv.get_json()['status_url']).get_json()['job']
+        self.assertEqual(job['state'], 'succeeded')
+        self.assertEqual(job['progress']['completed'], job['progress']['total'])
+        self.assertIn(job['result']['optimal_k'], range(2, 11))
+        self.assertEqual(len(job['partial_results']), job['progress']['total'])
+        # Jobs are only visible to their own workspace
+        self.assertEqual(app.test_client().get(f'/api/jobs/{job_id}').status_code, 404)
+        self.assertEqual(self.client.post('/api/jobs', json={'type': 'nope'}).status_code, 400)
+
+    def test_optimal_clusters_stream(self):
+        self._upload()
+        rv = self.client.get('/api/optimal-clusters/stream')
+        self.assertEqual(rv.mimetype, 'text/event-stream')
+        events = self._stream_events(rv)
+        self.assertEqual(events[0][0], 'start')
+        progress = [data for event, data in events if event == 'progress']
+        self.assertEqual([step['k'] for step in progress], list(range(2, events[0][1]['max_k'] + 1)))
+        self.assertTrue(all(step['inertia'] > 0 for step in progress))
+        self.assertEqual(events[-1][0], 'done')
+        self.assertEqual(events[-1][1]['optimal_k'], max(progress, key=lambda step: step['silhouette_score'])['k'])
+        self.assertEqual(events[-1][1]['source'], 'computed')
+        
+        # A second stream replays the stored sweep
+        replay = self._stream_events(self.client.get('/api/optimal-clusters/stream'))
+        self.assertEqual([data['k'] for event, data in replay if event == 'progress'], [step['k'] for step in progress])
+        self.assertEqual(replay[-1][1]['source'], 'cached')
+        self.assertEqual(replay[-1][1]['silhouette_scores'], events[-1][1]['silhouette_scores'])
+    
+    def _stream_events(self, rv):
+        import json
+        events = []
+        for block in rv.get_data(as_text=True).strip().split('\n\n'):
+            lines = dict(line.split(': ', 1) for line in block.splitlines())
+            events.append((lines['event'], json.loads(lines['data'])))
+        return events
+    
+    def _upload(self, client=None, body=None, filename='customers.csv'):
+        """POST data/customers.csv (or body) to /api/upload as a multipart file and return the response."""
+        import io
+        if body is None:
+            with open(CSV_PATH, 'rb') as f:
+                body = f.read()
+        return (client or self.client).post('/api/upload', data={'file': (io.BytesIO(body), filename)},
+                                            content_type='multipart/form-data')
+    
+    def test_concurrent_streams_share_one_sweep(self):
+        import threading
+        from unittest import mock
+        self._upload()
+        gate, calls = threading.Event(), []
+        find_optimal_clusters = app_module.find_optimal_clusters
+        
+        def gated(*args, **kwargs):
+            calls.append(1)
+            gate.wait(30)
+            return find_optimal_clusters(*args, **kwargs)
+        
+        coalesced = app_module.COMPUTE_FLIGHTS.stats()['coalesced']
+        with mock.patch.object(app_module, 'find_optimal_clusters', gated):
+            first = self.client.get('/api/optimal-clusters/stream')
+            second = self.client.get('/api/optimal-clusters/stream')
+            while app_module.COMPUTE_FLIGHTS.stats()['coalesced'] == coalesced:
+                threading.Event().wait(0.01)
+            gate.set()
+            streams = [self._stream_events(first), self._stream_events(second)]
+        self.assertEqual(len(calls), 1)
+        for events in streams:
+            progress = [data['k'] for event, data in events if event == 'progress']
+            self.assertEqual(progress, list(range(2, events[0][1]['max_k'] + 1)))
+            self.assertEqual(events[-1][1]['source'], 'computed')
+        self.assertEqual(sorted(events[-1][1]['coalesced'] for events in streams), [False, True])
+    
+    def test_optimal_clusters_stream_follows_speculative_sweep(self):
+        import threading
+        from unittest import mock
+        from utils.jobs import JobManager
+        self._upload()
+        workspace_id = self.client.get('/api/status').get_json()['workspace_id']
+        gate = threading.Event()
+        silhouette_for_k = app_module.silhouette_for_k
+        
+        def gated(*args, **kwargs):
+            gate.wait(30)
+            return silhouette_for_k(*args, **kwargs)
+        
+        manager = JobManager(max_workers=1, executor='thread')
+        with mock.patch.object(app_module, 'silhouette_for_k', gated), \
+                mock.patch.object(app_module, 'find_optimal_clusters', side_effect=AssertionError):
+            with app_module.WORKSPACES.checkout(workspace_id) as ws:
+                ws.sweep_job = job = app_module._submit_sweep_job(ws, manager)
+            rv = self.client.get('/api/optimal-clusters/stream')
+            gate.set()
+            body = rv.get_data(as_text=True)
+        manager.shutdown()
+        self.assertIn('event: done', body)
+        self.assertIn('"source": "speculative"', body)
+        self.assertEqual(body.count('event: progress'), job.total_steps)
+
+    def test_speculative_sweep_after_upload(self):
+        app.config['SPECULATIVE_SWEEP'] = True
+        try:
+            self._upload()
+        finally:
+            app.config['SPECULATIVE_SWEEP'] = False
+        workspace_id = self.client.get('/api/status').get_json()['workspace_id']
+        with app_module.WORKSPACES.checkout(workspace_id) as ws:
+            job = ws.sweep_job
+        self.assertIsNotNone(job)
+        
+        first = self.client.get('/api/optimal-clusters').get_json()
+        self.assertEqual(first['source'], 'speculative')
+        second = self.client.get('/api/optimal-clusters').get_json()
+        self.assertEqual(second['source'], 'cached')
+        self.assertEqual(first['silhouette_scores'], second['silhouette_scores'])
+        
+        self.client.post('/api/reset')
+        self.assertTrue(job.wait(30))
+        with app_module.WORKSPACES.checkout(workspace_id) as ws:
+            self.assertIsNone(ws.sweep_job)
+            self.assertIsNone(ws.silhouette_scores)
+
+    def test_visualizations_compressed(self):
+        import gzip
+        import json
+        self._upload()
+        self.client.post('/api/cluster', json={'n_clusters': 3})
+        rv = self.client.get('/api/visualizations', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(rv.status_code, 200)
+        self.assertEqual(rv.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', rv.headers['Vary'])
+        data = json.loads(gzip.decompress(rv.data))
+        self.assertEqual(len(data['distribution_chart']['data'][0]['x']), 3)
+        self.assertIn('layout', data['scatter_chart'])
+        
+        plain = self.client.get('/api/visualizations')
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertEqual(plain.get_json()['distribution_chart'], data['distribution_chart'])
+
+    def test_visualizations_point_budget(self):
+        self._upload()
+        self.client.post('/api/cluster', json={'n_clusters': 3})
+        full = self.client.get('/api/visualizations').get_json()
+        total = full['sampling']['total_points']
+        self.assertEqual(full['sampling']['method'], 'none')
+        
+        sampled = self.client.get('/api/visualizations?max_points=60&sampling=stratified')
+        self.assertNotEqual(sampled.headers['ETag'], self.client.get('/api/visualizations').headers['ETag'])
+        summary = sampled.get_json()['sampling']
+        self.assertEqual(summary['method'], 'stratified')
+        self.assertEqual(summary['total_points'], total)
+        self.assertEqual(summary['markers'], 60)
+        self.assertTrue(all(c['markers'] > 0 for c in summary['per_cluster'].values()))
+        markers = sum(len(trace['x']) for trace in sampled.get_json()['scatter_chart']['data'])
+        self.assertEqual(markers, 60)
+        
+        binned = self.client.get('/api/visualizations?max_points=30&sampling=binned').get_json()
+        self.assertLessEqual(binned['sampling']['markers'], 30)
+        self.assertEqual(sum(sum(trace['marker']['size']) for trace in binned['scatter_chart']['data']), total)
+        self.assertEqual(self.client.get('/api/visualizations?sampling=random').status_code, 400)
+
+    def test_visualizations_cached_projection(self):
+        from unittest import mock
+        self._upload()
+        self.client.post('/api/cluster', json={'n_clusters': 3})
+        first = self.client.get('/api/visualizations').get_json()
+        self.assertEqual(first['projection']['method'], 'pca')
+        self.assertNotIn('CustomerID', first['projection']['features'])
+        self.assertTrue(first['scatter_chart']['layout']['xaxis']['title']['text'].startswith('Component 1'))
+        
+        # Without an ETag the body still comes from the figure cache, not plotly
+        with mock.patch.object(app_module, '_render_visualizations', side_effect=AssertionError('re-rendered')):
+            again = self.client.get('/api/visualizations')
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.get_json()['scatter_chart'], first['scatter_chart'])
+        
+        # A new clustering run re-renders, reusing the dataset's projection
+        with mock.patch.object(app_module, 'fit_projection_2d', side_effect=AssertionError('re-projected')):
+            self.client.post('/api/cluster', json={'n_clusters': 4})
+            rv = self.client.get('/api/visualizations')
+        self.assertEqual(len(rv.get_json()['distribution_chart']['data'][0]['x']), 4)
+
+    def test_saved_state_is_per_workspace(self):
+        self._upload()
+        self.assertEqual(self.client.post('/api/save-state').status_code, 200)
+        self.assertEqual(len(self.client.get('/api/state-history').get_json()['history']), 1)
+        
+        # Another session neither sees nor loads this workspace's saved state
+        other = app.test_client()
+        self.assertEqual(other.get('/api/state-history').get_json()['history'], [])
+        self.assertEqual(other.post('/api/load-state').status_code, 404)
+        self.assertFalse(other.get('/api/status').get_json()['data_loaded'])
+        
+        self.client.post('/api/reset')
+        self.assertFalse(self.client.get('/api/status').get_json()['data_loaded'])
+        self.assertEqual(self.client.post('/api/load-state').status_code, 200)
+        self.assertTrue(self.client.get('/api/status').get_json()['data_loaded'])
+    
+    def test_eager_restore_reaches_session_workspace(self):
+        from utils.state import save_state
+        from utils.preprocessing import preprocess_data
+        processed, metadata, original = preprocess_data(CSV_PATH)
+        # A session from before a restart, whose workspace saved its state
+        workspace_id = 'restored-' + os.urandom(4).hex()
+        save_state({'PROCESSED_DATA': processed, 'ORIGINAL_DATA': original, 'METADATA': metadata},
+                   app_module.WORKSPACES.state_path(workspace_id))
+        self.assertIn(workspace_id, app_module.WORKSPACES.saved_workspaces())
+        
+        # What STATE_RESTORE=eager does at import, before gunicorn forks
+        app_module.restore_saved_states([workspace_id])
+        with self.client.session_transaction() as sess:
+            sess['workspace_id'] = workspace_id
+        report = self.client.get('/api/workspaces').get_json()
+        own = [w for w in report['workspaces'] if w['workspace_id'] == workspace_id][0]
+        self.assertFalse(own['restore_pending'])
+        self.assertTrue(own['data_loaded'])
+        self.assertTrue(self.client.get('/api/status').get_json()['data_loaded'])
+    
+    def test_onehot_encoding_end_to_end(self):
+        import warnings
+        from unittest import mock
+        with mock.patch.dict(app.config, {'CATEGORICAL_ENCODING': 'onehot'}), \
+                warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            rv = self._upload()
+            self.assertEqual(rv.status_code, 200)
+            # CustomerID stays one column instead of one indicator per customer
+            self.assertLess(rv.get_json()['shape'][1], 20)
+            self.assertEqual(self.client.post('/api/cluster', json={'n_clusters': 3}).status_code, 200)
+            for path in ('/api/cluster-data', '/api/feature-importance', '/api/visualizations'):
+                rv = self.client.get(path)
+                self.assertEqual(rv.status_code, 200, path)
+            self.assertIn('davies_bouldin_score', self.client.get('/api/cluster-data').get_json()['metrics'])
+        self.assertFalse([w for w in caught if 'sparse' in str(w.message)])
+    
+    def test_conditional_get(self):
+        from unittest import mock
+        self._upload()
+        self.client.post('/api/cluster', json={'n_clusters': 3})
+        first = self.client.get('/api/cluster-data')
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers['ETag']
+        
+        # A matching If-None-Match is answered without running the analysis
+        with mock.patch.object(app_module, 'analyze_clusters', side_effect=AssertionError('recomputed')):
+            rv = self.client.get('/api/cluster-data', headers={'If-None-Match': etag})
+        self.assertEqual(rv.status_code, 304)
+        self.assertEqual(rv.data, b'')
+        self.assertEqual(rv.headers['ETag'], etag)
+        
+        # Compressed representations get their own strong ETag, which also revalidates
+        gzipped = self.client.get('/api/visualizations', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(gzipped.headers['ETag'], etag[:-1] + '-gzip"')
+        rv = self.client.get('/api/visualizations', headers={'Accept-Encoding': 'gzip',
+                                                             'If-None-Match': gzipped.headers['ETag']})
+        self.assertEqual(rv.status_code, 304)
+        
+        self.client.post('/api/cluster', json={'n_clusters': 4})
+        rv = self.client.get('/api/cluster-data', headers={'If-None-Match': etag})
+        self.assertEqual(rv.status_code, 200)
+        self.assertNotEqual(rv.headers['ETag'], etag)
+        self.client.post('/api/reset')
+        status = self.client.get('/api/status', headers={'If-None-Match': rv.headers['ETag']})
+        self.assertEqual(status.status_code, 200)
+        self.assertFalse(status.get_json()['data_loaded'])
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'needs os.fork')
+    def test_forked_worker_gets_own_boot_id(self):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.write(write_fd, app_module.BOOT_ID.encode())
+            os._exit(0)
+        os.close(write_fd)
+        os.waitpid(pid, 0)
+        child_boot_id = os.read(read_fd, 64).decode()
+        os.close(read_fd)
+        self.assertEqual(len(child_boot_id), 12)
+        self.assertNotEqual(child_boot_id, app_module.BOOT_ID)
+
+    def test_heavy_requests_rejected_when_pool_full(self):
+        from unittest import mock
+        from utils.admission import AdmissionPool
+        pool = AdmissionPool('heavy', max_concurrent=1, max_queue=0)
+        with mock.patch.object(app_module, 'HEAVY_POOL', pool), pool.admit('someone-else'):
+            rv = self.client.post('/api/cluster', json={'n_clusters': 3})
+            self.assertEqual(rv.status_code, 503)
+            self.assertEqual(rv.get_json()['reason'], 'queue_full')
+            self.assertGreaterEqual(int(rv.headers['Retry-After']), 1)
+            # Light routes have their own pool
+            self.assertEqual(self.client.get('/health').status_code, 200)
+        metrics = self.client.get('/api/metrics').get_json()['admission']
+        self.assertGreater(metrics['light']['admitted'], 0)
+        self.assertIn('queue_depth', metrics['heavy'])
+
+    def test_stream_holds_heavy_slot_until_sweep_ends(self):
+        import threading
+        from unittest import mock
+        from utils.admission import AdmissionPool
+        self._upload()
+        pool = AdmissionPool('heavy', max_concurrent=1, max_queue=0)
+        gate = threading.Event()
+        find_optimal_clusters = app_module.find_optimal_clusters
+        
+        def gated(*args, **kwargs):
+            gate.wait(30)
+            return find_optimal_clusters(*args, **kwargs)
+        
+        with mock.patch.object(app_module, 'HEAVY_POOL', pool), \
+                mock.patch.object(app_module, 'find_optimal_clusters', gated):
+            rv = self.client.get('/api/optimal-clusters/stream')
+            # The request has ended, but the sweep still holds the only slot
+            self.assertEqual(pool.stats()['active'], 1)
+            self.assertEqual(self.client.post('/api/cluster', json={'n_clusters': 3}).status_code, 503)
+            gate.set()
+            self.assertIn('event: done', rv.get_data(as_text=True))
+            rv.close()
+            for _ in range(500):
+                if pool.stats()['active'] == 0:
+                    break
+                threading.Event().wait(0.01)
+            self.assertEqual(pool.stats()['active'], 0)
+    
+    def test_prometheus_metrics(self):
+        self._upload()
+        self.client.post('/api/cluster', json={'n_clusters': 3})
+        self.client.get('/api/nonexistent')
+        rv = self.client.get('/metrics')
+        self.assertEqual(rv.status_code, 200)
+        self.assertTrue(rv.content_type.startswith('text/plain; version=0.0.4'))
+        text = rv.get_data(as_text=True)
+        for stage in ('parse', 'impute', 'encode', 'scale', 'fit', 'silhouette', 'analysis'):
+            self.assertIn(f'segmentation_stage_seconds_count{{stage="{stage}"}}', text)
+        self.assertIn('segmentation_request_seconds_count{endpoint="cluster"}', text)
+        self.assertIn('segmentation_errors_total{endpoint="unmatched",status="404"}', text)
+        self.assertIn('segmentation_cache_misses_total{cache="upload"}', text)
+        self.assertIn('segmentation_workspace_memory_bytes ', text)
+        
+        # Platforms without a readable RSS leave the gauge out instead of failing the scrape
+        from unittest import mock
+        with mock.patch.object(app_module, 'process_rss_bytes', return_value=None):
+            rv = self.client.get('/metrics')
+        self.assertEqual(rv.status_code, 200)
+        self.assertNotIn('\nsegmentation_process_resident_memory_bytes ', rv.get_data(as_text=True))
+
+    def test_request_profiling(self):
+        import tempfile
+        from unittest import mock
+        from utils.profiling import RequestProfiler
+        self.assertEqual(self.client.get('/api/profiles').status_code, 404)
+        self._upload()
+        with tempfile.TemporaryDirectory() as profile_dir, \
+                mock.patch.object(app_module, 'PROFILER', RequestProfiler(profile_dir)), \
+                mock.patch.dict(app.config, {'ENABLE_PROFILING': True}):
+            self.assertNotIn('X-Profile-ID', self.client.get('/api/status').headers)
+            rv = self.client.post('/api/cluster', json={'n_clusters': 3}, headers={'X-Profile': '1'})
+            self.assertEqual(rv.status_code, 200)
+            profile_id = rv.headers['X-Profile-ID']
+            
+            profiles = self.client.get('/api/profiles').get_json()['profiles']
+            self.assertEqual([p['profile_id'] for p in profiles], [profile_id])
+            self.assertEqual(profiles[0]['endpoint'], 'cluster')
+            self.assertEqual(profiles[0]['trigger'], 'requested')
+            self.assertTrue(profiles[0]['hotspots'])
+            
+            raw = self.client.get(f'/api/profiles/{profile_id}?format=pstats')
+            self.assertEqual(raw.status_code, 200)
+            raw.close()
+            self.assertEqual(self.client.get('/api/profiles/not-an-id').status_code, 400)
+
+    def test_model_registry(self):
+        import tempfile
+        from unittest import mock
+        from utils.registry import ModelRegistry
+        self._upload()
+        with tempfile.TemporaryDirectory() as registry_dir:
+            registry = ModelRegistry(registry_dir)
+            with mock.patch.object(app_module, 'MODELS', registry):
+                rv = self.client.post('/api/cluster', json={'n_clusters': 3})
+                self.assertEqual(rv.status_code, 200)
+                version = rv.get_json()['model_version']
+                registry.flush()
+                
+                workspace_id = self.client.get('/api/status').get_json()['workspace_id']
+                listing = self.client.get('/api/models').get_json()
+                self.assertEqual(listing['aliases'], {f'latest-{workspace_id}': version})
+                self.assertEqual([m['version'] for m in listing['models']], [version])
+                meta = self.client.get('/api/models/latest').get_json()['model']
+                self.assertEqual(meta['n_clusters'], 3)
+                self.assertEqual(len(meta['dataset_fingerprint']), 64)
+                self.assertIn('silhouette_score', meta['metrics'])
+                
+                # Another session sees neither the version nor its alias
+                other = app.test_client()
+                self.assertEqual(other.get('/api/models').get_json()['models'], [])
+                self.assertEqual(other.get(f'/api/models/{version}').status_code, 404)
+                self.assertEqual(other.get('/api/models/latest').status_code, 404)
+                
+                # Shared aliases are off unless the server enables them
+                rv = self.client.post(f'/api/models/{version}/alias', json={'alias': 'production'})
+                self.assertEqual(rv.status_code, 403)
+                with mock.patch.dict(app.config, {'MODEL_ALIAS_WRITES': True}):
+                    rv = self.client.post(f'/api/models/{version}/alias', json={'alias': 'production'})
+                    self.assertEqual(rv.get_json()['aliases']['production'], version)
+                    for alias in ('../x', 'latest', 'latest-other'):
+                        rv = self.client.post(f'/api/models/{version}/alias', json={'alias': alias})
+                        self.assertEqual(rv.status_code, 400)
+                    self.assertEqual(other.post(f'/api/models/{version}/alias',
+                                                json={'alias': 'staging'}).status_code, 404)
+                self.assertEqual(self.client.get('/api/models/staging').status_code, 404)
+                # A fresh registry (e.g. a scoring worker) loads it from disk
+                self.assertTrue(hasattr(ModelRegistry(registry_dir).load_model('production'), 'predict'))
+
     def test_404_html(self):
         rv = self.client.get('/nonexistent', headers={'Accept': 'text/html'})
         self.assertEqual(rv.status_code, 404)
@@ -5,12 +5,22 @@ Run tests with: pytest tests.py -v
 """
 
 import unittest
+import atexit
 import os
+import shutil
 import sys
+import tempfile
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import StandardScaler
 
+# Keep test runs out of the repository's logs/, model/ and data/ directories
+_TEST_DIR = tempfile.mkdtemp(prefix='segmentation-tests-')
+atexit.register(shutil.rmtree, _TEST_DIR, True)
+for _name, _path in (('LOG_FILE', 'app.log'), ('MODEL_REGISTRY_DIR', 'registry'), ('STATE_DIR', 'state'),
+                     ('UPLOAD_FOLDER', 'uploads'), ('PROFILE_DIR', 'profiles')):
+    os.environ.setdefault(_name, os.path.join(_TEST_DIR, _path))
+
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -24,15 +34,31 @@ from utils.preprocessing import (
     get_data_quality_metrics,
     get_correlation_matrix
 )
+from utils.data_profile import profile_dataframe
+from utils.memory import MemoryTracker
+from utils.ingest import ingest_csv, BackgroundFileWriter, UploadTooLargeError, UnsupportedCompressionError
+from utils.reduction import fit_reduction, project_2d, fit_projection_2d
+from utils.correlation import CorrelationEngine, compute_correlation
+from utils.workspace import WorkspaceStore
+from utils.cache import SingleFlight
+from utils.admission import AdmissionPool, AdmissionRejected
+from utils.metrics import MetricsRegistry
+from utils.jobs import JobManager
+from utils.registry import ModelRegistry
+from utils.downsample import stratified_sample_indices, density_bins, downsample_scatter
+from utils.logger import setup_logger, flush_logger, RouteSampler, parse_sample_rates
+from utils.serialization import RawJSON, dumps, negotiate_encoding
 from utils.clustering import (
     find_optimal_clusters,
+    silhouette_for_k,
     perform_clustering,
     calculate_cluster_metrics,
     analyze_clusters,
     get_cluster_recommendations,
     get_cluster_centroids,
     calculate_inertia,
-    get_cluster_profiles
+    get_cluster_profiles,
+    KPrototypes
 )
 
 
@@ -59,6 +85,19 @@ class TestPreprocessing(unittest.TestCase):
         self.assertIsInstance(result['Category'].iloc[0], (int, np.integer))
         self.assertIn('Category', encoders)
     
+    def test_encode_categorical_codes(self):
+        """Test integer code encoding for the mixed-type path"""
+        result, encoders = encode_categorical_features(self.sample_data, method='codes')
+        self.assertEqual(result['Category'].tolist(), [0, 1, 0, 2, 1])
+        self.assertEqual(list(encoders['Category']), ['A', 'B', 'C'])
+    
+    def test_encode_categorical_onehot_sparse(self):
+        """Test sparse one-hot encoding"""
+        result, encoders = encode_categorical_features(self.sample_data, method='onehot')
+        self.assertNotIn('Category', result.columns)
+        self.assertIsInstance(result['Category_A'].dtype, pd.SparseDtype)
+        self.assertEqual(int(result['Category_A'].sum()), 2)
+    
     def test_normalize_features(self):
         """Test feature normalization"""
         test_df = self.sample_data.drop('Category', axis=1).fillna(self.sample_data.mean())
@@ -79,12 +118,50 @@ class TestPreprocessing(unittest.TestCase):
         self.assertEqual(metrics['total_rows'], 5)
         self.assertIn('missing_values', metrics)
     
+    def test_profile_matches_pandas(self):
+        """Test single-pass profile against pandas scans, across chunk boundaries"""
+        df = pd.concat([self.sample_data, self.sample_data.iloc[:2]], ignore_index=True)
+        profile = profile_dataframe(df, chunk_size=3)
+        self.assertEqual(profile['duplicate_rows'], int(df.duplicated().sum()))
+        self.assertEqual(profile['null_counts'], df.isnull().sum().to_dict())
+        self.assertEqual(profile['cardinality'], df.nunique().to_dict())
+        expected = df.describe().to_dict()
+        for col, stats in expected.items():
+            for key, value in stats.items():
+                self.assertAlmostEqual(profile['numeric_statistics'][col][key], value)
+    
     def test_get_correlation_matrix(self):
         """Test correlation calculation"""
         numeric_df = self.sample_data.select_dtypes(include=[np.number])
         corr = get_correlation_matrix(numeric_df)
         self.assertIn('Age', corr)
 
+    
+    def test_correlation_engine_incremental(self):
+        """Test appended rows give the same Pearson matrix as a full recompute"""
+        numeric_df = self.sample_data.select_dtypes(include=[np.number])
+        engine = CorrelationEngine(numeric_df.columns.tolist())
+        engine.update(numeric_df.to_numpy()[:2])
+        engine.update(numeric_df.to_numpy()[2:])
+        self.assertEqual(engine.pearson().dtype, np.float32)
+        np.testing.assert_allclose(engine.pearson(), numeric_df.corr().to_numpy(), atol=1e-6)
+    
+    def test_spearman_correlation(self):
+        """Test rank-based Spearman correlation"""
+        numeric_df = self.sample_data.select_dtypes(include=[np.number]).dropna()
+        features, matrix = compute_correlation(numeric_df, method='spearman')
+        np.testing.assert_allclose(matrix, numeric_df.corr(method='spearman').to_numpy(), atol=1e-6)
+        
+        # Missing values: each pair is ranked over the rows where both columns are present
+        rng = np.random.RandomState(0)
+        sparse_df = pd.DataFrame(rng.rand(500, 4), columns=list('abcd'))
+        sparse_df['b'] += sparse_df['a']
+        sparse_df.loc[rng.rand(500) < 0.3, 'a'] = np.nan
+        sparse_df.loc[rng.rand(500) < 0.2, 'b'] = np.nan
+        sparse_df.loc[:1, 'c'] = np.nan
+        features, matrix = compute_correlation(sparse_df, method='spearman')
+        np.testing.assert_allclose(matrix, sparse_df.corr(method='spearman').to_numpy(), atol=1e-6)
+
 
 class TestClustering(unittest.TestCase):
     """Test clustering functions"""
@@ -110,6 +187,55 @@ class TestClustering(unittest.TestCase):
         self.assertEqual(len(labels), len(self.sample_data))
         self.assertEqual(len(np.unique(labels)), 3)
     
+    def test_perform_clustering_mixed(self):
+        """Test K-Prototypes clustering on numeric features plus category codes"""
+        mixed = self.sample_data.copy()
+        mixed['Segment'] = np.arange(50) % 3
+        labels, model = perform_clustering(mixed, n_clusters=3, categorical_cols=['Segment'])
+        self.assertIsInstance(model, KPrototypes)
+        self.assertEqual(len(labels), 50)
+        self.assertEqual(model.cluster_centers_.shape, (3, 4))
+        np.testing.assert_array_equal(model.predict(mixed.to_numpy()), labels)
+    
+    def test_pca_reduction_variance_target(self):
+        """Test PCA keeps enough components for the variance target and centroids map back"""
+        reduced, reducer = fit_reduction(self.sample_data, method='pca', variance_target=0.9)
+        self.assertGreaterEqual(reducer.explained_variance_ratio_.sum(), 0.9)
+        self.assertEqual(list(reduced.columns[:1]), ['PC1'])
+        self.assertEqual(project_2d(reduced, reducer).shape, (50, 2))
+        
+        _, model = perform_clustering(reduced, n_clusters=3)
+        centroids = get_cluster_centroids(model, self.sample_data.columns.tolist(), reducer=reducer)
+        self.assertEqual(set(centroids[0]), set(self.sample_data.columns))
+    
+    def test_reduction_leaves_out_identifiers(self):
+        """Test the unscaled CustomerID codes do not take the first principal component"""
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import FunctionTransformer
+        from utils.reduction import reduction_features, select_features
+        data = self.sample_data.copy()
+        data.insert(0, 'CustomerID', np.arange(len(data)))
+        reduced, reducer = fit_reduction(data, method='pca', variance_target=0.9)
+        self.assertEqual(reducer.n_features_in_, data.shape[1] - 1)
+        self.assertLess(abs(np.corrcoef(reduced['PC1'], data['CustomerID'])[0, 1]), 0.9)
+        
+        # A model stored behind the selection scores the full processed frame
+        features = reduction_features(data)
+        self.assertNotIn('CustomerID', features)
+        _, model = perform_clustering(reduced, n_clusters=3)
+        pipeline = Pipeline([('select', FunctionTransformer(select_features, kw_args={'columns': features})),
+                             ('reduce', reducer), ('cluster', model)])
+        np.testing.assert_array_equal(pipeline.predict(data), model.labels_)
+        centroids = get_cluster_centroids(model, features, reducer=reducer)
+        self.assertEqual(set(centroids[0]), set(features))
+    
+    def test_random_projection_reduction(self):
+        """Test sparse random projection output dimension"""
+        wide = pd.DataFrame(np.random.rand(50, 40))
+        reduced, reducer = fit_reduction(wide, method='random', n_components=10)
+        self.assertEqual(reduced.shape, (50, 10))
+        self.assertEqual(project_2d(reduced, reducer).shape, (50, 2))
+    
     def test_calculate_cluster_metrics(self):
         """Test metric calculation"""
         labels, _ = perform_clustering(self.sample_data, n_clusters=3)
@@ -120,6 +246,25 @@ class TestClustering(unittest.TestCase):
         self.assertGreaterEqual(metrics['silhouette_score'], -1)
         self.assertLessEqual(metrics['silhouette_score'], 1)
     
+    def test_mixed_metrics_use_kprototypes_distance(self):
+        """Test codes-mode metrics score the K-Prototypes distance, not raw category codes"""
+        from sklearn.metrics import silhouette_score
+        rng = np.random.RandomState(0)
+        mixed = pd.DataFrame({'Age': rng.randn(120), 'Income': rng.randn(120),
+                              'Region': rng.randint(0, 4, 120), 'Segment': rng.randint(0, 3, 120)})
+        labels, model = perform_clustering(mixed, n_clusters=3, categorical_cols=['Region', 'Segment'])
+        numeric, codes = mixed[['Age', 'Income']].to_numpy(), mixed[['Region', 'Segment']].to_numpy()
+        distances = np.sqrt(((numeric[:, None] - numeric[None]) ** 2).sum(axis=2)
+                            + model.gamma_ * (codes[:, None] != codes[None]).sum(axis=2))
+        expected = silhouette_score(distances, labels, metric='precomputed')
+        
+        metrics = calculate_cluster_metrics(mixed, labels, categorical_cols=['Region', 'Segment'],
+                                            gamma=model.gamma_)
+        self.assertAlmostEqual(metrics['silhouette_score'], round(expected, 4))
+        self.assertGreater(metrics['davies_bouldin_score'], 0)
+        scores = find_optimal_clusters(mixed, max_k=3, categorical_cols=['Region', 'Segment'])
+        self.assertAlmostEqual(scores[3], expected)
+    
     def test_get_cluster_recommendations(self):
         """Test recommendation generation"""
         labels, _ = perform_clustering(self.sample_data, n_clusters=2)
@@ -158,6 +303,112 @@ class TestClustering(unittest.TestCase):
         self.assertEqual(len(profiles), 2)
         self.assertTrue(all('count' in p for p in profiles.values()))
         self.assertTrue(all('percentage' in p for p in profiles.values()))
+    
+    def test_background_sweep_job(self):
+        """Test a sweep job reports per-k progress and matches the synchronous sweep"""
+        manager = JobManager(max_workers=2, executor='thread')
+        try:
+            steps = {k: (silhouette_for_k, (self.sample_data, k), {}) for k in range(2, 6)}
+            job = manager.submit('optimal-clusters', steps)
+            self.assertTrue(job.wait(30))
+            status = job.to_dict()
+            self.assertEqual(status['state'], 'succeeded')
+            self.assertEqual(status['progress']['fraction'], 1.0)
+            self.assertEqual(set(status['timing']['step_seconds']), {'2', '3', '4', '5'})
+            self.assertEqual(job.result, find_optimal_clusters(self.sample_data, max_k=5))
+            self.assertFalse(job.cancel())
+        finally:
+            manager.shutdown()
+    
+    def test_process_job_stage_timings_reach_parent(self):
+        """Test stage timings of steps run in worker processes are recorded in this process"""
+        from utils.metrics import STAGE_SECONDS
+        manager = JobManager(max_workers=1, executor='process')
+        before = STAGE_SECONDS.count(stage='fit'), STAGE_SECONDS.count(stage='silhouette')
+        try:
+            steps = {k: (silhouette_for_k, (self.sample_data, k), {}) for k in range(2, 4)}
+            job = manager.submit('optimal-clusters', steps)
+            self.assertTrue(job.wait(60))
+            self.assertEqual(job.state, 'succeeded')
+        finally:
+            manager.shutdown()
+        self.assertEqual(STAGE_SECONDS.count(stage='fit'), before[0] + 2)
+        self.assertEqual(STAGE_SECONDS.count(stage='silhouette'), before[1] + 2)
+    
+    def test_single_flight_coalesces_identical_fits(self):
+        """Test concurrent calls with the same key share one clustering"""
+        import threading
+        flights = SingleFlight()
+        release = threading.Event()
+        calls = []
+        
+        def fit():
+            calls.append(1)
+            release.wait(10)
+            return perform_clustering(self.sample_data, n_clusters=3)
+        
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flights.do((1, 'cluster', 3), fit)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        while flights.stats()['coalesced'] < 3:
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(shared for _, shared in results), [False, True, True, True])
+        self.assertTrue(all(value is results[0][0] for value, _ in results))
+        self.assertEqual(flights.stats(), {'executed': 1, 'coalesced': 3, 'in_flight': 0})
+    
+    def test_single_flight_fans_out_progress(self):
+        """Test progress reaches late joiners, and publish reports when nobody is left"""
+        import threading
+        flights = SingleFlight()
+        joined, release = threading.Event(), threading.Event()
+        interest = []
+        
+        def compute():
+            flights.publish('sweep', 1)
+            joined.wait(10)
+            interest.append(flights.publish('sweep', 2))
+            release.wait(10)
+            interest.append(flights.publish('sweep', 3))
+            return 'scores'
+        
+        leader_events, follower_events = [], []
+        leader = threading.Thread(target=lambda: flights.do('sweep', compute, on_progress=leader_events.append))
+        leader.start()
+        while not leader_events:
+            threading.Event().wait(0.01)
+        
+        def follow(event):
+            follower_events.append(event)
+            return event < 2  # disconnects after the second event
+        
+        follower = threading.Thread(target=lambda: flights.do('sweep', compute, on_progress=follow))
+        follower.start()
+        while flights.stats()['coalesced'] < 1:
+            threading.Event().wait(0.01)
+        joined.set()
+        while len(interest) < 1:
+            threading.Event().wait(0.01)
+        release.set()
+        leader.join()
+        follower.join()
+        
+        self.assertEqual(leader_events, [1, 2, 3])
+        self.assertEqual(follower_events, [1, 2])
+        self.assertEqual(interest, [True, True])
+        
+        # With only a disconnected listener, the computation is told to stop
+        flights = SingleFlight()
+        stopped = []
+        value, shared = flights.do('sweep', lambda: stopped.append(not flights.publish('sweep', 1)) or 'x',
+                                   on_progress=lambda event: False)
+        self.assertEqual((value, shared, stopped), ('x', False, [True]))
 
 
 class TestIntegration(unittest.TestCase):
@@ -190,6 +441,124 @@ class TestIntegration(unittest.TestCase):
         self.assertIn('scaler', metadata)
         self.assertIn('encoders', metadata)
     
+    def test_process_rss_without_proc_or_resource(self):
+        """Test the RSS probe returns None instead of raising where neither /proc nor resource exists"""
+        import builtins
+        from unittest import mock
+        from utils.memory import process_rss_bytes
+        real_open = builtins.open
+        
+        def no_proc(path, *args, **kwargs):
+            if str(path).startswith('/proc/'):
+                raise FileNotFoundError(path)
+            return real_open(path, *args, **kwargs)
+        
+        with mock.patch('builtins.open', no_proc), mock.patch.dict(sys.modules, {'resource': None}), \
+                mock.patch.object(sys, 'platform', 'linux'):
+            self.assertIsNone(process_rss_bytes())
+        self.assertGreater(process_rss_bytes(), 0)
+    
+    def test_matrix_preprocessing_matches_copy_pipeline(self):
+        """Test the preallocated-matrix mode gives the same features and leaves the original untouched"""
+        df = pd.read_csv(self.test_csv)
+        df.loc[3, 'Age'] = np.nan
+        df['Segment'] = ['A', 'B', None, 'C'] * 25
+        df.to_csv(self.test_csv, index=False)
+        
+        expected, _, _ = preprocess_data(self.test_csv)
+        tracker = MemoryTracker()
+        processed, metadata, original = preprocess_data(self.test_csv, mode='matrix', tracker=tracker)
+        tracker.close()
+        
+        pd.testing.assert_frame_equal(processed, expected, check_dtype=False)
+        self.assertTrue(original['Age'].isnull().any())
+        self.assertEqual(set(tracker.stages), {'load', 'impute', 'encode', 'scale'})
+    
+    def test_parallel_preprocessing_matches_serial(self):
+        """Test column-parallel imputation and encoding give the serial output"""
+        df = pd.read_csv(self.test_csv)
+        df['Segment'] = ['A', 'B', None, 'C'] * 25
+        df['Region'] = ['North', None, 'South', 'South', 'East'] * 20
+        df.to_csv(self.test_csv, index=False)
+        
+        for mode in ('copy', 'matrix'):
+            expected, expected_meta, _ = preprocess_data(self.test_csv, mode=mode)
+            for executor in ('thread', 'process'):
+                processed, metadata, _ = preprocess_data(self.test_csv, mode=mode, workers=3, executor=executor)
+                pd.testing.assert_frame_equal(processed, expected)
+                self.assertEqual(list(metadata['encoders']['Region'].classes_),
+                                 list(expected_meta['encoders']['Region'].classes_))
+    
+    def test_ingest_csv_stream(self):
+        """Test streamed ingest parses, hashes, profiles and saves in the background"""
+        import hashlib
+        import io
+        with open(self.test_csv, 'rb') as f:
+            content = f.read()
+        save_path = self.test_csv + '.copy'
+        result = ingest_csv(io.BytesIO(content), chunk_rows=30, save_path=save_path)
+        result['writer'].close(keep=True, wait=True)
+        try:
+            pd.testing.assert_frame_equal(result['frame'], pd.read_csv(self.test_csv))
+            self.assertEqual(result['content_hash'], hashlib.sha256(content).hexdigest())
+            self.assertEqual(result['profile']['total_rows'], 100)
+            with open(save_path, 'rb') as f:
+                self.assertEqual(f.read(), content)
+        finally:
+            os.remove(save_path)
+        
+        with self.assertRaises(UploadTooLargeError):
+            ingest_csv(io.BytesIO(content), max_bytes=100)
+    
+    def test_background_writers_use_separate_temp_files(self):
+        """Test concurrent copies to one path never write the same temporary file"""
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'upload.csv')
+            writers = [BackgroundFileWriter(path) for _ in range(2)]
+            self.assertNotEqual(writers[0].partial_path, writers[1].partial_path)
+            for i, writer in enumerate(writers):
+                writer.write(f'copy {i}\n'.encode() * 1000)
+            writers[0].close(keep=False, wait=True)
+            writers[1].close(keep=True, wait=True)
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), b'copy 1\n' * 1000)
+            self.assertEqual(os.listdir(tmp), ['upload.csv'])
+    
+    def test_ingest_csv_dtype_drift(self):
+        """Test a numeric column turning non-numeric in a later chunk is ingested as a single read would be"""
+        import io
+        content = (b"CustomerID,Age,Income,Region\n1,25,100,N\n2,30,200,S\n3,35,300,N\n"
+                   b"4,unknown,400,S\n5,45,,N\n6,50,600,S\n")
+        result = ingest_csv(io.BytesIO(content), chunk_rows=3)
+        expected = pd.read_csv(io.BytesIO(content))
+        pd.testing.assert_frame_equal(result['frame'], expected)
+        profile, reference = result['profile'], profile_dataframe(expected)
+        for key in ('numeric_columns', 'categorical_columns', 'null_counts', 'numeric_statistics'):
+            self.assertEqual(profile[key], reference[key])
+        self.assertEqual(profile['cardinality']['Age'], 6)
+    
+    def test_ingest_gzip_stream(self):
+        """Test gzip uploads are decompressed while parsing and held to the decompressed budgets"""
+        import gzip
+        import hashlib
+        import io
+        with open(self.test_csv, 'rb') as f:
+            content = f.read()
+        compressed = gzip.compress(content)
+        result = ingest_csv(io.BytesIO(compressed), chunk_rows=30, compression='gzip')
+        pd.testing.assert_frame_equal(result['frame'], pd.read_csv(self.test_csv))
+        self.assertEqual(result['content_hash'], hashlib.sha256(content).hexdigest())
+        self.assertEqual(result['bytes'], len(compressed))
+        self.assertEqual(result['decompressed_bytes'], len(content))
+        
+        with self.assertRaises(UploadTooLargeError):
+            ingest_csv(io.BytesIO(compressed), compression='gzip', max_decompressed_bytes=len(content) - 1)
+        with self.assertRaises(UploadTooLargeError):
+            ingest_csv(io.BytesIO(compressed), chunk_rows=30, compression='gzip', max_rows=50)
+        with self.assertRaises(UnsupportedCompressionError):
+            ingest_csv(io.BytesIO(content), compression='gzip')
+    
     def test_full_clustering_pipeline(self):
         """Test complete clustering pipeline"""
         processed, metadata, original = preprocess_data(self.test_csv)
@@ -208,6 +577,311 @@ class TestIntegration(unittest.TestCase):
         
         self.assertGreater(len(recommendations), 0)
         self.assertGreater(metrics['silhouette_score'], -1)
+    
+    def test_workspace_store_spills_idle_workspaces(self):
+        """Test least recently used workspaces are spilled over budget and reloaded on checkout"""
+        import tempfile
+        with tempfile.TemporaryDirectory() as spill_dir:
+            store = WorkspaceStore(memory_budget_bytes=1, spill_dir=spill_dir)
+            for workspace_id in ('alice', 'bob'):
+                with store.checkout(workspace_id) as ws:
+                    ws.processed_data, ws.metadata, ws.original_data = preprocess_data(self.test_csv)
+            
+            report = store.report()
+            self.assertEqual(report['spilled_workspaces'], 1)
+            self.assertFalse(report['workspaces'][0]['resident'])
+            self.assertTrue(os.path.exists(os.path.join(spill_dir, 'alice.pkl')))
+            
+            with store.checkout('alice') as ws:
+                self.assertEqual(len(ws.original_data), 100)
+            self.assertEqual(store.restores, 1)
+            self.assertFalse(store.report()['workspaces'][0]['resident'])
+            
+            with self.assertRaises(ValueError):
+                with store.checkout('../escape'):
+                    pass
+    
+    def test_workspace_store_drops_idle_workspaces(self):
+        """Test idle workspaces are dropped past the TTL or the count limit, with their spill files"""
+        import tempfile
+        import time
+        with tempfile.TemporaryDirectory() as spill_dir:
+            dropped = []
+            store = WorkspaceStore(memory_budget_bytes=1, spill_dir=spill_dir, max_workspaces=2,
+                                   on_drop=lambda ws: dropped.append(ws.workspace_id))
+            with store.checkout('alice') as ws:
+                ws.processed_data, ws.metadata, ws.original_data = preprocess_data(self.test_csv)
+            with store.checkout('empty'):
+                pass
+            with store.checkout('bob') as ws:
+                ws.processed_data, ws.metadata, ws.original_data = preprocess_data(self.test_csv)
+            # Over the limit, the empty workspace goes before the least recently used one
+            self.assertEqual(dropped, ['empty'])
+            self.assertTrue(os.path.exists(os.path.join(spill_dir, 'alice.pkl')))
+            
+            # Unknown IDs on read-only checkouts are not stored
+            with store.checkout('reader', create=False) as ws:
+                self.assertIsNone(ws.original_data)
+            self.assertEqual([w['workspace_id'] for w in store.report()['workspaces']], ['alice', 'bob'])
+            
+            store.idle_ttl = 0
+            time.sleep(0.01)
+            self.assertEqual(store.reap(), 2)
+            self.assertEqual(store.report()['total_workspaces'], 0)
+            self.assertEqual(store.drops, 3)
+            self.assertEqual(os.listdir(spill_dir), [])
+    
+    def test_workspace_store_defers_state_restore(self):
+        """Test a saved state is loaded on the workspace's first checkout, and the file is kept"""
+        import tempfile
+        from utils.state import save_state
+        processed, metadata, original = preprocess_data(self.test_csv)
+        with tempfile.TemporaryDirectory() as state_dir:
+            path = save_state({'PROCESSED_DATA': processed, 'ORIGINAL_DATA': original, 'METADATA': metadata},
+                              os.path.join(state_dir, 'app_state.pkl'))
+            store = WorkspaceStore()
+            self.assertFalse(store.defer_restore('default', os.path.join(state_dir, 'missing.pkl')))
+            self.assertTrue(store.defer_restore('default', path))
+            self.assertTrue(store.report()['workspaces'][0]['restore_pending'])
+            
+            with store.checkout('default') as ws:
+                self.assertEqual(len(ws.original_data), 100)
+            self.assertFalse(store.report()['workspaces'][0]['restore_pending'])
+            self.assertTrue(os.path.exists(path))
+    
+    def test_workspace_store_restores_state_per_workspace(self):
+        """Test each workspace's saved state is restored into that workspace only, on its first checkout"""
+        import tempfile
+        from utils.state import save_state
+        processed, metadata, original = preprocess_data(self.test_csv)
+        with tempfile.TemporaryDirectory() as state_dir:
+            store = WorkspaceStore(state_dir=state_dir)
+            save_state({'PROCESSED_DATA': processed, 'ORIGINAL_DATA': original, 'METADATA': metadata},
+                       store.state_path('alice'))
+            self.assertEqual(store.saved_workspaces(), ['alice'])
+            
+            # A restarted process finds the state again under the same workspace ID
+            store = WorkspaceStore(state_dir=state_dir)
+            with store.checkout('bob') as ws:
+                self.assertIsNone(ws.original_data)
+            with store.checkout('alice') as ws:
+                self.assertEqual(len(ws.original_data), 100)
+            with self.assertRaises(ValueError):
+                store.state_path('../escape')
+    
+    def test_admission_pool_limits(self):
+        """Test a full pool queues up to its limit, then rejects with a reason"""
+        import threading
+        pool = AdmissionPool('heavy', max_concurrent=1, max_queue=1, queue_timeout=0.05, per_client=1)
+        with pool.admit('a'):
+            with self.assertRaises(AdmissionRejected) as ctx:
+                with pool.admit('a'):
+                    pass
+            self.assertEqual(ctx.exception.reason, 'client_limit')
+            with self.assertRaises(AdmissionRejected) as ctx:
+                with pool.admit('b'):
+                    pass
+            self.assertEqual(ctx.exception.reason, 'timeout')
+            self.assertGreaterEqual(ctx.exception.retry_after, 1)
+            
+            pool.queue_timeout = 10
+            admitted, release = threading.Event(), threading.Event()
+            
+            def wait_for_slot():
+                with pool.admit('c'):
+                    admitted.set()
+                    release.wait(10)
+            
+            waiter = threading.Thread(target=wait_for_slot)
+            waiter.start()
+            while pool.stats()['queue_depth'] < 1:
+                threading.Event().wait(0.01)
+            with self.assertRaises(AdmissionRejected) as ctx:
+                with pool.admit('d'):
+                    pass
+            self.assertEqual(ctx.exception.reason, 'queue_full')
+        self.assertTrue(admitted.wait(10))
+        stats = pool.stats()
+        self.assertEqual((stats['active'], stats['queue_depth'], stats['admitted']), (1, 0, 2))
+        release.set()
+        waiter.join()
+        self.assertEqual(stats['rejected'], {'client_limit': 1, 'timeout': 1, 'queue_full': 1})
+    
+    def test_metrics_registry_renders_prometheus_text(self):
+        """Test histogram buckets are cumulative and labels are rendered"""
+        registry = MetricsRegistry()
+        stages = registry.histogram('stage_seconds', 'Stage time', ['stage'], buckets=(0.1, 1.0))
+        errors = registry.counter('errors_total', 'Errors', ['status'])
+        registry.gauge_callback('memory_bytes', 'Memory', lambda: {(): 1024})
+        for value in (0.05, 0.5, 5.0):
+            stages.observe(value, stage='fit')
+        errors.inc(status='500')
+        with self.assertRaises(ValueError):
+            errors.inc(code='500')
+        
+        lines = registry.render().splitlines()
+        self.assertIn('# TYPE stage_seconds histogram', lines)
+        self.assertIn('stage_seconds_bucket{stage="fit",le="0.1"} 1', lines)
+        self.assertIn('stage_seconds_bucket{stage="fit",le="1.0"} 2', lines)
+        self.assertIn('stage_seconds_bucket{stage="fit",le="+Inf"} 3', lines)
+        self.assertIn('stage_seconds_sum{stage="fit"} 5.55', lines)
+        self.assertIn('stage_seconds_count{stage="fit"} 3', lines)
+        self.assertIn('errors_total{status="500"} 1', lines)
+        self.assertIn('memory_bytes 1024', lines)
+    
+    def test_logger_rotation_and_sampling(self):
+        """Test queued logging rotates by size and sampling drops chatty routes"""
+        import logging
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            log_file = os.path.join(tmp, 'app.log')
+            logger = setup_logger('test_rotation', log_level='DEBUG', log_file=log_file,
+                                  max_bytes=2000, backup_count=3, queued=True)
+            route = {'value': '/health'}
+            sampler = RouteSampler(parse_sample_rates('/health=0, /api/status=0.5, /bad'), lambda: route['value'])
+            logger.addFilter(sampler)
+            for i in range(10):
+                logger.info("health check %d", i)
+            logger.warning("health warning")
+            route['value'] = '/api/upload'
+            for i in range(100):
+                logger.debug("record %03d %s", i, 'x' * 40)
+            flush_logger(logger)
+            
+            rotated = [name for name in os.listdir(tmp) if name.startswith('app.log.')]
+            self.assertEqual(len(rotated), 3)
+            self.assertLessEqual(os.path.getsize(log_file), 2000)
+            with open(log_file) as f:
+                self.assertIn('record 099', f.read())
+            self.assertEqual(sampler.dropped, 10)
+            self.assertEqual(parse_sample_rates('/health=0, /api/status=0.5, /bad'),
+                             {'/health': 0.0, '/api/status': 0.5})
+            setup_logger('test_rotation', log_file=log_file, queued=False)
+            for handler in logging.getLogger('test_rotation').handlers:
+                handler.close()
+    
+    def test_model_registry_versions_and_gc(self):
+        """Test identical models share a version, aliases resolve and GC keeps aliased versions"""
+        import tempfile
+        import time
+        from sklearn.cluster import KMeans
+        X = np.random.RandomState(0).rand(60, 3)
+        models = [KMeans(n_clusters=k, n_init=1, random_state=0).fit(X) for k in (2, 3, 4)]
+        with tempfile.TemporaryDirectory() as root:
+            registry = ModelRegistry(root, max_versions=1)
+            first = registry.register(models[0], {'n_clusters': 2}, aliases=('latest', 'production'))
+            self.assertEqual(registry.register(models[0], {'n_clusters': 2}), first)
+            registry.flush()
+            second = registry.register(models[1], {'n_clusters': 3})
+            registry.flush()
+            time.sleep(0.01)
+            third = registry.register(models[2], {'n_clusters': 4})
+            registry.flush()
+            
+            self.assertEqual(registry.aliases(), {'latest': third, 'production': first})
+            stored = [meta['version'] for meta in registry.list()]
+            self.assertEqual(set(stored), {first, third})
+            self.assertNotIn(second, stored)
+            self.assertEqual(registry.get('production')['n_clusters'], 2)
+            reloaded = ModelRegistry(root).load_model('production')
+            np.testing.assert_array_equal(reloaded.cluster_centers_, models[0].cluster_centers_)
+            with self.assertRaises(KeyError):
+                registry.load_model('staging')
+            with self.assertRaises(ValueError):
+                registry.set_alias('../latest', first)
+    
+    def test_model_registry_in_use_and_failed_writes(self):
+        """Test GC keeps versions listed by in_use and a failed background write is logged"""
+        import logging
+        import tempfile
+        import time
+        from unittest import mock
+        from sklearn.cluster import KMeans
+        X = np.random.RandomState(0).rand(60, 3)
+        models = [KMeans(n_clusters=k, n_init=1, random_state=0).fit(X) for k in (2, 3)]
+        with tempfile.TemporaryDirectory() as root:
+            in_use = []
+            registry = ModelRegistry(root, max_versions=1, in_use=lambda: in_use)
+            first = registry.register(models[0], {'n_clusters': 2}, aliases=())
+            registry.flush()
+            in_use.append(first)
+            time.sleep(0.01)
+            second = registry.register(models[1], {'n_clusters': 3}, aliases=())
+            registry.flush()
+            self.assertEqual({meta['version'] for meta in registry.list()}, {first, second})
+            in_use.clear()
+            self.assertEqual(registry.collect_garbage(), [first])
+            
+            logger = mock.Mock(spec=logging.Logger)
+            registry = ModelRegistry(root, logger=logger)
+            with mock.patch.object(registry, '_write', side_effect=OSError('disk full')):
+                registry.register(models[0], {'n_clusters': 2})
+                # The single writer thread runs the failed write's callback before the next task
+                registry._writer.submit(lambda: None).result()
+            self.assertIn('disk full', logger.error.call_args[0][0])
+    
+    def test_scatter_downsampling(self):
+        """Test stratified sampling keeps small clusters and is deterministic; bins conserve counts"""
+        rng = np.random.RandomState(0)
+        labels = np.array([0] * 9000 + [1] * 950 + [2] * 50)
+        coords = rng.rand(len(labels), 2)
+        
+        rows = stratified_sample_indices(labels, 1000, min_per_cluster=100)
+        self.assertEqual(len(rows), 1000)
+        self.assertEqual(np.bincount(labels[rows]).tolist()[2], 50)
+        self.assertGreater(np.bincount(labels[rows])[0], np.bincount(labels[rows])[1])
+        np.testing.assert_array_equal(rows, stratified_sample_indices(labels, 1000, min_per_cluster=100))
+        self.assertTrue(set(rows) <= set(stratified_sample_indices(labels, 2000, min_per_cluster=100)))
+        
+        binned = density_bins(coords, labels, 300)
+        self.assertLessEqual(len(binned['counts']), 300)
+        self.assertEqual(binned['counts'].sum(), len(labels))
+        self.assertEqual(binned['counts'][binned['labels'] == 2].sum(), 50)
+        
+        self.assertEqual(downsample_scatter(coords, labels, 5000)['summary']['method'], 'stratified')
+        self.assertEqual(downsample_scatter(coords, labels, 500)['summary']['method'], 'binned')
+        self.assertEqual(downsample_scatter(coords, labels, 0)['summary']['markers'], len(labels))
+    
+    def test_fit_projection_2d(self):
+        """Test the scatter projection skips CustomerID and matches PCA up to axis sign"""
+        from sklearn.decomposition import PCA
+        rng = np.random.RandomState(0)
+        X = pd.DataFrame(rng.rand(500, 4) * [1, 3, 2, 1], columns=['Age', 'Income', 'Score', 'Tenure'])
+        X.insert(0, 'CustomerID', np.arange(500) * 1000.0)
+        
+        coords, summary = fit_projection_2d(X)
+        expected = PCA(n_components=2).fit(X.drop(columns='CustomerID'))
+        self.assertEqual(summary['method'], 'pca')
+        self.assertEqual(summary['features'], ['Age', 'Income', 'Score', 'Tenure'])
+        np.testing.assert_allclose(summary['explained_variance'], expected.explained_variance_ratio_, atol=1e-4)
+        np.testing.assert_allclose(np.abs(coords), np.abs(expected.transform(X.drop(columns='CustomerID'))), atol=1e-8)
+        np.testing.assert_array_equal(coords, fit_projection_2d(X)[0])
+        
+        one_hot = pd.DataFrame({f'c{i}': pd.arrays.SparseArray((np.arange(500) % 5 == i).astype(float), fill_value=0.0)
+                                for i in range(5)})
+        coords, summary = fit_projection_2d(one_hot)
+        self.assertEqual(summary['method'], 'truncated_svd')
+        self.assertEqual(coords.shape, (500, 2))
+    
+    def test_fast_json_dumps(self):
+        """Test numpy values are encoded and RawJSON is embedded verbatim"""
+        import json
+        payload = {
+            'labels': np.array([0, 1, 1]),
+            'score': np.float32(0.5),
+            'chart': RawJSON('{"data":[{"x":[1,2]}]}'),
+            'text': '\x00raw:0000000000000000:0\x00'
+        }
+        decoded = json.loads(dumps(payload))
+        self.assertEqual(decoded['labels'], [0, 1, 1])
+        self.assertEqual(decoded['score'], 0.5)
+        self.assertEqual(decoded['chart'], {'data': [{'x': [1, 2]}]})
+        self.assertEqual(decoded['text'], payload['text'])
+        
+        self.assertEqual(negotiate_encoding('gzip, deflate, br', ['br', 'gzip']), 'br')
+        self.assertEqual(negotiate_encoding('gzip;q=1.0, br;q=0.5', ['br', 'gzip']), 'gzip')
+        self.assertIsNone(negotiate_encoding('gzip;q=0, identity', ['gzip']))
+        self.assertIsNone(negotiate_encoding('', ['br', 'gzip']))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,132 @@
+"""
+ADMISSION Module
+Enhanced utility module for customer segmentation analytics
+Last updated: 2026-10-19
+"""
+"""
+Admission control: bounded concurrency pools with a bounded wait queue
+"""
+
+import math
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Hashable, Iterator, Optional
+
+
+class AdmissionRejected(Exception):
+    """Raised when a pool turns a request away instead of queueing it."""
+
+    def __init__(self, message: str, reason: str, retry_after: int):
+        super().__init__(message)
+        self.reason = reason  # 'queue_full', 'timeout' or 'client_limit'
+        self.retry_after = retry_after
+
+
+class AdmissionPool:
+    """
+    At most max_concurrent holders at a time, with at most max_queue waiting.
+
+    Requests beyond the queue, or that wait longer than queue_timeout, are
+    rejected with a Retry-After estimate instead of piling up threads. An
+    optional per-client limit stops one client from taking the whole pool.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float = 30.0,
+                 per_client: Optional[int] = None):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.per_client = per_client
+        self._cond = threading.Condition()
+        self._active = 0
+        self._queued = 0
+        self._clients = Counter()
+        self.admitted = 0
+        self.rejected = Counter()
+        self.max_queue_depth = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.service_seconds_total = 0.0
+        self.completed = 0
+
+    def _retry_after(self) -> int:
+        """Seconds until a slot is likely free, from the mean time a holder keeps one."""
+        mean_service = self.service_seconds_total / self.completed if self.completed else 1.0
+        return max(1, math.ceil(mean_service * (self._queued + 1) / self.max_concurrent))
+
+    def _release_client(self, client: Hashable) -> None:
+        self._clients[client] -= 1
+        if not self._clients[client]:
+            del self._clients[client]
+
+    def _reject(self, reason: str, message: str) -> AdmissionRejected:
+        self.rejected[reason] += 1
+        return AdmissionRejected(message, reason, self._retry_after())
+
+    @contextmanager
+    def admit(self, client: Hashable = None) -> Iterator[float]:
+        """
+        Hold a slot for the duration of the block.
+
+        Args:
+            client: Key the per-client limit is counted against
+
+        Yields:
+            Seconds spent waiting in the queue
+
+        Raises:
+            AdmissionRejected: Queue full, queue timeout or per-client limit
+        """
+        start = time.perf_counter()
+        with self._cond:
+            # Queued requests count against the client too, so one client cannot fill the queue
+            if self.per_client and client is not None and self._clients[client] >= self.per_client:
+                raise self._reject('client_limit', f"{self.name}: at most {self.per_client} concurrent requests per client")
+            self._clients[client] += 1
+            try:
+                if self._active >= self.max_concurrent:
+                    if self._queued >= self.max_queue:
+                        raise self._reject('queue_full', f"{self.name}: {self._queued} requests already queued")
+                    self._queued += 1
+                    self.max_queue_depth = max(self.max_queue_depth, self._queued)
+                    try:
+                        if not self._cond.wait_for(lambda: self._active < self.max_concurrent, self.queue_timeout):
+                            raise self._reject('timeout', f"{self.name}: no slot within {self.queue_timeout:g}s")
+                    finally:
+                        self._queued -= 1
+            except AdmissionRejected:
+                self._release_client(client)
+                raise
+            self._active += 1
+            waited = time.perf_counter() - start
+            self.admitted += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        held = time.perf_counter()
+        try:
+            yield waited
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._release_client(client)
+                self.completed += 1
+                self.service_seconds_total += time.perf_counter() - held
+                self._cond.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'active': self._active,
+                'queue_depth': self._queued,
+                'max_queue_depth': self.max_queue_depth,
+                'admitted': self.admitted,
+                'rejected': dict(self.rejected),
+                'wait_seconds_total': round(self.wait_seconds_total, 6),
+                'wait_seconds_max': round(self.wait_seconds_max, 6),
+                'wait_seconds_mean': round(self.wait_seconds_total / self.admitted, 6) if self.admitted else 0.0
+            }
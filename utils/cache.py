@@ -0,0 +1,182 @@
+"""
+CACHE Module
+Enhanced utility module for customer segmentation analytics
+Last updated: 2026-10-19
+"""
+"""
+Small in-process caches keyed by dataset version
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache with a bounded number of entries.
+
+    Keys normally include the dataset version, so entries for an older upload
+    simply age out instead of needing explicit invalidation.
+    """
+
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing and storing it on a miss."""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._data), 'hits': self.hits, 'misses': self.misses}
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException = None
+        # Progress fan-out: events so far, callers' callbacks, callers without one
+        self.lock = threading.Lock()
+        self.events: List[Any] = []
+        self.listeners: List[Callable[[Any], Any]] = []
+        self.waiting = 0
+
+    def join(self, on_progress: Optional[Callable[[Any], Any]]) -> None:
+        with self.lock:
+            if on_progress is None:
+                self.waiting += 1
+                return
+            self.listeners.append(on_progress)
+            for event in self.events:
+                self._deliver(on_progress, event)
+
+    def _deliver(self, listener: Callable[[Any], Any], event: Any) -> None:
+        try:
+            keep = listener(event) is not False
+        except Exception:
+            keep = False
+        if not keep and listener in self.listeners:
+            self.listeners.remove(listener)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one computation.
+
+    The first caller for a key runs the computation; callers arriving while it
+    is in flight wait and receive the same value (or exception). Nothing is
+    kept once the flight lands, so this complements LRUCache rather than
+    replacing it.
+
+    A computation can report progress with publish(key, event). Each event
+    goes to the on_progress callback of every caller in the flight, and a
+    caller joining late first gets the events it missed. A callback returning
+    False stops receiving events; publish() returns False once no caller is
+    listening or waiting, so the computation can stop early.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, compute: Callable[[], Any],
+           on_progress: Optional[Callable[[Any], Any]] = None) -> Tuple[Any, bool]:
+        """
+        Run compute() for key, or join the call already in flight.
+
+        Args:
+            key: Identity of the computation
+            compute: Called without arguments by the first caller
+            on_progress: Called with each event published for key; without
+                it the caller counts as waiting until the flight lands
+
+        Returns:
+            Tuple of (value, shared); shared is True for callers that joined
+            another caller's computation
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+            flight.join(on_progress)
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, True
+        try:
+            flight.value = compute()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.value, False
+
+    def publish(self, key: Hashable, event: Any) -> bool:
+        """
+        Send a progress event to every caller of the flight for key.
+
+        Returns:
+            False once no caller is listening or waiting for the result
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+        if flight is None:
+            return True
+        with flight.lock:
+            flight.events.append(event)
+            for listener in list(flight.listeners):
+                flight._deliver(listener, event)
+            return flight.waiting > 0 or bool(flight.listeners)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'executed': self.executed, 'coalesced': self.coalesced, 'in_flight': len(self._flights)}
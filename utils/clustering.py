@@ -9,13 +9,21 @@ Clustering utilities for customer segmentation
 
 import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.metrics import silhouette_score, davies_bouldin_score
+import time
 import joblib
-from typing import Tuple, Dict, Any, List
+from typing import Tuple, Dict, Any, List, Callable, TYPE_CHECKING
 
+from utils.preprocessing import get_sparse_feature_matrix
+from utils.metrics import time_stage
 
-def find_optimal_clusters(df: pd.DataFrame, max_k: int = 10, random_state: int = 42) -> Dict[int, float]:
+# scikit-learn is imported where it is used, keeping it off the app's import path
+if TYPE_CHECKING:
+    from sklearn.cluster import KMeans
+
+
+def find_optimal_clusters(df: pd.DataFrame, max_k: int = 10, random_state: int = 42,
+                          categorical_cols: List[str] = None,
+                          progress_callback: Callable[[Dict[str, Any]], Any] = None) -> Dict[int, float]:
     """
     Find optimal number of clusters using Elbow Method and Silhouette Score.
     
@@ -23,54 +31,342 @@ def find_optimal_clusters(df: pd.DataFrame, max_k: int = 10, random_state: int =
         df: Input DataFrame (should be normalized)
         max_k: Maximum number of clusters to test
         random_state: Random state for reproducibility
+        categorical_cols: Columns holding categorical codes; switches the sweep
+            to K-Prototypes (see perform_clustering)
+        progress_callback: Called after each k with a dict of k,
+            silhouette_score, inertia, step_seconds, elapsed_seconds, completed
+            and total. Returning False skips the remaining values of k.
         
     Returns:
-        Dictionary mapping cluster counts to silhouette scores
+        Dictionary mapping cluster counts to silhouette scores (only the
+        completed ones if the sweep was stopped early)
     """
     silhouette_scores = {}
+    X = _scoring_matrix(df, categorical_cols)
+    candidates = range(2, max_k + 1)
+    start = time.perf_counter()
     
-    for k in range(2, max_k + 1):
-        kmeans = KMeans(n_clusters=k, random_state=random_state, n_init=10)
-        labels = kmeans.fit_predict(df)
-        
-        # Calculate silhouette score
-        score = silhouette_score(df, labels)
+    for k in candidates:
+        step_start = time.perf_counter()
+        score, model = _evaluate_k(df, k, random_state, categorical_cols, X)
         silhouette_scores[k] = score
+        if progress_callback is not None:
+            now = time.perf_counter()
+            keep_going = progress_callback({
+                'k': k,
+                'silhouette_score': score,
+                'inertia': float(model.inertia_),
+                'step_seconds': now - step_start,
+                'elapsed_seconds': now - start,
+                'completed': len(silhouette_scores),
+                'total': len(candidates)
+            })
+            if keep_going is False:
+                break
     
     return silhouette_scores
 
 
-def perform_clustering(df: pd.DataFrame, n_clusters: int = 3, random_state: int = 42) -> Tuple[np.ndarray, KMeans]:
+def _evaluate_k(df: pd.DataFrame, n_clusters: int, random_state: int, categorical_cols: List[str],
+                X: Any) -> Tuple[float, Any]:
+    from sklearn.metrics import silhouette_score
+    
+    labels, model = perform_clustering(df, n_clusters=n_clusters, random_state=random_state,
+                                       categorical_cols=categorical_cols)
+    if X is None:
+        X = _scoring_matrix(df, categorical_cols, getattr(model, 'gamma_', None))
+    with time_stage('silhouette'):
+        return float(silhouette_score(X, labels)), model
+
+
+def silhouette_for_k(df: pd.DataFrame, n_clusters: int, random_state: int = 42,
+                     categorical_cols: List[str] = None, X: Any = None) -> float:
+    """
+    Fit one candidate cluster count and return its silhouette score.
+    
+    This is a single step of find_optimal_clusters; steps are independent, so
+    a sweep can run them in any order or in parallel.
+    
+    Args:
+        df: Input DataFrame (should be normalized)
+        n_clusters: Candidate number of clusters
+        random_state: Random state for reproducibility
+        categorical_cols: Columns holding categorical codes (K-Prototypes path)
+        X: Precomputed scoring matrix of df (see _scoring_matrix), if already available
+        
+    Returns:
+        Silhouette score of the fitted labels
+    """
+    return _evaluate_k(df, n_clusters, random_state, categorical_cols, X)[0]
+
+
+def _numeric_columns(df: pd.DataFrame) -> List[str]:
+    """Numeric columns of df, excluding any existing 'Cluster' column."""
+    return [col for col in df.select_dtypes(include=[np.number]).columns if col != 'Cluster']
+
+
+def _feature_matrix(df: pd.DataFrame) -> Any:
+    """Return df as-is, or as a CSR matrix when it carries sparse one-hot columns."""
+    if any(isinstance(dtype, pd.SparseDtype) for dtype in df.dtypes):
+        return get_sparse_feature_matrix(df)
+    return df
+
+
+def _huang_gamma(X_num: np.ndarray) -> float:
+    """Huang's default weight of a categorical mismatch: half the average numeric standard deviation."""
+    return 0.5 * float(X_num.std(axis=0).mean()) if X_num.shape[1] else 1.0
+
+
+def _mixed_embedding(df: pd.DataFrame, categorical_cols: List[str],
+                     gamma: float = None) -> Tuple[Any, List[Tuple[int, int]]]:
+    """
+    Embed a frame of numeric columns and category codes so that Euclidean
+    distance is the K-Prototypes distance.
+    
+    Each categorical column becomes one-hot columns scaled by sqrt(gamma / 2),
+    so a mismatch adds gamma to the squared distance, on top of the squared
+    Euclidean distance of the numeric columns: the square root of
+    KPrototypes' dissimilarity. Without categorical columns it is the plain
+    Euclidean distance the K-Means path is scored on.
+    
+    Returns:
+        Tuple of (CSR matrix, column span of each categorical column's one-hot block)
+    """
+    from scipy import sparse
+    
+    X_num = df.drop(columns=categorical_cols).to_numpy(dtype=np.float64)
+    if gamma is None:
+        gamma = _huang_gamma(X_num)
+    n = len(df)
+    blocks, spans = [sparse.csr_matrix(X_num)], []
+    start = X_num.shape[1]
+    for col in categorical_cols:
+        codes = df[col].to_numpy(dtype=np.int64)
+        width = int(codes.max()) + 1 if n else 1
+        blocks.append(sparse.csr_matrix((np.full(n, np.sqrt(gamma / 2)), (np.arange(n), codes)), shape=(n, width)))
+        spans.append((start, start + width))
+        start += width
+    return sparse.hstack(blocks, format='csr'), spans
+
+
+def _scoring_matrix(df: pd.DataFrame, categorical_cols: List[str] = None, gamma: float = None) -> Any:
+    """Matrix whose Euclidean distance is the model's: the K-Prototypes embedding for category codes."""
+    if categorical_cols:
+        return _mixed_embedding(df, categorical_cols, gamma)[0]
+    return _feature_matrix(df)
+
+
+class KPrototypes:
+    """
+    K-Prototypes clustering for mixed numeric and categorical data (Huang, 1998).
+    
+    Numeric columns are compared with squared Euclidean distance and categorical
+    integer codes with a simple mismatch count weighted by gamma. Distances are
+    computed for all rows at once, one cluster at a time, so memory stays at
+    O(n * k) regardless of how many levels a categorical column has. Iteration
+    stops once the cost improves by less than tol (relative), which also ends
+    label oscillations caused by tied categorical modes.
+    
+    Mirrors the KMeans attributes used elsewhere in the app: labels_,
+    cluster_centers_ (numeric means and categorical modes in input column
+    order), inertia_ and n_iter_.
+    """
+    
+    def __init__(self, n_clusters: int = 3, categorical_idx: List[int] = None, gamma: float = None,
+                 n_init: int = 10, max_iter: int = 100, tol: float = 1e-4, random_state: int = 42):
+        self.n_clusters = n_clusters
+        self.categorical_idx = list(categorical_idx or [])
+        self.gamma = gamma
+        self.n_init = n_init
+        self.max_iter = max_iter
+        self.tol = tol
+        self.random_state = random_state
+    
+    def _split(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        cat_mask = np.zeros(X.shape[1], dtype=bool)
+        cat_mask[self.categorical_idx] = True
+        return X[:, ~cat_mask].astype(np.float64), X[:, cat_mask].astype(np.int64)
+    
+    def _distances(self, X_num: np.ndarray, X_cat: np.ndarray, x_sq: np.ndarray, centers_num: np.ndarray,
+                   centers_cat: np.ndarray, gamma: float) -> np.ndarray:
+        """Mixed distance of every row to every prototype, shaped (n_prototypes, n_rows)."""
+        # ||x - c||^2 = ||x||^2 - 2 c.x + ||c||^2, evaluated as one matrix product
+        dist = centers_num @ X_num.T
+        dist *= -2
+        dist += x_sq[None, :]
+        dist += (centers_num ** 2).sum(axis=1)[:, None]
+        np.maximum(dist, 0, out=dist)
+        for j in range(centers_cat.shape[0]):
+            dist[j] += gamma * (X_cat != centers_cat[j]).sum(axis=1)
+        return dist
+    
+    def _init_centers(self, X_num: np.ndarray, X_cat: np.ndarray, x_sq: np.ndarray, gamma: float,
+                      rng: np.random.RandomState) -> Tuple[np.ndarray, np.ndarray]:
+        # k-means++ seeding on the mixed distance
+        n = X_num.shape[0]
+        chosen = [rng.randint(n)]
+        closest = self._distances(X_num, X_cat, x_sq, X_num[chosen], X_cat[chosen], gamma)[0]
+        for _ in range(1, self.n_clusters):
+            total = closest.sum()
+            idx = rng.choice(n, p=closest / total) if total > 0 else rng.randint(n)
+            chosen.append(idx)
+            new_dist = self._distances(X_num, X_cat, x_sq, X_num[[idx]], X_cat[[idx]], gamma)[0]
+            np.minimum(closest, new_dist, out=closest)
+        return X_num[chosen].copy(), X_cat[chosen].copy()
+    
+    def _update_centers(self, X_num: np.ndarray, X_cat: np.ndarray, labels: np.ndarray,
+                        n_levels: np.ndarray, centers_num: np.ndarray, centers_cat: np.ndarray) -> None:
+        k = self.n_clusters
+        counts = np.bincount(labels, minlength=k)
+        nonempty = counts > 0
+        for col in range(X_num.shape[1]):
+            sums = np.bincount(labels, weights=X_num[:, col], minlength=k)
+            centers_num[nonempty, col] = sums[nonempty] / counts[nonempty]
+        for col in range(X_cat.shape[1]):
+            # Per-cluster level frequencies from one bincount over (label, code) pairs
+            freq = np.bincount(labels * n_levels[col] + X_cat[:, col],
+                               minlength=k * n_levels[col]).reshape(k, n_levels[col])
+            centers_cat[nonempty, col] = freq[nonempty].argmax(axis=1)
+    
+    def _run(self, X_num: np.ndarray, X_cat: np.ndarray, x_sq: np.ndarray, n_levels: np.ndarray,
+             gamma: float, rng: np.random.RandomState) -> Tuple[np.ndarray, np.ndarray, np.ndarray, float, int]:
+        centers_num, centers_cat = self._init_centers(X_num, X_cat, x_sq, gamma, rng)
+        rows = np.arange(X_num.shape[0])
+        labels = None
+        cost = np.inf
+        for n_iter in range(1, self.max_iter + 1):
+            dist = self._distances(X_num, X_cat, x_sq, centers_num, centers_cat, gamma)
+            new_labels = dist.argmin(axis=0)
+            
+            # Re-seed empty clusters with the points farthest from their prototype
+            empty = np.flatnonzero(np.bincount(new_labels, minlength=self.n_clusters) == 0)
+            if len(empty) > 0:
+                farthest = np.argsort(dist[new_labels, rows])[::-1]
+                new_labels[farthest[:len(empty)]] = empty
+            
+            new_cost = float(dist[new_labels, rows].sum())
+            converged = labels is not None and (
+                np.array_equal(labels, new_labels) or cost - new_cost <= self.tol * cost
+            )
+            labels, cost = new_labels, new_cost
+            if converged:
+                break
+            self._update_centers(X_num, X_cat, labels, n_levels, centers_num, centers_cat)
+        
+        dist = self._distances(X_num, X_cat, x_sq, centers_num, centers_cat, gamma)
+        inertia = float(dist[labels, rows].sum())
+        return labels, centers_num, centers_cat, inertia, n_iter
+    
+    def fit(self, X: Any) -> 'KPrototypes':
+        X = np.asarray(X)
+        X_num, X_cat = self._split(X)
+        if X_cat.size and X_cat.min() < 0:
+            raise ValueError("Categorical codes must be non-negative integers")
+        
+        gamma = self.gamma if self.gamma is not None else _huang_gamma(X_num)
+        n_levels = X_cat.max(axis=0) + 1 if X_cat.size else np.zeros(0, dtype=np.int64)
+        
+        x_sq = (X_num ** 2).sum(axis=1)
+        rng = np.random.RandomState(self.random_state)
+        best = None
+        for _ in range(self.n_init):
+            result = self._run(X_num, X_cat, x_sq, n_levels, gamma, rng)
+            if best is None or result[3] < best[3]:
+                best = result
+        
+        labels, centers_num, centers_cat, inertia, n_iter = best
+        cat_mask = np.zeros(X.shape[1], dtype=bool)
+        cat_mask[self.categorical_idx] = True
+        centers = np.empty((self.n_clusters, X.shape[1]), dtype=np.float64)
+        centers[:, ~cat_mask] = centers_num
+        centers[:, cat_mask] = centers_cat
+        
+        self.gamma_ = gamma
+        self.labels_ = labels
+        self.cluster_centers_ = centers
+        self.inertia_ = inertia
+        self.n_iter_ = n_iter
+        return self
+    
+    def predict(self, X: Any) -> np.ndarray:
+        X_num, X_cat = self._split(np.asarray(X))
+        centers_num, centers_cat = self._split(self.cluster_centers_)
+        x_sq = (X_num ** 2).sum(axis=1)
+        return self._distances(X_num, X_cat, x_sq, centers_num, centers_cat, self.gamma_).argmin(axis=0)
+    
+    def fit_predict(self, X: Any) -> np.ndarray:
+        return self.fit(X).labels_
+
+
+def perform_clustering(df: pd.DataFrame, n_clusters: int = 3, random_state: int = 42,
+                       categorical_cols: List[str] = None, gamma: float = None) -> Tuple[np.ndarray, Any]:
     """
     Perform K-Means clustering on the data.
     
+    When categorical_cols is given the data is treated as mixed-type: numeric
+    columns stay dense and the listed columns must hold integer category codes
+    (see encode_categorical_features(method='codes')). Clustering then uses
+    K-Prototypes instead of K-Means. Frames with sparse one-hot columns are fed
+    to K-Means as a CSR matrix.
+    
     Args:
         df: Input DataFrame (should be normalized)
         n_clusters: Number of clusters
         random_state: Random state for reproducibility
+        categorical_cols: Columns holding categorical codes (mixed-type path)
+        gamma: Weight of categorical mismatches; defaults to Huang's heuristic
         
     Returns:
-        Tuple of (cluster labels, KMeans model)
+        Tuple of (cluster labels, fitted KMeans or KPrototypes model)
     """
+    if categorical_cols:
+        categorical_idx = [df.columns.get_loc(col) for col in categorical_cols]
+        model = KPrototypes(n_clusters=n_clusters, categorical_idx=categorical_idx, gamma=gamma,
+                            n_init=10, random_state=random_state)
+        with time_stage('fit'):
+            labels = model.fit_predict(df.to_numpy())
+        return labels, model
+    
+    from sklearn.cluster import KMeans
+    
     kmeans = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=10)
-    labels = kmeans.fit_predict(df)
+    with time_stage('fit'):
+        labels = kmeans.fit_predict(_feature_matrix(df))
     
     return labels, kmeans
 
 
-def calculate_cluster_metrics(df: pd.DataFrame, labels: np.ndarray) -> Dict[str, float]:
+def calculate_cluster_metrics(df: pd.DataFrame, labels: np.ndarray, categorical_cols: List[str] = None,
+                              gamma: float = None) -> Dict[str, float]:
     """
     Calculate clustering quality metrics.
     
+    With categorical_cols (K-Prototypes on category codes), both metrics use
+    the K-Prototypes distance rather than Euclidean distance on the raw codes,
+    and Davies-Bouldin measures against cluster prototypes (numeric means and
+    categorical modes).
+    
     Args:
         df: Input DataFrame
         labels: Cluster labels
+        categorical_cols: Columns holding categorical codes (mixed-type path)
+        gamma: Weight of categorical mismatches; the fitted model's gamma_,
+            Huang's heuristic by default
         
     Returns:
         Dictionary containing clustering metrics
     """
-    silhouette = silhouette_score(df, labels)
-    davies_bouldin = davies_bouldin_score(df, labels)
+    from sklearn.metrics import silhouette_score, davies_bouldin_score
+    
+    # Sparse one-hot frames and the mixed-type embedding are scored as CSR
+    # matrices, which the metrics take without densifying
+    if categorical_cols:
+        X, spans = _mixed_embedding(df, categorical_cols, gamma)
+    else:
+        X, spans = _feature_matrix(df), []
+    with time_stage('silhouette'):
+        silhouette = silhouette_score(X, labels)
+    davies_bouldin = _davies_bouldin_sparse(X, labels, spans) if X is not df else davies_bouldin_score(df, labels)
     
     return {
         'silhouette_score': round(silhouette, 4),
@@ -78,6 +374,43 @@ def calculate_cluster_metrics(df: pd.DataFrame, labels: np.ndarray) -> Dict[str,
     }
 
 
+def _davies_bouldin_sparse(X: Any, labels: np.ndarray, mode_spans: List[Tuple[int, int]] = ()) -> float:
+    """
+    Davies-Bouldin index of a CSR matrix, as sklearn computes it for dense input.
+    
+    sklearn's davies_bouldin_score does not accept sparse input. Centroids
+    are k dense rows, and distances to them are expanded as
+    ||x||^2 - 2 x.c + ||c||^2, so X itself is never densified. Within each
+    of mode_spans (one-hot blocks of _mixed_embedding) a centroid keeps only
+    its most frequent level, making it the cluster's K-Prototypes prototype.
+    """
+    from scipy import sparse
+    
+    labels = np.unique(np.asarray(labels), return_inverse=True)[1]
+    n, k = X.shape[0], labels.max() + 1
+    counts = np.bincount(labels, minlength=k)
+    membership = sparse.csr_matrix((np.ones(n), (labels, np.arange(n))), shape=(k, n))
+    centroids = np.asarray((membership @ X).todense()) / counts[:, None]
+    for start, stop in mode_spans:
+        # Level frequencies times the block's weight; all of it goes to the mode
+        block = centroids[:, start:stop]
+        weight, modes = block.sum(axis=1), block.argmax(axis=1)
+        block[:] = 0
+        block[np.arange(k), modes] = weight
+    
+    row_sq = np.asarray(X.multiply(X).sum(axis=1)).ravel()
+    to_own = np.asarray(X @ centroids.T)[np.arange(n), labels]
+    sq_dist = row_sq - 2 * to_own + (centroids ** 2).sum(axis=1)[labels]
+    intra = np.bincount(labels, weights=np.sqrt(np.maximum(sq_dist, 0)), minlength=k) / counts
+    
+    diff = centroids[:, None, :] - centroids[None, :, :]
+    centroid_distances = np.sqrt((diff ** 2).sum(axis=2))
+    if np.allclose(intra, 0) or np.allclose(centroid_distances, 0):
+        return 0.0
+    centroid_distances[centroid_distances == 0] = np.inf
+    return float(np.mean(np.max((intra[:, None] + intra[None, :]) / centroid_distances, axis=1)))
+
+
 def analyze_clusters(df: pd.DataFrame, original_df: pd.DataFrame, labels: np.ndarray) -> Dict[int, Dict[str, Any]]:
     """
     Analyze and profile each cluster.
@@ -90,28 +423,25 @@ def analyze_clusters(df: pd.DataFrame, original_df: pd.DataFrame, labels: np.nda
     Returns:
         Dictionary containing cluster analysis
     """
-    df_with_clusters = original_df.copy()
-    df_with_clusters['Cluster'] = labels
+    labels = np.asarray(labels)
+    numeric_cols = _numeric_columns(original_df)
     
     cluster_analysis = {}
     
     for cluster_id in sorted(np.unique(labels)):
-        cluster_data = df_with_clusters[df_with_clusters['Cluster'] == cluster_id]
-        
-        # Calculate numeric statistics
-        numeric_cols = cluster_data.select_dtypes(include=[np.number]).columns
-        numeric_cols = [col for col in numeric_cols if col != 'Cluster']
+        mask = labels == cluster_id
+        size = int(mask.sum())
         
         cluster_analysis[int(cluster_id)] = {
-            'size': len(cluster_data),
-            'percentage': round(len(cluster_data) / len(df_with_clusters) * 100, 2),
-            'statistics': cluster_data[numeric_cols].describe().to_dict() if len(numeric_cols) > 0 else {}
+            'size': size,
+            'percentage': round(size / len(original_df) * 100, 2),
+            'statistics': original_df.loc[mask, numeric_cols].describe().to_dict() if len(numeric_cols) > 0 else {}
         }
     
     return cluster_analysis
 
 
-def save_model(kmeans: KMeans, filepath: str) -> None:
+def save_model(kmeans: 'KMeans', filepath: str) -> None:
     """
     Save trained K-Means model to disk.
     
@@ -122,7 +452,7 @@ def save_model(kmeans: KMeans, filepath: str) -> None:
     joblib.dump(kmeans, filepath)
 
 
-def load_model(filepath: str) -> KMeans:
+def load_model(filepath: str) -> 'KMeans':
     """
     Load trained K-Means model from disk.
     
@@ -163,20 +493,26 @@ def get_cluster_recommendations(cluster_analysis: Dict[int, Dict[str, Any]]) ->
     return recommendations
 
 
-def get_cluster_centroids(kmeans: KMeans, feature_names: List[str]) -> Dict[int, Dict[str, float]]:
+def get_cluster_centroids(kmeans: 'KMeans', feature_names: List[str], reducer: Any = None) -> Dict[int, Dict[str, float]]:
     """
     Extract and format cluster centroids.
     
     Args:
         kmeans: Trained KMeans model
         feature_names: List of feature names
+        reducer: Reduction the model was trained behind (see utils.reduction);
+            its inverse transform maps centroids back to feature space
         
     Returns:
         Dictionary mapping cluster IDs to centroid values
     """
+    centers = kmeans.cluster_centers_
+    if reducer is not None:
+        centers = reducer.inverse_transform(centers)
+    
     centroids = {}
     
-    for cluster_id, centroid in enumerate(kmeans.cluster_centers_):
+    for cluster_id, centroid in enumerate(centers):
         centroids[int(cluster_id)] = {
             feature_names[i]: round(float(centroid[i]), 4) 
             for i in range(len(feature_names))
@@ -185,7 +521,7 @@ def get_cluster_centroids(kmeans: KMeans, feature_names: List[str]) -> Dict[int,
     return centroids
 
 
-def calculate_inertia(kmeans: KMeans) -> float:
+def calculate_inertia(kmeans: 'KMeans') -> float:
     """
     Get the inertia (sum of squared distances to nearest cluster center).
     
@@ -210,30 +546,30 @@ def get_cluster_profiles(df: pd.DataFrame, original_df: pd.DataFrame, labels: np
     Returns:
         Dictionary with detailed cluster profiles
     """
-    df_with_clusters = original_df.copy()
-    df_with_clusters['Cluster'] = labels
+    labels = np.asarray(labels)
+    numeric_cols = _numeric_columns(original_df)
     
     profiles = {}
     
     for cluster_id in sorted(np.unique(labels)):
-        cluster_data = df_with_clusters[df_with_clusters['Cluster'] == cluster_id]
-        numeric_cols = cluster_data.select_dtypes(include=[np.number]).columns
-        numeric_cols = [col for col in numeric_cols if col != 'Cluster']
+        mask = labels == cluster_id
+        count = int(mask.sum())
         
         if len(numeric_cols) > 0:
+            cluster_data = original_df.loc[mask, numeric_cols]
             profiles[int(cluster_id)] = {
-                'count': int(len(cluster_data)),
-                'percentage': round(len(cluster_data) / len(df_with_clusters) * 100, 2),
-                'mean_values': cluster_data[numeric_cols].mean().round(2).to_dict(),
-                'median_values': cluster_data[numeric_cols].median().round(2).to_dict(),
-                'std_values': cluster_data[numeric_cols].std().round(2).to_dict(),
-                'min_values': cluster_data[numeric_cols].min().round(2).to_dict(),
-                'max_values': cluster_data[numeric_cols].max().round(2).to_dict(),
+                'count': count,
+                'percentage': round(count / len(original_df) * 100, 2),
+                'mean_values': cluster_data.mean().round(2).to_dict(),
+                'median_values': cluster_data.median().round(2).to_dict(),
+                'std_values': cluster_data.std().round(2).to_dict(),
+                'min_values': cluster_data.min().round(2).to_dict(),
+                'max_values': cluster_data.max().round(2).to_dict(),
             }
         else:
             profiles[int(cluster_id)] = {
-                'count': int(len(cluster_data)),
-                'percentage': round(len(cluster_data) / len(df_with_clusters) * 100, 2),
+                'count': count,
+                'percentage': round(count / len(original_df) * 100, 2),
             }
     
     return profiles
@@ -0,0 +1,155 @@
+"""
+CORRELATION Module
+Enhanced utility module for customer segmentation analytics
+Last updated: 2026-10-19
+"""
+"""
+Correlation engine built on sufficient statistics of the numeric matrix
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Tuple, List, Any
+
+
+class CorrelationEngine:
+    """
+    Pairwise-complete Pearson correlation from additive sufficient statistics.
+
+    For every pair of columns the engine keeps the number of rows where both
+    are present, the per-pair sums and sums of squares, and the cross-product
+    matrix. All of them are plain sums, so appending rows only requires
+    update() on the new rows; the full data is never revisited. Values are
+    shifted by the first chunk's column means before accumulating to keep the
+    float64 sums well conditioned, and results are returned as float32.
+    """
+
+    def __init__(self, columns: List[str], chunk_size: int = 65536):
+        self.columns = list(columns)
+        self.chunk_size = chunk_size
+        d = len(self.columns)
+        self.n_rows = 0
+        self._shift = None
+        self._count = np.zeros((d, d))
+        self._sum = np.zeros((d, d))
+        self._sum_sq = np.zeros((d, d))
+        self._cross = np.zeros((d, d))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, chunk_size: int = 65536) -> 'CorrelationEngine':
+        """Create an engine over the numeric columns of df."""
+        numeric_df = df.select_dtypes(include=[np.number])
+        engine = cls(numeric_df.columns.tolist(), chunk_size=chunk_size)
+        engine.update(numeric_df.to_numpy())
+        return engine
+
+    def update(self, values: Any) -> None:
+        """
+        Fold appended rows into the statistics.
+
+        Args:
+            values: 2D array of new rows, columns in the engine's column order
+        """
+        values = np.asarray(values)
+        if values.ndim != 2 or values.shape[1] != len(self.columns):
+            raise ValueError(f"Expected rows with {len(self.columns)} columns")
+        for start in range(0, len(values), self.chunk_size):
+            self._update_chunk(values[start:start + self.chunk_size].astype(np.float64))
+
+    def _update_chunk(self, chunk: np.ndarray) -> None:
+        if len(chunk) == 0:
+            return
+        present = ~np.isnan(chunk)
+        if self._shift is None:
+            with np.errstate(invalid='ignore'):
+                self._shift = np.nan_to_num(np.nanmean(chunk, axis=0)) if present.any() else np.zeros(chunk.shape[1])
+        centered = np.where(present, chunk - self._shift, 0.0)
+        mask = present.astype(np.float64)
+
+        # [i, j] entries are restricted to rows where both column i and j are present
+        self._count += mask.T @ mask
+        self._sum += centered.T @ mask
+        self._sum_sq += (centered ** 2).T @ mask
+        self._cross += centered.T @ centered
+        self.n_rows += len(chunk)
+
+    def pearson(self) -> np.ndarray:
+        """Return the Pearson correlation matrix as float32 (NaN where undefined)."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            n = self._count
+            sum_i = self._sum
+            sum_j = self._sum.T
+            cov = self._cross - sum_i * sum_j / n
+            var_i = self._sum_sq - sum_i ** 2 / n
+            var_j = self._sum_sq.T - sum_j ** 2 / n
+            corr = cov / np.sqrt(var_i * var_j)
+        corr = np.clip(corr, -1.0, 1.0)
+        diag = np.diag(var_i) > 0
+        corr[np.diag_indices_from(corr)] = np.where(diag, 1.0, np.nan)
+        return corr.astype(np.float32)
+
+
+def spearman_correlation(values: np.ndarray, columns: List[str]) -> np.ndarray:
+    """
+    Rank-based, pairwise-complete Spearman correlation.
+
+    Each column is ranked once (average ranks for ties, NaNs left missing) and
+    the ranks are fed through the Pearson engine. Ranks stay float64, so half
+    ranks survive beyond 2**24 rows. A pair involving a column with missing
+    values is re-ranked over the rows where both are present, as
+    DataFrame.corr('spearman') does. Ranks depend on every row, so unlike
+    Pearson this cannot be updated incrementally.
+
+    Args:
+        values: 2D numeric array
+        columns: Column names
+
+    Returns:
+        float32 correlation matrix
+    """
+    # scipy.stats is slow to import and only needed here
+    from scipy.stats import rankdata
+
+    present = ~np.isnan(values)
+    ranks = np.full(values.shape, np.nan)
+    for i in range(values.shape[1]):
+        ranks[present[:, i], i] = rankdata(values[present[:, i], i])
+    engine = CorrelationEngine(columns)
+    engine.update(ranks)
+    corr = engine.pearson()
+
+    for i in np.flatnonzero(~present.all(axis=0)):
+        for j in range(values.shape[1]):
+            if j == i or (j < i and not present[:, j].all()):
+                continue  # diagonal, or a pair already re-ranked from j's side
+            both = present[:, i] & present[:, j]
+            pair = CorrelationEngine([columns[i], columns[j]])
+            pair.update(np.column_stack([rankdata(values[both, i]), rankdata(values[both, j])]))
+            corr[i, j] = corr[j, i] = pair.pearson()[0, 1]
+    return corr
+
+
+def compute_correlation(df: pd.DataFrame, method: str = 'pearson') -> Tuple[List[str], np.ndarray]:
+    """
+    Compute the correlation matrix of the numeric columns of df.
+
+    Args:
+        df: Input DataFrame
+        method: 'pearson' or 'spearman'
+
+    Returns:
+        Tuple of (feature names, float32 correlation matrix)
+    """
+    numeric_df = df.select_dtypes(include=[np.number])
+    columns = numeric_df.columns.tolist()
+    if method == 'pearson':
+        return columns, CorrelationEngine.from_frame(numeric_df).pearson()
+    if method == 'spearman':
+        return columns, spearman_correlation(numeric_df.to_numpy(dtype=np.float64), columns)
+    raise ValueError(f"Unknown correlation method: {method}")
+
+
+def matrix_to_list(matrix: np.ndarray, decimals: int = 4) -> List[List[Any]]:
+    """Round a correlation matrix into a JSON-safe list of rows (NaN becomes None)."""
+    rounded = np.round(matrix.astype(np.float64), decimals)
+    return [[None if np.isnan(v) else v for v in row] for row in rounded.tolist()]
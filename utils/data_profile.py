@@ -0,0 +1,250 @@
+"""
+DATA PROFILE Module
+Enhanced utility module for customer segmentation analytics
+Last updated: 2026-10-19
+"""
+"""
+Single-pass data profiling for data quality metrics and feature statistics
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, Any, List
+
+from pandas.util import hash_pandas_object
+
+
+# Odd 64-bit multiplier used to fold per-column hashes into one row hash
+_ROW_HASH_MULTIPLIER = np.uint64(0x100000001B3)
+
+
+def _add_distinct(parts: List[np.ndarray], hashes: np.ndarray, max_parts: int = 8) -> None:
+    """Append a chunk's distinct hashes, merging the parts once too many pile up."""
+    parts.append(pd.unique(hashes))
+    if len(parts) > max_parts:
+        parts[:] = [pd.unique(np.concatenate(parts))]
+
+
+def _count_distinct(parts: List[np.ndarray]) -> int:
+    if not parts:
+        return 0
+    return int(len(pd.unique(np.concatenate(parts))))
+
+
+class DataProfiler:
+    """
+    Accumulate data quality and summary statistics chunk by chunk.
+
+    Every chunk is visited once: each column is hashed once and the hashes feed
+    both the per-column cardinality and the row hash used for duplicate
+    detection, while null counts, min, max and running mean/variance are
+    merged per chunk. Chunks can come from an in-memory frame or straight from
+    a chunked CSV reader.
+
+    No numeric values are retained: finalize() computes the exact quartiles
+    that DataFrame.describe() returns from the concatenated frame, one column
+    at a time.
+
+    Column types come from the first chunk. A numeric column that turns up
+    non-numeric in a later chunk is profiled as categorical from then on,
+    as it is in the concatenated frame, and listed in drifted_columns.
+    """
+
+    def __init__(self):
+        self.columns: List[str] = None
+        self.numeric_columns: List[str] = []
+        self.categorical_columns: List[str] = []
+        self.drifted_columns: List[str] = []
+        self.n_rows = 0
+        self.memory_bytes = 0
+        self.null_counts: Dict[str, int] = {}
+        self._row_hashes: List[np.ndarray] = []
+        self._value_hashes: Dict[str, List[np.ndarray]] = {}
+        self._count = None
+        self._mean = None
+        self._m2 = None
+        self._min = None
+        self._max = None
+
+    def _start(self, chunk: pd.DataFrame) -> None:
+        self.columns = chunk.columns.tolist()
+        self.numeric_columns = chunk.select_dtypes(include=[np.number]).columns.tolist()
+        self.categorical_columns = chunk.select_dtypes(include=['object']).columns.tolist()
+        self.null_counts = {col: 0 for col in self.columns}
+        self._value_hashes = {col: [] for col in self.columns}
+        n_numeric = len(self.numeric_columns)
+        self._count = np.zeros(n_numeric)
+        self._mean = np.zeros(n_numeric)
+        self._m2 = np.zeros(n_numeric)
+        self._min = np.full(n_numeric, np.nan)
+        self._max = np.full(n_numeric, np.nan)
+
+    def _check_dtypes(self, chunk: pd.DataFrame) -> None:
+        numeric = set(chunk.select_dtypes(include=[np.number]).columns)
+        drifted = [col for col in self.numeric_columns if col not in numeric]
+        if drifted:
+            keep = [i for i, col in enumerate(self.numeric_columns) if col not in drifted]
+            self.numeric_columns = [self.numeric_columns[i] for i in keep]
+            self._count, self._mean, self._m2 = self._count[keep], self._mean[keep], self._m2[keep]
+            self._min, self._max = self._min[keep], self._max[keep]
+            self.drifted_columns += drifted
+        objects = set(chunk.select_dtypes(include=['object']).columns)
+        if not objects.issubset(self.categorical_columns):
+            # Ordered as select_dtypes orders the concatenated frame
+            categorical = objects.union(self.categorical_columns)
+            self.categorical_columns = [col for col in self.columns if col in categorical]
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Fold one chunk of rows into the profile."""
+        if self.columns is None:
+            self._start(chunk)
+        else:
+            self._check_dtypes(chunk)
+        if len(chunk) == 0:
+            return
+
+        self.n_rows += len(chunk)
+        self.memory_bytes += int(chunk.memory_usage(deep=True, index=False).sum())
+
+        row_hash = np.zeros(len(chunk), dtype=np.uint64)
+        for col in self.columns:
+            series = chunk[col]
+            nulls = series.isna().to_numpy()
+            self.null_counts[col] += int(nulls.sum())
+
+            hashes = hash_pandas_object(series, index=False).to_numpy()
+            row_hash = (row_hash ^ hashes) * _ROW_HASH_MULTIPLIER
+            _add_distinct(self._value_hashes[col], hashes[~nulls])
+        _add_distinct(self._row_hashes, row_hash)
+
+        if self.numeric_columns:
+            self._merge_moments(chunk[self.numeric_columns].to_numpy(dtype=np.float64))
+
+    def _merge_moments(self, values: np.ndarray) -> None:
+        # Chan et al. parallel update of count, mean and sum of squared deviations
+        count_b = (~np.isnan(values)).sum(axis=0).astype(np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_b = np.where(count_b > 0, np.nansum(values, axis=0) / count_b, 0.0)
+            m2_b = np.nansum((values - mean_b) ** 2, axis=0)
+            total = self._count + count_b
+            delta = mean_b - self._mean
+            ratio = np.where(total > 0, count_b / total, 0.0)
+            self._mean = self._mean + delta * ratio
+            self._m2 = self._m2 + m2_b + delta ** 2 * self._count * ratio
+        self._count = total
+
+        has_values = count_b > 0
+        chunk_min = np.full(values.shape[1], np.nan)
+        chunk_max = np.full(values.shape[1], np.nan)
+        chunk_min[has_values] = np.nanmin(values[:, has_values], axis=0)
+        chunk_max[has_values] = np.nanmax(values[:, has_values], axis=0)
+        self._min = np.fmin(self._min, chunk_min)
+        self._max = np.fmax(self._max, chunk_max)
+
+    def finalize(self, frame: pd.DataFrame = None) -> Dict[str, Any]:
+        """
+        Return the accumulated profile.
+
+        Args:
+            frame: All profiled rows, from which the quartiles are computed;
+                without it they are NaN
+
+        Returns:
+            Dictionary with row/column counts, duplicates, null counts,
+            cardinalities, memory usage and per-numeric-column statistics
+        """
+        columns = self.columns or []
+        numeric_stats = {}
+        if self.numeric_columns:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                std = np.sqrt(self._m2 / (self._count - 1))
+            for i, col in enumerate(self.numeric_columns):
+                q25 = q50 = q75 = np.nan
+                if frame is not None and self._count[i]:
+                    # One float64 column at a time, never a copy of every numeric column
+                    column = frame[col].to_numpy(dtype=np.float64)
+                    q25, q50, q75 = np.percentile(column[~np.isnan(column)], [25, 50, 75])
+                numeric_stats[col] = {
+                    'count': float(self._count[i]),
+                    'mean': float(self._mean[i]) if self._count[i] else np.nan,
+                    'std': float(std[i]) if self._count[i] > 1 else np.nan,
+                    'min': float(self._min[i]),
+                    '25%': float(q25),
+                    '50%': float(q50),
+                    '75%': float(q75),
+                    'max': float(self._max[i])
+                }
+
+        return {
+            'total_rows': self.n_rows,
+            'total_columns': len(columns),
+            'numeric_columns': list(self.numeric_columns),
+            'categorical_columns': list(self.categorical_columns),
+            'duplicate_rows': self.n_rows - _count_distinct(self._row_hashes),
+            'null_counts': dict(self.null_counts),
+            'cardinality': {col: _count_distinct(h) for col, h in self._value_hashes.items()},
+            'memory_bytes': self.memory_bytes,
+            'numeric_statistics': numeric_stats
+        }
+
+
+def profile_dataframe(df: pd.DataFrame, chunk_size: int = 100000) -> Dict[str, Any]:
+    """
+    Profile a DataFrame in a single chunked pass.
+
+    Args:
+        df: Input DataFrame
+        chunk_size: Number of rows folded into the profile at a time
+
+    Returns:
+        Profile dictionary (see DataProfiler.finalize)
+    """
+    profiler = DataProfiler()
+    if len(df) == 0:
+        profiler.update(df)
+    for start in range(0, len(df), chunk_size):
+        profiler.update(df.iloc[start:start + chunk_size])
+    profile = profiler.finalize(df)
+    profile['memory_bytes'] += int(df.index.memory_usage())
+    return profile
+
+
+def quality_metrics_from_profile(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the get_data_quality_metrics payload from a profile without rescanning.
+
+    Args:
+        profile: Profile dictionary
+
+    Returns:
+        Dictionary containing data quality information
+    """
+    total_rows = profile['total_rows']
+    missing = profile['null_counts']
+    return {
+        'total_rows': total_rows,
+        'total_columns': profile['total_columns'],
+        'numeric_columns': len(profile['numeric_columns']),
+        'categorical_columns': len(profile['categorical_columns']),
+        'duplicate_rows': int(profile['duplicate_rows']),
+        'missing_values': dict(missing),
+        'missing_percentage': {
+            col: round(count / total_rows * 100, 2) if total_rows else 0.0
+            for col, count in missing.items()
+        },
+        'cardinality': dict(profile['cardinality']),
+        'memory_usage_mb': round(profile['memory_bytes'] / 1024 / 1024, 2)
+    }
+
+
+def feature_statistics_from_profile(profile: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """
+    Build the describe()-shaped feature statistics from a profile.
+
+    Args:
+        profile: Profile dictionary
+
+    Returns:
+        Dictionary containing statistics for each numeric feature
+    """
+    return {col: dict(stats) for col, stats in profile['numeric_statistics'].items()}
@@ -0,0 +1,168 @@
+"""
+DOWNSAMPLE Module
+Enhanced utility module for customer segmentation analytics
+Last updated: 2026-10-19
+"""
+"""
+Point budgets for the cluster scatter view: stratified sampling and density binning
+"""
+
+import math
+import numpy as np
+from typing import Any, Dict, Optional
+
+DOWNSAMPLE_METHODS = ('auto', 'stratified', 'binned', 'none')
+
+
+def stratified_sample_indices(labels: np.ndarray, budget: int, min_per_cluster: int = 200,
+                              seed: int = 0) -> np.ndarray:
+    """
+    Row indices of a per-cluster sample of at most budget rows.
+
+    Every cluster first gets min_per_cluster rows (or all of its rows, if
+    fewer), so small segments stay visible; the rest of the budget is shared
+    in proportion to cluster size. Rows are picked by a seeded random key,
+    so the sample is the same on every request, and a larger budget shows a
+    superset of the points of a smaller one.
+
+    Args:
+        labels: Cluster label per row
+        budget: Maximum number of rows returned
+        min_per_cluster: Rows guaranteed to each cluster
+        seed: Seed of the random keys
+
+    Returns:
+        Sorted row indices
+    """
+    labels = np.asarray(labels)
+    n = len(labels)
+    if n <= budget:
+        return np.arange(n)
+    clusters, inverse, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+    floor = min(min_per_cluster, budget // len(clusters))
+    quota = np.minimum(sizes, floor)
+    remaining = budget - quota.sum()
+    if remaining > 0:
+        # Largest-remainder apportionment of the rest, capped at each cluster's size
+        spare = sizes - quota
+        share = spare / spare.sum() * remaining
+        extra = np.minimum(np.floor(share).astype(int), spare)
+        leftover = remaining - extra.sum()
+        for i in np.argsort(-(share - extra), kind='stable'):
+            if leftover <= 0:
+                break
+            if extra[i] < spare[i]:
+                extra[i] += 1
+                leftover -= 1
+        quota = quota + extra
+
+    keys = np.random.default_rng(seed).random(n)
+    order = np.argsort(inverse, kind='stable')
+    bounds = np.concatenate([[0], np.cumsum(sizes)])
+    picked = []
+    for i in range(len(clusters)):
+        rows = order[bounds[i]:bounds[i + 1]]
+        if quota[i] >= len(rows):
+            picked.append(rows)
+        elif quota[i] > 0:
+            picked.append(rows[np.argpartition(keys[rows], quota[i] - 1)[:quota[i]]])
+    return np.sort(np.concatenate(picked))
+
+
+def density_bins(coords: np.ndarray, labels: np.ndarray, budget: int) -> Dict[str, np.ndarray]:
+    """
+    Aggregate points into a grid per cluster, one marker per non-empty cell.
+
+    Each cluster gets a g x g grid over its own extent, with g chosen so the
+    total number of cells is at most budget, so compact clusters are not
+    collapsed into a few cells of a plot-wide grid. A cell is drawn at the
+    mean of its points.
+
+    Args:
+        coords: Array of shape (n_rows, 2)
+        labels: Cluster label per row
+        budget: Maximum number of cells returned
+
+    Returns:
+        Dict with 'coords' (cell centroids), 'labels' and 'counts' (points per cell)
+    """
+    coords = np.asarray(coords, dtype=float)
+    clusters, inverse = np.unique(np.asarray(labels), return_inverse=True)
+    grid = max(1, int(math.sqrt(budget / len(clusters))))
+    order = np.argsort(inverse, kind='stable')
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(inverse))])
+    low, high = np.empty((len(clusters), 2)), np.empty((len(clusters), 2))
+    for i in range(len(clusters)):
+        members = coords[order[bounds[i]:bounds[i + 1]]]
+        low[i], high[i] = members.min(axis=0), members.max(axis=0)
+    span = np.where(high > low, high - low, 1.0)
+    cells = np.clip(((coords - low[inverse]) / span[inverse] * grid).astype(np.int64), 0, grid - 1)
+    # At most budget distinct keys, so counting needs no sort
+    keys = (inverse * grid + cells[:, 0]) * grid + cells[:, 1]
+    n_keys = len(clusters) * grid * grid
+    counts = np.bincount(keys, minlength=n_keys)
+    occupied = np.flatnonzero(counts)
+    sums = [np.bincount(keys, weights=coords[:, axis], minlength=n_keys)[occupied] for axis in (0, 1)]
+    counts = counts[occupied]
+    return {'coords': np.column_stack(sums) / counts[:, None], 'labels': clusters[occupied // (grid * grid)],
+            'counts': counts}
+
+
+def downsample_scatter(coords: np.ndarray, labels: np.ndarray, max_points: int, method: str = 'auto',
+                       min_per_cluster: int = 200, bin_ratio: float = 10.0) -> Dict[str, Any]:
+    """
+    Fit a scatter plot of labelled points into a point budget.
+
+    'auto' samples (stratified) while the sample still shows at least
+    1/bin_ratio of the rows, and bins beyond that, where a sample would
+    leave dense regions looking sparse. 'none', or max_points <= 0, keeps
+    every point.
+
+    Args:
+        coords: Array of shape (n_rows, 2)
+        labels: Cluster label per row
+        max_points: Point budget
+        method: 'auto', 'stratified', 'binned' or 'none'
+        min_per_cluster: Rows guaranteed to each cluster when sampling
+        bin_ratio: Rows per budgeted point beyond which 'auto' bins
+
+    Returns:
+        Dict with 'coords', 'labels', 'counts' (points per marker, None unless
+        binned) and 'summary' (method, point totals per cluster)
+    """
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    coords, labels = np.asarray(coords), np.asarray(labels)
+    n = len(labels)
+    if method == 'none' or max_points <= 0 or n <= max_points:
+        method = 'none'
+    elif method == 'auto':
+        method = 'binned' if n > max_points * bin_ratio else 'stratified'
+
+    counts: Optional[np.ndarray] = None
+    if method == 'stratified':
+        rows = stratified_sample_indices(labels, max_points, min_per_cluster=min_per_cluster)
+        shown_coords, shown_labels = coords[rows], labels[rows]
+    elif method == 'binned':
+        binned = density_bins(coords, labels, max_points)
+        shown_coords, shown_labels, counts = binned['coords'], binned['labels'], binned['counts']
+    else:
+        shown_coords, shown_labels = coords, labels
+
+    clusters, totals = np.unique(labels, return_counts=True)
+    per_cluster = {}
+    for cluster, total in zip(clusters.tolist(), totals.tolist()):
+        mask = shown_labels == cluster
+        per_cluster[str(cluster)] = {'total_points': total, 'markers': int(mask.sum())}
+    return {
+        'coords': shown_coords,
+        'labels': shown_labels,
+        'counts': counts,
+        'summary': {
+            'method': method,
+            'max_points': max_points,
+            'total_points': n,
+            'markers': len(shown_labels),
+            'per_cluster': per_cluster
+        }
+    }
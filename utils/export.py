@@ -8,6 +8,7 @@ Export utilities for clustering results in multiple formats
 """
 
 import pandas as pd
+import numpy as np
 import json
 import os
 from datetime import datetime
@@ -17,7 +18,8 @@ from typing import Dict, Any
 def export_to_csv(
     df_original: pd.DataFrame,
     labels: list,
-    filepath: str = 'clustered_results.csv'
+    filepath: str = 'clustered_results.csv',
+    chunk_size: int = 50000
 ) -> str:
     """
     Export clustering results with cluster assignments to CSV.
@@ -26,15 +28,19 @@ def export_to_csv(
         df_original: Original DataFrame
         labels: Cluster labels for each row
         filepath: Output file path
+        chunk_size: Rows written per slice
         
     Returns:
         Path to exported file
     """
-    export_data = df_original.copy()
-    export_data['Cluster'] = labels
-    
+    labels = np.asarray(labels)
     os.makedirs(os.path.dirname(filepath) if os.path.dirname(filepath) else '.', exist_ok=True)
-    export_data.to_csv(filepath, index=False)
+    
+    # Attach labels one slice at a time so the full frame is never duplicated
+    with open(filepath, 'w', newline='') as f:
+        for start in range(0, max(len(df_original), 1), chunk_size):
+            chunk = df_original.iloc[start:start + chunk_size].assign(Cluster=labels[start:start + chunk_size])
+            chunk.to_csv(f, index=False, header=start == 0)
     
     return filepath
 
@@ -9,7 +9,6 @@ Feature importance and cluster characterization utilities
 
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
 from typing import Dict, List, Any
 
 
@@ -31,11 +30,13 @@ def calculate_feature_importance_in_clusters(
     Returns:
         Dictionary mapping cluster IDs to feature importance scores
     """
-    df_with_clusters = df_normalized.copy()
-    df_with_clusters['Cluster'] = labels
-    
-    # Calculate overall variance for each feature
-    overall_variance = df_with_clusters.groupby('Cluster').mean().var()
+    # Calculate overall variance for each feature (grouping by the label array avoids copying the frame).
+    # Sparse one-hot columns have no var(), so the per-cluster means (one row per cluster) are densified
+    cluster_means = df_normalized.groupby(np.asarray(labels)).mean()
+    sparse_cols = [col for col in cluster_means.columns if isinstance(cluster_means[col].dtype, pd.SparseDtype)]
+    if sparse_cols:
+        cluster_means = cluster_means.astype({col: np.float64 for col in sparse_cols})
+    overall_variance = cluster_means.var()
     
     # Normalize by max variance to get importance scores 0-1
     max_var = overall_variance.max()
@@ -63,15 +64,14 @@ def get_top_features_per_cluster(
     Returns:
         Dictionary mapping cluster IDs to lists of (feature, value) pairs
     """
-    df_with_clusters = df_original.copy()
-    df_with_clusters['Cluster'] = labels
+    labels = np.asarray(labels)
+    numeric_cols = df_original.select_dtypes(include=[np.number]).columns
+    numeric_cols = [col for col in numeric_cols if col != 'Cluster']
     
     top_features = {}
     
     for cluster_id in sorted(np.unique(labels)):
-        cluster_data = df_with_clusters[df_with_clusters['Cluster'] == cluster_id]
-        numeric_cols = cluster_data.select_dtypes(include=[np.number]).columns
-        numeric_cols = [col for col in numeric_cols if col != 'Cluster']
+        cluster_data = df_original.loc[labels == cluster_id, numeric_cols]
         
         if len(numeric_cols) > 0:
             # Get mean values for numeric columns
@@ -137,26 +137,21 @@ def get_cluster_outliers(
     Returns:
         Dictionary mapping cluster IDs to lists of outlier indices
     """
-    df_with_clusters = df_normalized.copy()
-    df_with_clusters['Cluster'] = labels
-    df_with_clusters['Index'] = range(len(df_normalized))
+    labels = np.asarray(labels)
     
     outliers = {}
     
     for cluster_id in np.unique(labels):
-        cluster_data = df_with_clusters[df_with_clusters['Cluster'] == cluster_id]
-        cluster_centroid = cluster_data[df_normalized.columns].mean().values
+        positions = np.flatnonzero(labels == cluster_id)
+        cluster_values = df_normalized.iloc[positions].values
+        cluster_centroid = cluster_values.mean(axis=0)
         
         # Calculate distance from each point to cluster centroid
-        distances = np.linalg.norm(
-            cluster_data[df_normalized.columns].values - cluster_centroid,
-            axis=1
-        )
+        distances = np.linalg.norm(cluster_values - cluster_centroid, axis=1)
         
         # Find points in the top percentile (farthest from centroid)
         threshold = np.percentile(distances, percentile)
-        outlier_mask = distances > threshold
-        outlier_indices = cluster_data.loc[outlier_mask, 'Index'].tolist()
+        outlier_indices = positions[distances > threshold].tolist()
         
         outliers[int(cluster_id)] = outlier_indices
     
@@ -181,20 +176,18 @@ def generate_cluster_summary(
     Returns:
         Dictionary mapping cluster IDs to text summaries
     """
-    df_with_clusters = df_original.copy()
-    df_with_clusters['Cluster'] = labels
+    labels = np.asarray(labels)
+    numeric_cols = df_original.select_dtypes(include=[np.number]).columns
+    numeric_cols = [col for col in numeric_cols if col != 'Cluster']
     
     summaries = {}
     
     for cluster_id in sorted(np.unique(labels)):
-        cluster_data = df_with_clusters[df_with_clusters['Cluster'] == cluster_id]
+        cluster_data = df_original.loc[labels == cluster_id, numeric_cols]
         size = len(cluster_data)
-        percentage = len(cluster_data) / len(df_with_clusters) * 100
+        percentage = len(cluster_data) / len(df_original) * 100
         
         # Get top features
-        numeric_cols = cluster_data.select_dtypes(include=[np.number]).columns
-        numeric_cols = [col for col in numeric_cols if col != 'Cluster']
-        
         if len(numeric_cols) > 0:
             top_feature = cluster_data[numeric_cols].mean().abs().idxmax()
             top_value = cluster_data[numeric_cols].mean().max()
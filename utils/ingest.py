@@ -0,0 +1,267 @@
+"""
+INGEST Module
+Enhanced utility module for customer segmentation analytics
+Last updated: 2026-10-19
+"""
+"""
+Streaming CSV ingest: hash, parse and profile an upload in one read
+"""
+
+import gzip
+import hashlib
+import os
+import queue
+import tempfile
+import threading
+import time
+import zlib
+from typing import Any, BinaryIO, Dict, Optional, Tuple
+
+import pandas as pd
+
+from utils.data_profile import DataProfiler
+
+
+# Upload filename suffix -> compression codec
+COMPRESSED_SUFFIXES = {'.csv.gz': 'gzip', '.csv.zst': 'zstd'}
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds its byte or row budget while being read."""
+
+    def __init__(self, message: str, limit: str = 'bytes'):
+        super().__init__(message)
+        self.limit = limit
+
+
+class UnsupportedCompressionError(ValueError):
+    """Raised when a compressed upload cannot be decompressed."""
+
+
+def _decompression_errors(compression: str) -> Tuple[type, ...]:
+    errors = (OSError, EOFError, zlib.error)
+    if compression == 'zstd':
+        import zstandard
+        errors += (zstandard.ZstdError,)
+    return errors
+
+
+def upload_compression(filename: str) -> Tuple[bool, Optional[str]]:
+    """
+    Classify an upload by filename.
+
+    Args:
+        filename: Uploaded file name
+
+    Returns:
+        Tuple of (accepted, compression) where compression is None for a plain
+        .csv, 'gzip' for .csv.gz and 'zstd' for .csv.zst
+    """
+    name = filename.lower()
+    for suffix, compression in COMPRESSED_SUFFIXES.items():
+        if name.endswith(suffix):
+            return True, compression
+    return name.endswith('.csv'), None
+
+
+def open_decompressed(stream: BinaryIO, compression: Optional[str]) -> BinaryIO:
+    """
+    Wrap a binary stream so reads return decompressed bytes.
+
+    Decompression is incremental: only the blocks the reader asks for are
+    inflated, so the decompressed file never exists in memory or on disk.
+
+    Args:
+        stream: Compressed binary stream
+        compression: None, 'gzip' or 'zstd'
+
+    Returns:
+        Binary file-like object yielding decompressed bytes
+    """
+    if compression is None:
+        return stream
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=stream, mode='rb')
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise UnsupportedCompressionError("zstd uploads need the 'zstandard' package installed")
+        return zstandard.ZstdDecompressor().stream_reader(stream, read_across_frames=True)
+    raise UnsupportedCompressionError(f"Unknown compression: {compression}")
+
+
+class BackgroundFileWriter:
+    """
+    Copy streamed bytes to disk on a background thread.
+
+    Bytes go to a uniquely named temporary file next to path, so concurrent
+    writers of the same path never share one; close(keep=True) renames it
+    into place once all queued chunks are written, close(keep=False) deletes
+    it. Neither call waits for the disk unless wait=True.
+    """
+
+    _DONE = object()
+
+    def __init__(self, path: str, max_queued_chunks: int = 64):
+        self.path = path
+        directory, name = os.path.split(os.path.abspath(path))
+        fd, self.partial_path = tempfile.mkstemp(prefix=f'.{name}.', suffix='.part', dir=directory)
+        self.error: Optional[BaseException] = None
+        self._keep = True
+        self._queue = queue.Queue(maxsize=max_queued_chunks)
+        self._thread = threading.Thread(target=self._run, args=(fd,), name='upload-writer', daemon=True)
+        self._thread.start()
+
+    def _run(self, fd: int) -> None:
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    chunk = self._queue.get()
+                    if chunk is self._DONE:
+                        break
+                    f.write(chunk)
+            if self._keep:
+                os.replace(self.partial_path, self.path)
+            else:
+                os.remove(self.partial_path)
+        except BaseException as e:  # surfaced through .error
+            self.error = e
+            if os.path.exists(self.partial_path):
+                os.remove(self.partial_path)
+
+    def write(self, chunk: bytes) -> None:
+        self._queue.put(chunk)
+
+    def close(self, keep: bool = True, wait: bool = False) -> None:
+        self._keep = keep
+        self._queue.put(self._DONE)
+        if wait:
+            self._thread.join()
+
+
+class HashingReader:
+    """
+    Binary file-like wrapper that hashes, counts and optionally tees every read.
+
+    Handed to pandas as the CSV source so the upload is hashed as the parser
+    consumes it, without a separate pass over the bytes. With hash_bytes=False
+    it only counts and tees (the compressed side of a compressed upload).
+    """
+
+    def __init__(self, stream: BinaryIO, max_bytes: int = None, sink: BackgroundFileWriter = None,
+                 hash_bytes: bool = True):
+        self._stream = stream
+        self._max_bytes = max_bytes
+        self._sink = sink
+        self._digest = hashlib.sha256() if hash_bytes else None
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._stream.read(size)
+        if chunk:
+            self.bytes_read += len(chunk)
+            if self._max_bytes is not None and self.bytes_read > self._max_bytes:
+                raise UploadTooLargeError(f"Upload exceeds {self._max_bytes} bytes")
+            if self._digest is not None:
+                self._digest.update(chunk)
+            if self._sink is not None:
+                self._sink.write(chunk)
+        return chunk
+
+    def readable(self) -> bool:
+        return True
+
+    def drain(self, chunk_size: int = 1024 * 1024) -> None:
+        """Consume whatever the parser left unread so the hash covers the whole upload."""
+        while self.read(chunk_size):
+            pass
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+
+def ingest_csv(
+    stream: BinaryIO,
+    chunk_rows: int = 200000,
+    max_bytes: int = None,
+    save_path: str = None,
+    compression: str = None,
+    max_decompressed_bytes: int = None,
+    max_rows: int = None
+) -> Dict[str, Any]:
+    """
+    Parse a CSV upload straight from its stream.
+
+    The stream is read once: each block is optionally queued for a background
+    copy to save_path (as uploaded, still compressed), decompressed
+    incrementally, hashed and fed to pandas' chunked reader, whose row chunks
+    are profiled as they arrive. The content hash covers the decompressed
+    CSV, so the same data deduplicates whether or not it was compressed.
+
+    Args:
+        stream: Binary upload stream
+        chunk_rows: Rows per parsed chunk
+        max_bytes: Raise UploadTooLargeError once more bytes than this are read
+            from the (possibly compressed) stream
+        save_path: Optional path for the background on-disk copy
+        compression: None, 'gzip' or 'zstd'
+        max_decompressed_bytes: Raise UploadTooLargeError once the CSV inflates
+            past this many bytes
+        max_rows: Raise UploadTooLargeError once more rows than this are parsed
+
+    Returns:
+        Dictionary with the parsed 'frame', its 'profile', 'content_hash',
+        'bytes' read, 'decompressed_bytes', 'parse_seconds' and the 'writer'
+        (None without save_path; the caller must close() it to keep or discard
+        the copy)
+    """
+    writer = BackgroundFileWriter(save_path) if save_path else None
+    profiler = DataProfiler()
+    start = time.perf_counter()
+    try:
+        if compression is None:
+            limits = [b for b in (max_bytes, max_decompressed_bytes) if b is not None]
+            raw = reader = HashingReader(stream, max_bytes=min(limits) if limits else None, sink=writer)
+        else:
+            raw = HashingReader(stream, max_bytes=max_bytes, sink=writer, hash_bytes=False)
+            reader = HashingReader(open_decompressed(raw, compression), max_bytes=max_decompressed_bytes)
+        chunks = []
+        n_rows = 0
+        for chunk in pd.read_csv(reader, chunksize=chunk_rows):
+            n_rows += len(chunk)
+            if max_rows is not None and n_rows > max_rows:
+                raise UploadTooLargeError(f"Upload exceeds {max_rows} rows", limit='rows')
+            profiler.update(chunk)
+            chunks.append(chunk)
+        reader.drain()
+        if raw is not reader:
+            raw.drain()
+    except Exception as e:
+        if writer is not None:
+            writer.close(keep=False)
+        if compression is not None and not isinstance(e, UnsupportedCompressionError) \
+                and isinstance(e, _decompression_errors(compression)):
+            raise UnsupportedCompressionError(f"Could not decompress {compression} upload: {e}") from e
+        raise
+
+    if not chunks:
+        raise pd.errors.EmptyDataError("No columns to parse from file")
+    frame = chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+    del chunks
+    for col in profiler.drifted_columns:
+        # Numbers parsed from earlier chunks become strings, as a single read would leave them
+        values = frame[col]
+        frame[col] = values.where(values.isna(), values.astype(str))
+
+    profile = profiler.finalize(frame)
+    profile['memory_bytes'] += int(frame.index.memory_usage())
+    return {
+        'frame': frame,
+        'profile': profile,
+        'content_hash': reader.hexdigest(),
+        'bytes': raw.bytes_read,
+        'decompressed_bytes': reader.bytes_read,
+        'parse_seconds': time.perf_counter() - start,
+        'writer': writer
+    }
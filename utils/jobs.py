@@ -0,0 +1,320 @@
+"""
+JOBS Module
+Enhanced utility module for customer segmentation analytics
+Last updated: 2026-10-19
+"""
+"""
+Local background jobs for long-running analysis, backed by a process pool
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from utils.metrics import capture_stages, record_stages
+
+
+JOB_STATES = ('queued', 'running', 'succeeded', 'failed', 'cancelled')
+FINISHED_STATES = ('succeeded', 'failed', 'cancelled')
+
+# One unit of work: (picklable module-level function, args, kwargs)
+Step = Tuple[Callable[..., Any], tuple, dict]
+
+
+def _lower_priority(niceness: int) -> None:
+    """Pool initializer: raise the worker's nice value (POSIX only)."""
+    if niceness and hasattr(os, 'nice'):
+        os.nice(niceness)
+
+
+def _timed_call(fn: Callable[..., Any], args: tuple, kwargs: dict,
+                capture: bool = False) -> Tuple[Any, float, List[Tuple[str, float]]]:
+    """
+    Run one step in the worker and measure it there.
+
+    With capture (process workers), the pipeline stage timings of the step
+    are returned instead of recorded in the worker's own registry.
+    """
+    start = time.perf_counter()
+    if not capture:
+        return fn(*args, **kwargs), time.perf_counter() - start, []
+    with capture_stages() as stages:
+        result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start, stages
+
+
+class Job:
+    """
+    A background job made of independent steps plus an optional finalizer.
+
+    Steps run on the JobManager's pool. Each finished step updates `progress`
+    and `partial`, so a sweep reports per-k results while it runs. The
+    finalizer runs on a thread in this process once every step has succeeded,
+    and it produces `result`.
+    """
+
+    def __init__(self, kind: str, workspace_id: str = None, params: Dict[str, Any] = None,
+                 expose_partial: bool = True):
+        self.job_id = uuid.uuid4().hex
+        self.kind = kind
+        self.workspace_id = workspace_id
+        self.params = dict(params or {})
+        self.expose_partial = expose_partial
+        self.state = 'queued'
+        self.total_steps = 0
+        self.completed_steps = 0
+        self.partial: Dict[Hashable, Any] = {}
+        self.step_seconds: Dict[Hashable, float] = {}
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._futures: Dict[Future, Hashable] = {}
+        self._step_started: Dict[Hashable, float] = {}
+        self._lock = threading.RLock()
+        self._done = threading.Event()
+        self._steps_done = threading.Event()
+        self._listeners: List[Callable[['Job'], None]] = []
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED_STATES
+
+    def _refresh_running(self) -> None:
+        # Pool futures do not signal when they start, so the state is refreshed
+        # whenever the job is inspected
+        now = time.time()
+        for future, key in self._futures.items():
+            if key not in self._step_started and (future.running() or future.done()):
+                self._step_started[key] = now
+        if self.state == 'queued' and self._step_started:
+            self.state = 'running'
+            self.started_at = min(self._step_started.values())
+
+    def subscribe(self, listener: Callable[['Job'], None]) -> None:
+        """Call listener(job) after every progress or state change."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[['Job'], None]) -> None:
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def _notify(self) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(self)
+            except Exception:
+                pass
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until the job finishes; returns False on timeout."""
+        return self._done.wait(timeout)
+
+    def wait_steps(self, timeout: float = None) -> bool:
+        """
+        Block until every step has completed or the job has ended, without
+        waiting for the finalizer. Check completed_steps afterwards.
+        """
+        return self._steps_done.wait(timeout)
+
+    def _finish(self, state: str, error: str = None) -> bool:
+        with self._lock:
+            if self.finished:
+                return False
+            self.state = state
+            self.error = error
+            self.finished_at = time.time()
+            if self.started_at is None:
+                self.started_at = self.finished_at
+        self._steps_done.set()
+        self._done.set()
+        self._notify()
+        return True
+
+    def cancel(self) -> bool:
+        """
+        Cancel the job. Queued steps are dropped; steps already executing run
+        to completion in their worker but their results are discarded.
+        """
+        with self._lock:
+            if self.finished:
+                return False
+            for future in self._futures:
+                future.cancel()
+        return self._finish('cancelled')
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready status: state, per-step progress, partial results and timing."""
+        with self._lock:
+            if not self.finished:
+                self._refresh_running()
+            end = self.finished_at or time.time()
+            return {
+                'job_id': self.job_id,
+                'type': self.kind,
+                'state': self.state,
+                'params': self.params,
+                'progress': {
+                    'completed': self.completed_steps,
+                    'total': self.total_steps,
+                    'fraction': round(self.completed_steps / self.total_steps, 3) if self.total_steps else 0.0
+                },
+                'partial_results': {str(k): v for k, v in self.partial.items()} if self.expose_partial else {},
+                'result': self.result,
+                'error': self.error,
+                'timing': {
+                    'submitted_at': self.submitted_at,
+                    'started_at': self.started_at,
+                    'finished_at': self.finished_at,
+                    'queued_seconds': round((self.started_at or end) - self.submitted_at, 3),
+                    'run_seconds': round(end - self.started_at, 3) if self.started_at else 0.0,
+                    'step_seconds': {str(k): round(v, 3) for k, v in self.step_seconds.items()}
+                }
+            }
+
+
+class JobManager:
+    """
+    Run jobs on a local process (or thread) pool; no external broker needed.
+
+    The pool is created on first use. Finalizers run on a single separate
+    thread so pool result handling is never blocked. At most max_finished
+    finished jobs are remembered. A positive niceness lowers the CPU priority
+    of process workers, for work nobody is waiting on yet; it has no effect
+    on threads.
+    """
+
+    def __init__(self, max_workers: int = 2, executor: str = 'process', max_finished: int = 100,
+                 niceness: int = 0):
+        if executor not in ('process', 'thread'):
+            raise ValueError(f"Unknown executor: {executor}")
+        self.max_workers = max_workers
+        self.executor = executor
+        self.max_finished = max_finished
+        self.niceness = niceness
+        self._pool = None
+        self._finalizer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='job-finalize')
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                if self.executor == 'process':
+                    self._pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_lower_priority,
+                                                     initargs=(self.niceness,))
+                else:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+            return self._pool
+
+    def submit(self, kind: str, steps: Dict[Hashable, Step], workspace_id: str = None,
+               params: Dict[str, Any] = None,
+               finalize: Callable[[Job, Dict[Hashable, Any]], Any] = None,
+               expose_partial: bool = True) -> Job:
+        """
+        Submit a job.
+
+        Args:
+            kind: Job type reported by the API (e.g. 'optimal-clusters')
+            steps: Mapping of step key to (function, args, kwargs); functions
+                must be picklable for the process pool
+            workspace_id: Owning workspace
+            params: Request parameters echoed in the status
+            finalize: Called as finalize(job, step_results) after all steps
+                succeed; its return value becomes job.result
+            expose_partial: Report step results in the status (they must be
+                JSON-serializable)
+
+        Returns:
+            The submitted Job
+        """
+        job = Job(kind, workspace_id=workspace_id, params=params, expose_partial=expose_partial)
+        job.total_steps = len(steps)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune()
+        pool = self._get_pool()
+        with job._lock:
+            for key, (fn, args, kwargs) in steps.items():
+                future = pool.submit(_timed_call, fn, args, kwargs, self.executor == 'process')
+                job._futures[future] = key
+        for future in list(job._futures):
+            future.add_done_callback(lambda f, job=job, finalize=finalize: self._step_done(job, f, finalize))
+        if not steps:
+            job._steps_done.set()
+            self._finalizer.submit(self._run_finalize, job, finalize)
+        return job
+
+    def _step_done(self, job: Job, future: Future, finalize: Callable) -> None:
+        if future.cancelled():
+            return
+        with job._lock:
+            if job.finished:
+                return
+            key = job._futures[future]
+            error = future.exception()
+            if error is None:
+                job._refresh_running()
+                job.partial[key], job.step_seconds[key], stages = future.result()
+                job.completed_steps += 1
+                all_done = job.completed_steps == job.total_steps
+        if error is not None:
+            with job._lock:
+                for other in job._futures:
+                    other.cancel()
+            job._finish('failed', f'{type(error).__name__}: {error}')
+            return
+        # Stage timings captured in a worker process reach /metrics from here
+        record_stages(stages)
+        job._notify()
+        if all_done:
+            job._steps_done.set()
+            self._finalizer.submit(self._run_finalize, job, finalize)
+
+    def _run_finalize(self, job: Job, finalize: Callable) -> None:
+        if job.finished:
+            return
+        try:
+            result = finalize(job, dict(job.partial)) if finalize else dict(job.partial)
+        except Exception as e:
+            job._finish('failed', f'{type(e).__name__}: {e}')
+            return
+        with job._lock:
+            if job.finished:
+                return
+            job.result = result
+        job._finish('succeeded')
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, workspace_id: str = None) -> List[Job]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job for job in jobs if workspace_id is None or job.workspace_id == workspace_id]
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.get(job_id)
+        return job.cancel() if job is not None else False
+
+    def shutdown(self, wait: bool = False) -> None:
+        for job in self.list():
+            job.cancel()
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+        self._finalizer.shutdown(wait=wait)
@@ -1,62 +1,205 @@
 """
 LOGGER Module
 Enhanced utility module for customer segmentation analytics
-Last updated: 2025-12-29
+Last updated: 2026-10-19
 """
 """
 Logging configuration for Customer Segmentation Analytics System
 """
 
+import atexit
 import logging
+import logging.handlers
 import os
-from datetime import datetime
+import queue
+import random
+from typing import Callable, Dict, Optional
 
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
 
-def setup_logger(name: str, log_level: str = 'INFO') -> logging.Logger:
+
+class SizedTimedRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
+    """
+    Rotate at a time boundary (midnight by default) or when the file exceeds max_bytes.
+
+    Files rotated within the same period get a numeric suffix
+    (app.log.2026-10-19.1), so a size rollover never overwrites an earlier
+    one. backup_count applies to both kinds.
+    """
+
+    def __init__(self, filename: str, max_bytes: int = 0, when: str = 'midnight', backup_count: int = 0,
+                 encoding: str = 'utf-8'):
+        super().__init__(filename, when=when, backupCount=backup_count, encoding=encoding, delay=True)
+        self.max_bytes = max_bytes
+
+    def shouldRollover(self, record: logging.LogRecord) -> int:
+        if super().shouldRollover(record):
+            return 1
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.seek(0, 2)
+            if self.stream.tell() + len(self.format(record)) + 1 >= self.max_bytes:
+                return 1
+        return 0
+
+    def rotation_filename(self, default_name: str) -> str:
+        name = super().rotation_filename(default_name)
+        candidate, n = name, 0
+        while os.path.exists(candidate):
+            n += 1
+            candidate = f'{name}.{n}'
+        return candidate
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """
+    Parse 'route=rate' pairs, e.g. '/health=0,/api/status=0.1'.
+
+    Args:
+        spec: Comma-separated pairs; rates are fractions of records kept
+
+    Returns:
+        Mapping of route to rate
+    """
+    rates = {}
+    for part in (spec or '').split(','):
+        route, sep, rate = part.strip().partition('=')
+        if sep and route:
+            rates[route.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+class RouteSampler(logging.Filter):
+    """
+    Keep only a fraction of DEBUG and INFO records logged while serving chatty routes.
+
+    WARNING and above always pass. route() returns the route of the current
+    request, or None outside a request.
+    """
+
+    def __init__(self, rates: Dict[str, float], route: Callable[[], Optional[str]]):
+        super().__init__()
+        self.rates = rates
+        self.route = route
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self.rates.get(self.route())
+        if rate is None or rate >= 1.0 or (rate > 0 and random.random() < rate):
+            return True
+        self.dropped += 1
+        return False
+
+
+def _stop_listener(listener: logging.handlers.QueueListener) -> None:
+    """Write out everything queued and stop the listener thread, if it is running."""
+    if listener._thread is not None:
+        listener.stop()
+
+
+def _restart_listeners_after_fork() -> None:
+    # Threads do not survive fork(): a preloaded gunicorn worker or a forked job
+    # process inherits the queue but not the thread that drains it
+    for logger in list(logging.Logger.manager.loggerDict.values()):
+        for handler in getattr(logger, 'handlers', []):
+            listener = getattr(handler, 'listener', None)
+            if listener is not None and listener._thread is not None:
+                listener._thread = None
+                listener.start()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_listeners_after_fork)
+
+
+def setup_logger(name: str, log_level: str = None, log_file: str = None, max_bytes: int = None,
+                 backup_count: int = None, when: str = None, queued: bool = None) -> logging.Logger:
     """
-    Setup a logger with file and console handlers.
-    
+    Setup a logger with a rotating file handler and a console handler.
+
+    When queued, records are put on an in-memory queue and a background
+    listener thread formats and writes them, so request threads never wait
+    on the disk or the terminal. Unset arguments come from the LOG_*
+    environment variables.
+
     Args:
         name: Logger name (typically __name__)
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
-        
+        log_file: Log file path; rotated files are kept next to it
+        max_bytes: Rotate when the file would grow past this size (0 = no size limit)
+        backup_count: Rotated files to keep (0 = keep all)
+        when: Time-based rotation interval, as for TimedRotatingFileHandler
+        queued: Write through a background listener thread
+
     Returns:
         Configured logger instance
     """
+    log_level = (log_level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+    log_file = log_file or os.getenv('LOG_FILE', 'logs/app.log')
+    max_bytes = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024)) if max_bytes is None else max_bytes
+    backup_count = int(os.getenv('LOG_BACKUP_COUNT', 14)) if backup_count is None else backup_count
+    when = when or os.getenv('LOG_ROTATE_WHEN', 'midnight')
+    queued = os.getenv('LOG_QUEUE', 'True').lower() == 'true' if queued is None else queued
+
     # Create logs directory if it doesn't exist
-    log_dir = 'logs'
-    os.makedirs(log_dir, exist_ok=True)
-    
+    os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+
     # Create logger
     logger = logging.getLogger(name)
-    logger.setLevel(getattr(logging, log_level.upper()))
-    
-    # Remove existing handlers to avoid duplicates
+    logger.setLevel(getattr(logging, log_level))
+
+    # Remove existing handlers (and stop their listener) to avoid duplicates
     for handler in logger.handlers[:]:
+        listener = getattr(handler, 'listener', None)
+        if listener is not None:
+            _stop_listener(listener)
         logger.removeHandler(handler)
-    
+        handler.close()
+
     # Create formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
+    formatter = logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT)
+
     # File handler
-    log_file = os.path.join(log_dir, f'app_{datetime.now().strftime("%Y%m%d")}.log')
-    file_handler = logging.FileHandler(log_file)
-    file_handler.setLevel(getattr(logging, log_level.upper()))
+    file_handler = SizedTimedRotatingFileHandler(log_file, max_bytes=max_bytes, when=when, backup_count=backup_count)
+    file_handler.setLevel(getattr(logging, log_level))
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
-    
+
     # Console handler
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-    
+
+    if not queued:
+        logger.addHandler(file_handler)
+        logger.addHandler(console_handler)
+        return logger
+
+    # Unbounded, so logging never blocks; the listener drains it on a daemon thread
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler,
+                                                            respect_handler_level=True)
+    queue_handler.listener.start()
+    # Flush what is still queued when the interpreter exits
+    atexit.register(_stop_listener, queue_handler.listener)
+    logger.addHandler(queue_handler)
     return logger
 
 
-# Application logger
-app_logger = setup_logger('CustomerSegmentation', 'INFO')
+def flush_logger(logger: logging.Logger) -> None:
+    """Block until records already queued for logger have been written."""
+    for handler in logger.handlers:
+        listener = getattr(handler, 'listener', None)
+        if listener is not None and listener._thread is not None:
+            _stop_listener(listener)
+            listener.start()
+    for handler in logger.handlers:
+        handler.flush()
 
+
+# Application logger
+app_logger = setup_logger('CustomerSegmentation')
@@ -0,0 +1,140 @@
+"""
+MEMORY Module
+Enhanced utility module for customer segmentation analytics
+Last updated: 2026-10-19
+"""
+"""
+Peak-memory accounting for pipeline stages
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterator, Optional
+
+import pandas as pd
+
+from utils.metrics import time_stage
+
+
+def frame_memory_mb(df: pd.DataFrame) -> float:
+    """Deep memory footprint of a DataFrame in MB."""
+    return round(df.memory_usage(deep=True).sum() / 1024 / 1024, 3)
+
+
+def process_rss_bytes() -> Optional[int]:
+    """
+    Current resident set size of this process, or None if it cannot be read.
+
+    Read from /proc on Linux and from GetProcessMemoryInfo() on Windows;
+    elsewhere the peak RSS from getrusage() is the closest available figure.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    if sys.platform == 'win32':
+        return _windows_working_set_bytes()
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _windows_working_set_bytes() -> Optional[int]:
+    """Working set of this process from psapi's GetProcessMemoryInfo()."""
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                    ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+    try:
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return None
+        return int(counters.WorkingSetSize)
+    except (AttributeError, OSError):
+        return None
+
+
+class MemoryTracker:
+    """
+    Record peak traced memory and wall time of named pipeline stages.
+
+    Uses tracemalloc, which numpy and pandas allocations report to. The peak is
+    reset at the start of every stage, so each figure is the high-water mark
+    reached while that stage ran (including whatever was already allocated by
+    earlier stages). Tracing is started on first use and stopped by close()
+    only if this tracker started it.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.overall_peak = 0
+        self._baseline = 0
+        self._owns_tracing = False
+
+    def _ensure_tracing(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+            self._baseline = 0
+        elif not self.stages:
+            self._baseline = tracemalloc.get_traced_memory()[0]
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        self._ensure_tracing()
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            self.overall_peak = max(self.overall_peak, peak - self._baseline)
+            self.stages[name] = {
+                'peak_mb': round((peak - self._baseline) / 1024 / 1024, 3),
+                'current_mb': round((current - self._baseline) / 1024 / 1024, 3),
+                'seconds': round(time.perf_counter() - start, 4)
+            }
+
+    def close(self) -> None:
+        if self._owns_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._owns_tracing = False
+
+    def report(self, raw_mb: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Summarize the recorded stages.
+
+        Args:
+            raw_mb: Size of the raw data, used to express the peak as a multiple
+
+        Returns:
+            Dictionary with per-stage figures and the overall peak
+        """
+        peak_mb = round(self.overall_peak / 1024 / 1024, 3)
+        report = {'stages': dict(self.stages), 'peak_mb': peak_mb}
+        if raw_mb:
+            report['raw_mb'] = raw_mb
+            report['peak_to_raw_ratio'] = round(peak_mb / raw_mb, 2)
+        return report
+
+
+@contextmanager
+def track_stage(tracker: Optional[MemoryTracker], name: str) -> Iterator[None]:
+    """Time a stage into the stage latency histogram, and through tracker.stage(name) when tracking is on."""
+    with time_stage(name), (tracker.stage(name) if tracker is not None else nullcontext()):
+        yield
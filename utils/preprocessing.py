@@ -9,8 +9,17 @@ Data preprocessing utilities for customer segmentation
 
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from typing import Tuple, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Tuple, Dict, Any, List, Callable, TYPE_CHECKING
+
+from utils.correlation import compute_correlation, matrix_to_list
+from utils.memory import MemoryTracker, track_stage
+from utils.data_profile import profile_dataframe, quality_metrics_from_profile, feature_statistics_from_profile
+
+# scipy and scikit-learn are imported where they are used, keeping them off the app's import path
+if TYPE_CHECKING:
+    from scipy import sparse
+    from sklearn.preprocessing import StandardScaler
 
 
 def load_data(filepath: str) -> pd.DataFrame:
@@ -26,13 +35,71 @@ def load_data(filepath: str) -> pd.DataFrame:
     return pd.read_csv(filepath)
 
 
-def handle_missing_values(df: pd.DataFrame, strategy: str = 'mean') -> pd.DataFrame:
+def _factorize_column(values: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """
+    Hash-factorize one column into sorted-level codes, filling missing values with the mode.
+    
+    Levels are found with a hash table and only the distinct levels are sorted,
+    so codes match LabelEncoder (index into the sorted levels) without sorting
+    the whole column.
+    """
+    codes, levels = pd.factorize(values, sort=True)
+    missing = codes < 0
+    if missing.any():
+        # Mode of the observed values; ties resolve to the first sorted level like Series.mode()
+        codes[missing] = np.bincount(codes[~missing], minlength=len(levels)).argmax()
+    return codes, levels
+
+
+def _fill_with_mode(values: pd.Series) -> Any:
+    """
+    Fill missing values of one column with its mode (Series.mode()[0]).
+    
+    Returns:
+        Filled object array, or None when the column has no missing values
+    """
+    codes, levels = pd.factorize(values, sort=True)
+    missing = codes < 0
+    if not missing.any():
+        return None
+    filled = values.to_numpy(dtype=object, copy=True)
+    filled[missing] = levels[np.bincount(codes[~missing], minlength=len(levels)).argmax()]
+    return filled
+
+
+def _map_columns(func: Callable[[pd.Series], Any], columns: List[pd.Series],
+                 workers: int = 1, executor: str = 'thread') -> List[Any]:
+    """
+    Apply func to each column, serially or across a pool, preserving column order.
+    
+    Args:
+        func: Module-level function of one column (picklable for process pools)
+        columns: Column Series to process
+        workers: Pool size; 1 runs serially in the calling thread
+        executor: 'thread' or 'process'
+        
+    Returns:
+        List of results in the order of columns
+    """
+    if executor not in ('thread', 'process'):
+        raise ValueError(f"Unknown executor: {executor}")
+    if workers <= 1 or len(columns) <= 1:
+        return [func(col) for col in columns]
+    pool_class = ProcessPoolExecutor if executor == 'process' else ThreadPoolExecutor
+    with pool_class(max_workers=min(workers, len(columns))) as pool:
+        return list(pool.map(func, columns))
+
+
+def handle_missing_values(df: pd.DataFrame, strategy: str = 'mean', workers: int = 1,
+                          executor: str = 'thread') -> pd.DataFrame:
     """
     Handle missing values in the dataset.
     
     Args:
         df: Input DataFrame
         strategy: How to handle missing values ('mean', 'median', 'drop')
+        workers: Number of categorical columns whose modes are computed in parallel
+        executor: 'thread' or 'process' pool used when workers > 1
         
     Returns:
         DataFrame with missing values handled
@@ -50,38 +117,113 @@ def handle_missing_values(df: pd.DataFrame, strategy: str = 'mean') -> pd.DataFr
     elif strategy == 'drop':
         df = df.dropna()
     
-    # Handle categorical columns
-    for col in categorical_cols:
-        if df[col].isnull().any():
-            df[col] = df[col].fillna(df[col].mode()[0])
+    # Handle categorical columns; one factorize per column finds both the
+    # missing positions and the mode, and filled columns are written back at once
+    filled = _map_columns(_fill_with_mode, [df[col] for col in categorical_cols], workers=workers, executor=executor)
+    replacements = {col: values for col, values in zip(categorical_cols, filled) if values is not None}
+    if replacements:
+        df[list(replacements)] = pd.DataFrame(replacements, index=df.index)
     
     return df
 
 
-def encode_categorical_features(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, LabelEncoder]]:
+def encode_categorical_features(df: pd.DataFrame, method: str = 'label', workers: int = 1,
+                                executor: str = 'thread',
+                                identifier_cols: List[str] = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
     """
     Encode categorical features to numeric values.
     
     Args:
         df: Input DataFrame
+        method: Encoding strategy:
+            'label'  - LabelEncoder integer labels (imposes an artificial ordering)
+            'codes'  - integer category codes intended for K-Prototypes clustering,
+                       where codes are only compared for equality
+            'onehot' - one indicator column per level stored as sparse uint8 blocks
+        workers: Number of columns encoded in parallel ('label' and 'codes')
+        executor: 'thread' or 'process' pool used when workers > 1
+        identifier_cols: Columns such as CustomerID that are never one-hot
+            expanded; with 'onehot' they get integer codes instead
         
     Returns:
-        Tuple of (encoded DataFrame, encoders dictionary)
+        Tuple of (encoded DataFrame, encoders dictionary). For 'label' the encoders
+        are fitted LabelEncoders; for 'codes' and 'onehot' they are the category
+        levels of each column in code order.
     """
+    if method not in ('label', 'codes', 'onehot'):
+        raise ValueError(f"Unknown categorical encoding method: {method}")
+    
     df = df.copy()
     encoders = {}
     
     categorical_cols = df.select_dtypes(include=['object']).columns
     
-    for col in categorical_cols:
-        le = LabelEncoder()
-        df[col] = le.fit_transform(df[col])
-        encoders[col] = le
+    if method == 'onehot':
+        identifiers = [col for col in categorical_cols if col in (identifier_cols or [])]
+        expanded = [col for col in categorical_cols if col not in identifiers]
+        # One indicator column per identifier value would be as wide as the data is long
+        for col in identifiers:
+            codes, levels = _factorize_column(df[col])
+            df[col] = codes.astype(np.int32)
+            encoders[col] = levels
+        for col in expanded:
+            encoders[col] = pd.Index(sorted(df[col].dropna().unique()))
+        if expanded:
+            df = pd.get_dummies(df, columns=expanded, sparse=True, dtype=np.uint8)
+        return df, encoders
+    
+    # Columns are factorized independently (hashing, then sorting only the
+    # distinct levels) and written back in column order
+    results = _map_columns(_factorize_column, [df[col] for col in categorical_cols],
+                           workers=workers, executor=executor)
+    if method == 'label':
+        from sklearn.preprocessing import LabelEncoder
+    encoded = {}
+    for col, (codes, levels) in zip(categorical_cols, results):
+        if method == 'label':
+            le = LabelEncoder()
+            le.classes_ = np.asarray(levels, dtype=object)
+            encoded[col] = codes
+            encoders[col] = le
+        else:
+            encoded[col] = codes.astype(np.int32)
+            encoders[col] = levels
+    if encoded:
+        df[list(encoded)] = pd.DataFrame(encoded, index=df.index)
     
     return df, encoders
 
 
-def normalize_features(df: pd.DataFrame, exclude_cols: list = None) -> Tuple[pd.DataFrame, StandardScaler]:
+def get_sparse_feature_matrix(df: pd.DataFrame) -> 'sparse.csr_matrix':
+    """
+    Build a CSR matrix from a frame with dense numeric and sparse one-hot columns.
+    
+    Dense columns are stacked as one block and the sparse indicator columns are
+    appended without ever being densified.
+    
+    Args:
+        df: DataFrame produced by encode_categorical_features(method='onehot')
+        
+    Returns:
+        CSR matrix with columns in the same order as df
+    """
+    from scipy import sparse
+    
+    sparse_cols = [col for col in df.columns if isinstance(df[col].dtype, pd.SparseDtype)]
+    dense_cols = [col for col in df.columns if col not in sparse_cols]
+    
+    blocks = []
+    if dense_cols:
+        blocks.append(sparse.csr_matrix(df[dense_cols].to_numpy(dtype=np.float64)))
+    if sparse_cols:
+        blocks.append(df[sparse_cols].sparse.to_coo().astype(np.float64))
+    
+    matrix = sparse.hstack(blocks, format='csr')
+    order = np.argsort([df.columns.get_loc(col) for col in dense_cols + sparse_cols])
+    return matrix[:, order]
+
+
+def normalize_features(df: pd.DataFrame, exclude_cols: list = None) -> Tuple[pd.DataFrame, 'StandardScaler']:
     """
     Normalize numeric features using StandardScaler.
     
@@ -98,37 +240,155 @@ def normalize_features(df: pd.DataFrame, exclude_cols: list = None) -> Tuple[pd.
     numeric_cols = df.select_dtypes(include=[np.number]).columns
     cols_to_scale = [col for col in numeric_cols if col not in exclude_cols]
     
+    from sklearn.preprocessing import StandardScaler
+    
     scaler = StandardScaler()
     df[cols_to_scale] = scaler.fit_transform(df[cols_to_scale])
     
     return df, scaler
 
 
-def preprocess_data(filepath: str) -> Tuple[pd.DataFrame, Dict[str, Any], pd.DataFrame]:
+def preprocess_into_matrix(original_df: pd.DataFrame, categorical_encoding: str = 'label',
+                           exclude_cols: list = None, tracker: MemoryTracker = None, workers: int = 1,
+                           executor: str = 'thread') -> Tuple[pd.DataFrame, Dict[str, Any], 'StandardScaler']:
     """
-    Complete preprocessing pipeline for customer data.
+    Impute, encode and scale into a single preallocated float64 feature matrix.
+    
+    Produces the same values as handle_missing_values(strategy='mean'),
+    encode_categorical_features and normalize_features, but works column by
+    column into one column-major matrix instead of copying the whole frame at
+    each step. original_df is never modified. 'onehot' encoding is not
+    supported here because it changes the column layout.
     
     Args:
-        filepath: Path to the CSV file
+        original_df: Raw DataFrame
+        categorical_encoding: 'label' or 'codes'
+        exclude_cols: Columns left unscaled (e.g. identifiers)
+        tracker: Optional MemoryTracker receiving impute/encode/scale stages
+        workers: Number of categorical columns encoded in parallel
+        executor: 'thread' or 'process' pool used when workers > 1
         
     Returns:
-        Tuple of (processed DataFrame, metadata dict, original DataFrame)
+        Tuple of (processed DataFrame backed by the matrix, encoders, scaler)
     """
-    # Load data
-    original_df = load_data(filepath)
-    df = original_df.copy()
+    if categorical_encoding not in ('label', 'codes'):
+        raise ValueError(f"Matrix preprocessing does not support '{categorical_encoding}' encoding")
     
-    # Store original info
-    original_shape = df.shape
+    exclude_cols = exclude_cols or []
+    columns = original_df.columns.tolist()
+    numeric_cols = original_df.select_dtypes(include=[np.number]).columns.tolist()
+    categorical_cols = original_df.select_dtypes(include=['object']).columns.tolist()
+    position = {col: i for i, col in enumerate(columns)}
+    
+    # Column-major, so every per-column write below is contiguous and the final
+    # DataFrame can wrap the buffer without a copy
+    matrix = np.empty((len(original_df), len(columns)), dtype=np.float64, order='F')
+    
+    with track_stage(tracker, 'impute'):
+        for col in columns:
+            if col in categorical_cols:
+                continue
+            target = matrix[:, position[col]]
+            target[:] = original_df[col].to_numpy()
+            if col in numeric_cols:
+                missing = np.isnan(target)
+                if missing.any():
+                    target[missing] = target[~missing].mean()
     
-    # Handle missing values
-    df = handle_missing_values(df, strategy='mean')
+    encoders = {}
+    from sklearn.preprocessing import StandardScaler, LabelEncoder
+    
+    with track_stage(tracker, 'encode'):
+        results = _map_columns(_factorize_column, [original_df[col] for col in categorical_cols],
+                               workers=workers, executor=executor)
+        for col, (codes, levels) in zip(categorical_cols, results):
+            matrix[:, position[col]] = codes
+            if categorical_encoding == 'label':
+                le = LabelEncoder()
+                le.classes_ = np.asarray(levels, dtype=object)
+                encoders[col] = le
+            else:
+                encoders[col] = levels
     
-    # Encode categorical features
-    df, encoders = encode_categorical_features(df)
+    unscaled = set(exclude_cols)
+    if categorical_encoding == 'codes':
+        unscaled.update(categorical_cols)
+    cols_to_scale = [col for col in columns if col not in unscaled and (col in numeric_cols or col in categorical_cols)]
     
-    # Normalize features
-    df, scaler = normalize_features(df, exclude_cols=['CustomerID'] if 'CustomerID' in df.columns else [])
+    with track_stage(tracker, 'scale'):
+        means = np.empty(len(cols_to_scale))
+        variances = np.empty(len(cols_to_scale))
+        for i, col in enumerate(cols_to_scale):
+            target = matrix[:, position[col]]
+            means[i] = target.mean()
+            target -= means[i]
+            variances[i] = np.dot(target, target) / len(target) if len(target) else 0.0
+            scale = np.sqrt(variances[i])
+            if scale > 0:
+                target /= scale
+        
+        scaler = StandardScaler()
+        scaler.n_features_in_ = len(cols_to_scale)
+        scaler.feature_names_in_ = np.asarray(cols_to_scale, dtype=object)
+        scaler.n_samples_seen_ = len(original_df)
+        scaler.mean_ = means
+        scaler.var_ = variances
+        scaler.scale_ = np.where(variances > 0, np.sqrt(variances), 1.0)
+    
+    df = pd.DataFrame(matrix, columns=columns, index=original_df.index, copy=False)
+    return df, encoders, scaler
+
+
+def preprocess_frame(original_df: pd.DataFrame, categorical_encoding: str = 'label', mode: str = 'copy',
+                     tracker: MemoryTracker = None, workers: int = 1,
+                     executor: str = 'thread') -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Preprocess an already loaded DataFrame.
+    
+    Args:
+        original_df: Raw DataFrame (left unmodified)
+        categorical_encoding: Encoding method passed to encode_categorical_features.
+            Columns encoded as 'codes' or 'onehot' are left unscaled.
+        mode: 'copy' runs the step-by-step DataFrame pipeline; 'matrix' writes
+            into one preallocated feature matrix (see preprocess_into_matrix).
+            'onehot' encoding always uses the copy pipeline.
+        tracker: Optional MemoryTracker recording impute/encode/scale stages
+        workers: Number of categorical columns imputed/encoded in parallel;
+            the output is identical to the serial path (workers=1)
+        executor: 'thread' or 'process' pool used when workers > 1
+        
+    Returns:
+        Tuple of (processed DataFrame, metadata dict)
+    """
+    # Store original info
+    original_shape = original_df.shape
+    exclude_cols = ['CustomerID'] if 'CustomerID' in original_df.columns else []
+    
+    if mode == 'matrix' and categorical_encoding != 'onehot':
+        df, encoders, scaler = preprocess_into_matrix(original_df, categorical_encoding=categorical_encoding,
+                                                      exclude_cols=exclude_cols, tracker=tracker,
+                                                      workers=workers, executor=executor)
+        categorical_features = list(encoders.keys()) if categorical_encoding == 'codes' else []
+    else:
+        # Handle missing values
+        with track_stage(tracker, 'impute'):
+            df = handle_missing_values(original_df, strategy='mean', workers=workers, executor=executor)
+        
+        # Encode categorical features
+        with track_stage(tracker, 'encode'):
+            df, encoders = encode_categorical_features(df, method=categorical_encoding, workers=workers,
+                                                       executor=executor, identifier_cols=exclude_cols)
+        
+        if categorical_encoding == 'codes':
+            categorical_features = list(encoders.keys())
+        elif categorical_encoding == 'onehot':
+            categorical_features = [col for col in df.columns if isinstance(df[col].dtype, pd.SparseDtype)]
+        else:
+            categorical_features = []
+        
+        # Normalize features
+        with track_stage(tracker, 'scale'):
+            df, scaler = normalize_features(df, exclude_cols=exclude_cols + categorical_features)
     
     # Prepare metadata
     metadata = {
@@ -136,60 +396,91 @@ def preprocess_data(filepath: str) -> Tuple[pd.DataFrame, Dict[str, Any], pd.Dat
         'processed_shape': df.shape,
         'encoders': encoders,
         'scaler': scaler,
-        'features': df.columns.tolist()
+        'features': df.columns.tolist(),
+        'categorical_encoding': categorical_encoding,
+        'categorical_features': categorical_features
     }
     
+    return df, metadata
+
+
+def preprocess_data(filepath: str, categorical_encoding: str = 'label', mode: str = 'copy',
+                    tracker: MemoryTracker = None, workers: int = 1,
+                    executor: str = 'thread') -> Tuple[pd.DataFrame, Dict[str, Any], pd.DataFrame]:
+    """
+    Complete preprocessing pipeline for customer data.
+    
+    Args:
+        filepath: Path to the CSV file
+        categorical_encoding: Encoding method (see preprocess_frame)
+        mode: 'copy' or 'matrix' (see preprocess_frame)
+        tracker: Optional MemoryTracker recording load/impute/encode/scale stages
+        workers: Parallel column workers (see preprocess_frame)
+        executor: 'thread' or 'process' (see preprocess_frame)
+        
+    Returns:
+        Tuple of (processed DataFrame, metadata dict, original DataFrame)
+    """
+    # Load data
+    with track_stage(tracker, 'load'):
+        original_df = load_data(filepath)
+    
+    df, metadata = preprocess_frame(original_df, categorical_encoding=categorical_encoding, mode=mode, tracker=tracker,
+                                    workers=workers, executor=executor)
+    
     return df, metadata, original_df
 
 
-def get_feature_statistics(df: pd.DataFrame) -> Dict[str, Dict[str, float]]:
+def get_feature_statistics(df: pd.DataFrame, profile: Dict[str, Any] = None) -> Dict[str, Dict[str, float]]:
     """
     Calculate statistical summaries of features.
     
     Args:
         df: Input DataFrame
+        profile: Optional profile from utils.data_profile.profile_dataframe; when
+            given the statistics are read from it instead of rescanning df
         
     Returns:
         Dictionary containing statistics for each feature
     """
+    if profile is not None and profile['numeric_statistics']:
+        return feature_statistics_from_profile(profile)
     return df.describe().to_dict()
 
 
-def get_data_quality_metrics(df: pd.DataFrame) -> Dict[str, Any]:
+def get_data_quality_metrics(df: pd.DataFrame, profile: Dict[str, Any] = None) -> Dict[str, Any]:
     """
     Calculate data quality metrics including missing values and duplicates.
     
+    Duplicates, nulls, cardinalities and memory usage come from a single
+    hashed pass over the data (see utils.data_profile).
+    
     Args:
         df: Input DataFrame
+        profile: Optional precomputed profile of df
         
     Returns:
         Dictionary containing data quality information
     """
-    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-    categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
-    
-    return {
-        'total_rows': len(df),
-        'total_columns': len(df.columns),
-        'numeric_columns': len(numeric_cols),
-        'categorical_columns': len(categorical_cols),
-        'duplicate_rows': int(df.duplicated().sum()),
-        'missing_values': df.isnull().sum().to_dict(),
-        'missing_percentage': (df.isnull().sum() / len(df) * 100).round(2).to_dict(),
-        'memory_usage_mb': round(df.memory_usage(deep=True).sum() / 1024 / 1024, 2)
-    }
+    if profile is None:
+        profile = profile_dataframe(df)
+    return quality_metrics_from_profile(profile)
 
 
-def get_correlation_matrix(df: pd.DataFrame) -> Dict[str, Dict[str, float]]:
+def get_correlation_matrix(df: pd.DataFrame, method: str = 'pearson') -> Dict[str, Dict[str, float]]:
     """
     Calculate correlation matrix for numeric features.
     
     Args:
         df: Input DataFrame
+        method: 'pearson' or 'spearman'
         
     Returns:
         Correlation matrix as dictionary
     """
-    numeric_df = df.select_dtypes(include=[np.number])
-    return numeric_df.corr().round(4).to_dict()
-
+    features, matrix = compute_correlation(df, method=method)
+    rows = matrix_to_list(matrix)
+    return {
+        col: {features[i]: rows[i][j] for i in range(len(features))}
+        for j, col in enumerate(features)
+    }
@@ -0,0 +1,150 @@
+"""
+PROFILING Module
+Enhanced utility module for customer segmentation analytics
+Last updated: 2026-10-19
+"""
+"""
+On-demand cProfile capture of single requests, stored under logs/profiles/
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+_PROFILE_ID = re.compile(r'^[0-9]{8}T[0-9]{9}-[0-9a-f]{8}$')
+
+
+def hotspots(stats: pstats.Stats, limit: int = 15) -> List[Dict[str, Any]]:
+    """
+    Functions with the most time spent in their own code.
+
+    Args:
+        stats: Loaded profile
+        limit: Number of functions to return
+
+    Returns:
+        List of {function, calls, self_seconds, cumulative_seconds}, largest self time first
+    """
+    rows = []
+    for (filename, line, name), (_, calls, self_time, cumulative, _) in stats.stats.items():
+        # Built-ins are recorded with filename '~' and line 0
+        function = f'{os.path.basename(filename)}:{line}({name})' if filename != '~' else name
+        rows.append({
+            'function': function,
+            'calls': calls,
+            'self_seconds': round(self_time, 6),
+            'cumulative_seconds': round(cumulative, 6)
+        })
+    rows.sort(key=lambda row: row['self_seconds'], reverse=True)
+    return rows[:limit]
+
+
+class RequestProfiler:
+    """
+    Capture cProfile profiles of individual requests and keep the newest ones on disk.
+
+    Each profile is written as <id>.prof (loadable with pstats or snakeviz)
+    next to <id>.json, which holds the request details and its hotspots so
+    listing profiles does not re-read the raw stats. cProfile only sees the
+    thread it was started in; work handed to other threads or job processes
+    appears as time spent waiting.
+    """
+
+    def __init__(self, directory: str, sample_rate: float = 0.0, max_profiles: int = 50, top_n: int = 15):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.max_profiles = max_profiles
+        self.top_n = top_n
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def validate_id(profile_id: str) -> str:
+        if not _PROFILE_ID.match(profile_id or ''):
+            raise ValueError("Invalid profile ID")
+        return profile_id
+
+    def trigger(self, requested: bool) -> Optional[str]:
+        """Return why this request should be profiled ('requested' or 'sampled'), or None."""
+        if requested:
+            return 'requested'
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return 'sampled'
+        return None
+
+    def start(self) -> cProfile.Profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def finish(self, profiler: cProfile.Profile, details: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Stop profiler and store it with the given request details.
+
+        Returns:
+            The stored summary, including 'profile_id' and 'hotspots'
+        """
+        profiler.disable()
+        now = time.time()
+        # Millisecond timestamps first, so IDs sort by capture time
+        stamp = time.strftime('%Y%m%dT%H%M%S', time.localtime(now)) + f'{int(now % 1 * 1000):03d}'
+        profile_id = f'{stamp}-{uuid.uuid4().hex[:8]}'
+        stats = pstats.Stats(profiler)
+        summary = {
+            'profile_id': profile_id,
+            'created_at': now,
+            **details,
+            'profiled_seconds': round(stats.total_tt, 6),
+            'hotspots': hotspots(stats, self.top_n)
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        stats.dump_stats(os.path.join(self.directory, f'{profile_id}.prof'))
+        # Written last and atomically: a listed profile always has its .prof
+        tmp_path = os.path.join(self.directory, f'.{profile_id}.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(summary, f)
+        os.replace(tmp_path, os.path.join(self.directory, f'{profile_id}.json'))
+        self._prune()
+        return summary
+
+    def _prune(self) -> None:
+        with self._lock:
+            for profile_id in self._ids()[self.max_profiles:]:
+                for ext in ('.json', '.prof'):
+                    path = os.path.join(self.directory, profile_id + ext)
+                    if os.path.exists(path):
+                        os.remove(path)
+
+    def _ids(self) -> List[str]:
+        """Stored profile IDs, newest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        ids = [name[:-5] for name in os.listdir(self.directory)
+               if name.endswith('.json') and _PROFILE_ID.match(name[:-5])]
+        return sorted(ids, reverse=True)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self.directory, f'{self.validate_id(profile_id)}.json')
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def stats_path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f'{self.validate_id(profile_id)}.prof')
+
+    def list(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Summaries of the newest stored profiles."""
+        profiles = []
+        for profile_id in self._ids()[:limit]:
+            summary = self.get(profile_id)
+            if summary is not None:
+                profiles.append(summary)
+        return profiles
@@ -0,0 +1,212 @@
+"""
+REDUCTION Module
+Enhanced utility module for customer segmentation analytics
+Last updated: 2026-10-19
+"""
+"""
+Dimensionality reduction between feature scaling and clustering
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Tuple, Dict, Any, List, Union, TYPE_CHECKING
+
+from utils.preprocessing import get_sparse_feature_matrix
+
+# scipy and scikit-learn are imported where they are used, keeping them off the app's import path
+if TYPE_CHECKING:
+    from scipy import sparse
+
+
+REDUCTION_METHODS = ('none', 'pca', 'random')
+
+# Identifier columns: unscaled integer codes that would dominate any variance-based reduction
+IDENTIFIER_COLUMNS = ('CustomerID',)
+
+
+def reduction_features(X: pd.DataFrame, exclude: Tuple[str, ...] = IDENTIFIER_COLUMNS) -> List[str]:
+    """Columns a reduction or projection is fitted on: all but the excluded ones (all, if none would be left)."""
+    return [col for col in X.columns if col not in exclude] or list(X.columns)
+
+
+def select_features(X: pd.DataFrame, columns: List[str]) -> Union[np.ndarray, 'sparse.csr_matrix']:
+    """
+    The columns a reduction was fitted on, as the matrix it takes.
+
+    Module-level, so a model pipeline that starts with it (through a
+    FunctionTransformer) can be pickled.
+
+    Returns:
+        float64 array, or a CSR matrix when any column is sparse one-hot
+    """
+    features = X[list(columns)]
+    if any(isinstance(d, pd.SparseDtype) for d in features.dtypes):
+        return get_sparse_feature_matrix(features)
+    return features.to_numpy(dtype=np.float64)
+
+
+def fit_reduction(
+    X: Union[pd.DataFrame, np.ndarray, 'sparse.spmatrix'],
+    method: str = 'pca',
+    variance_target: float = 0.95,
+    n_components: Union[int, str] = 'auto',
+    random_state: int = 42,
+    exclude: Tuple[str, ...] = IDENTIFIER_COLUMNS
+) -> Tuple[pd.DataFrame, Any]:
+    """
+    Fit a reduction on scaled features and return the reduced features.
+
+    'pca' keeps the smallest number of principal components whose cumulative
+    explained variance reaches variance_target. 'random' applies a sparse
+    random projection, which is cheap for very wide (or sparse one-hot) data;
+    with n_components='auto' the dimension follows the Johnson-Lindenstrauss
+    bound for the number of rows, capped at the input width.
+
+    For a DataFrame, the excluded columns (identifiers) are left out first,
+    as in fit_projection_2d; the reducer then takes the remaining columns,
+    selected with select_features(X, reduction_features(X, exclude)).
+
+    Args:
+        X: Scaled feature matrix (DataFrame, array or CSR matrix)
+        method: 'pca' or 'random'
+        variance_target: Explained variance kept by PCA (0-1)
+        n_components: Output dimension for random projection, or 'auto'
+        random_state: Random state for reproducibility
+        exclude: DataFrame columns not reduced
+
+    Returns:
+        Tuple of (reduced DataFrame with columns PC1.. / RP1.., fitted reducer)
+    """
+    from scipy import sparse
+    from sklearn.decomposition import PCA
+    from sklearn.random_projection import SparseRandomProjection, johnson_lindenstrauss_min_dim
+
+    index = X.index if isinstance(X, pd.DataFrame) else None
+    if isinstance(X, pd.DataFrame):
+        X = select_features(X, reduction_features(X, exclude))
+    n_rows, n_features = X.shape
+
+    if method == 'pca':
+        if sparse.issparse(X):
+            raise ValueError("PCA reduction needs dense features; use method='random' for sparse one-hot data")
+        reducer = PCA(n_components=variance_target, svd_solver='full', random_state=random_state)
+        prefix = 'PC'
+    elif method == 'random':
+        if n_components == 'auto':
+            n_components = int(min(n_features, johnson_lindenstrauss_min_dim(n_rows, eps=0.3)))
+        reducer = SparseRandomProjection(n_components=int(n_components), dense_output=True,
+                                         compute_inverse_components=True, random_state=random_state)
+        prefix = 'RP'
+    else:
+        raise ValueError(f"Unknown reduction method: {method}")
+
+    reduced = reducer.fit_transform(X)
+    columns = [f'{prefix}{i + 1}' for i in range(reduced.shape[1])]
+    return pd.DataFrame(reduced, columns=columns, index=index), reducer
+
+
+def reduction_summary(reducer: Any, features: List[str]) -> Dict[str, Any]:
+    """
+    Describe a fitted reducer for metadata and API responses.
+
+    Args:
+        reducer: Fitted PCA or SparseRandomProjection
+        features: Columns it was fitted on (see reduction_features)
+
+    Returns:
+        Dictionary with method, input features and dimensions, and explained variance
+    """
+    from sklearn.decomposition import PCA
+
+    summary = {
+        'method': 'pca' if isinstance(reducer, PCA) else 'random',
+        'input_features': len(features),
+        'features': list(features),
+        'components': int(reducer.n_components_)
+    }
+    if isinstance(reducer, PCA):
+        summary['explained_variance'] = round(float(reducer.explained_variance_ratio_.sum()), 4)
+    return summary
+
+
+def project_2d(reduced: pd.DataFrame, reducer: Any) -> np.ndarray:
+    """
+    Two-dimensional coordinates for the cluster scatter view.
+
+    PCA components are ordered by explained variance, so the first two are
+    used directly. Random projection axes carry no ordering, so a 2-component
+    PCA is fitted on the (already narrow) projected data instead.
+
+    Args:
+        reduced: Output of fit_reduction
+        reducer: The fitted reducer
+
+    Returns:
+        Array of shape (n_rows, 2)
+    """
+    from sklearn.decomposition import PCA
+
+    values = reduced.to_numpy()
+    if values.shape[1] < 2:
+        return np.column_stack([values[:, 0], np.zeros(len(values))])
+    if isinstance(reducer, PCA):
+        return values[:, :2]
+    return PCA(n_components=2, random_state=0).fit_transform(values)
+
+
+def fit_projection_2d(
+    X: pd.DataFrame,
+    exclude: Tuple[str, ...] = IDENTIFIER_COLUMNS,
+    random_state: int = 0
+) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Two-dimensional embedding of the scaled features for the cluster scatter view.
+
+    Identifier columns are left out, so the view shows how customers spread
+    over their actual features rather than over encoded IDs. Dense features
+    get an exact PCA from the eigendecomposition of their d x d covariance
+    matrix, a single O(n*d^2) pass that is faster than an SVD of the data
+    for the usual narrow customer tables; wider data uses
+    randomized PCA, and sparse one-hot features a randomized truncated SVD,
+    which never densifies them.
+
+    Args:
+        X: Scaled feature DataFrame (processed data)
+        exclude: Columns not projected
+        random_state: Random state of the randomized solvers
+
+    Returns:
+        Tuple of (array of shape (n_rows, 2), summary with method and explained variance per axis)
+    """
+    from sklearn.decomposition import PCA, TruncatedSVD
+
+    columns = reduction_features(X, exclude)
+    features = X[columns]
+    sparse_input = any(isinstance(d, pd.SparseDtype) for d in features.dtypes)
+    if len(columns) < 2 or len(features) < 2:
+        first = features.iloc[:, 0].to_numpy(dtype=float)
+        return np.column_stack([first, np.zeros(len(first))]), {
+            'method': 'none', 'features': columns, 'explained_variance': None}
+
+    if sparse_input:
+        projector = TruncatedSVD(n_components=2, algorithm='randomized', random_state=random_state)
+        coords = projector.fit_transform(get_sparse_feature_matrix(features))
+        return coords, {'method': 'truncated_svd', 'features': columns,
+                        'explained_variance': [round(float(r), 4) for r in projector.explained_variance_ratio_]}
+
+    values = features.to_numpy(dtype=float)
+    if values.shape[1] > 1000:
+        projector = PCA(n_components=2, svd_solver='randomized', random_state=random_state)
+        coords = projector.fit_transform(values)
+        explained = projector.explained_variance_ratio_
+    else:
+        centered = values - values.mean(axis=0)
+        eigenvalues, eigenvectors = np.linalg.eigh(centered.T @ centered)
+        axes = eigenvectors[:, ::-1][:, :2]
+        # Deterministic orientation: the largest loading of each axis is positive
+        axes *= np.sign(axes[np.abs(axes).argmax(axis=0), [0, 1]])
+        coords = centered @ axes
+        total = eigenvalues.sum()
+        explained = eigenvalues[::-1][:2] / total if total > 0 else np.zeros(2)
+    return coords, {'method': 'pca', 'features': columns,
+                    'explained_variance': [round(float(r), 4) for r in explained]}
@@ -0,0 +1,331 @@
+"""
+REGISTRY Module
+Enhanced utility module for customer segmentation analytics
+Last updated: 2026-10-19
+"""
+"""
+Content-addressed, versioned store of fitted clustering models
+"""
+
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import joblib
+
+from utils.cache import LRUCache
+
+try:
+    import fcntl
+except ImportError:  # Windows: alias updates are only serialized within the process
+    fcntl = None
+
+_VERSION_ID = re.compile(r'^[0-9a-f]{16}$')
+_ALIAS = re.compile(r'^[A-Za-z][A-Za-z0-9_.-]{0,79}$')
+_STALE_TMP_SECONDS = 3600
+
+
+class ModelRegistry:
+    """
+    Fitted models stored by content hash, with metadata and named aliases.
+
+    Layout under root:
+
+        versions/<version>/model.pkl   joblib dump of the model
+        versions/<version>/meta.json   dataset fingerprint, k, metrics, timings
+        aliases.json                   alias -> version ('latest', 'production', ...)
+
+    The version is the first 16 hex digits of the SHA-256 of the model dump,
+    so registering an identical model again reuses its version. register()
+    serializes on the caller's thread and hands the disk write to a single
+    background thread; each version directory is written under a temporary
+    name and renamed into place, so readers never see a partial version.
+    Versions are immutable, which lets load_model() keep recently loaded
+    models in memory. After each write, all but the newest max_versions
+    versions are deleted unless an alias points at them or in_use() lists
+    them (e.g. the versions live workspaces still refer to). A failed
+    background write is logged to logger (and re-raised by a flush() waiting on it).
+    """
+
+    def __init__(self, root: str, max_versions: int = 20, cache_size: int = 8,
+                 in_use: Optional[Callable[[], Iterable[str]]] = None, logger: Optional[logging.Logger] = None):
+        self.root = root
+        self.versions_dir = os.path.join(root, 'versions')
+        self.aliases_path = os.path.join(root, 'aliases.json')
+        self.max_versions = max_versions
+        self.in_use = in_use
+        self.logger = logger or logging.getLogger(__name__)
+        self._loaded = LRUCache(max_entries=cache_size)
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model-registry')
+
+    @staticmethod
+    def validate_alias(alias: str) -> str:
+        if not _ALIAS.match(alias or ''):
+            raise ValueError("Alias must start with a letter and contain only letters, digits, '_', '.' or '-'")
+        return alias
+
+    def register(self, model: Any, metadata: Dict[str, Any], aliases: tuple = ('latest',)) -> str:
+        """
+        Store model as a new version (asynchronously) and point aliases at it.
+
+        Args:
+            model: Fitted model or pipeline
+            metadata: JSON-serializable details stored in meta.json
+            aliases: Aliases moved to this version once it is on disk
+
+        Returns:
+            The version ID, usable with load_model() immediately
+        """
+        buffer = io.BytesIO()
+        joblib.dump(model, buffer)
+        payload = buffer.getvalue()
+        version = hashlib.sha256(payload).hexdigest()[:16]
+        meta = {'version': version, 'created_at': time.time(), 'size_bytes': len(payload), **metadata}
+        self._loaded.set(version, model)
+        with self._lock:
+            future = self._writer.submit(self._write, version, payload, meta, tuple(aliases))
+            self._pending[version] = future
+        future.add_done_callback(lambda _: self._write_done(version, future))
+        return version
+
+    def _write_done(self, version: str, future: Future) -> None:
+        with self._lock:
+            if self._pending.get(version) is future:
+                del self._pending[version]
+        error = future.exception()
+        if error is not None:
+            self.logger.error(f"Writing model version {version} failed: {error}", exc_info=error)
+
+    def _write(self, version: str, payload: bytes, meta: Dict[str, Any], aliases: tuple) -> None:
+        final_dir = os.path.join(self.versions_dir, version)
+        if not os.path.isdir(final_dir):
+            os.makedirs(self.versions_dir, exist_ok=True)
+            tmp_dir = os.path.join(self.versions_dir, f'.tmp-{version}-{uuid.uuid4().hex[:8]}')
+            os.makedirs(tmp_dir)
+            for name, data in (('model.pkl', payload), ('meta.json', json.dumps(meta, default=str).encode())):
+                with open(os.path.join(tmp_dir, name), 'wb') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+            try:
+                os.rename(tmp_dir, final_dir)
+            except OSError:
+                # Another process stored the same content first
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        else:
+            # Re-registered: count it as the newest version for garbage collection
+            os.utime(final_dir)
+        if aliases:
+            with self._aliases_lock():
+                current = self._read_aliases()
+                current.update({alias: version for alias in aliases})
+                self._write_aliases(current)
+        self.collect_garbage()
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wait until all registered versions are on disk; re-raises a failed write."""
+        with self._lock:
+            pending = list(self._pending.values())
+        for future in pending:
+            future.result(timeout)
+
+    # Aliases
+
+    def _aliases_lock(self):
+        return _FileLock(os.path.join(self.root, '.aliases.lock'))
+
+    def _read_aliases(self) -> Dict[str, str]:
+        try:
+            with open(self.aliases_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write_aliases(self, aliases: Dict[str, str]) -> None:
+        tmp_path = f'{self.aliases_path}.{uuid.uuid4().hex[:8]}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(aliases, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.aliases_path)
+
+    def aliases(self, workspace_ids: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """Alias -> version; with workspace_ids, only aliases of versions those workspaces registered."""
+        aliases = self._read_aliases()
+        if workspace_ids is None:
+            return aliases
+        owned = {}
+        for alias, version in aliases.items():
+            if version not in owned:
+                owned[version] = self.owned_by(version, workspace_ids)
+        return {alias: version for alias, version in aliases.items() if owned[version]}
+
+    def set_alias(self, alias: str, version: str) -> None:
+        """Point alias at an existing version (e.g. promote a run to 'production')."""
+        self.validate_alias(alias)
+        version = self.resolve(version)
+        self.flush()
+        if not os.path.isdir(os.path.join(self.versions_dir, version)):
+            raise KeyError(version)
+        with self._aliases_lock():
+            current = self._read_aliases()
+            current[alias] = version
+            self._write_aliases(current)
+
+    def remove_alias(self, alias: str) -> bool:
+        """Delete an alias; its version becomes eligible for garbage collection."""
+        with self._aliases_lock():
+            current = self._read_aliases()
+            if current.pop(alias, None) is None:
+                return False
+            self._write_aliases(current)
+        return True
+
+    def resolve(self, ref: str) -> str:
+        """
+        Version ID for a version ID or alias.
+
+        Raises:
+            KeyError: Unknown alias
+        """
+        if _VERSION_ID.match(ref or ''):
+            return ref
+        version = self._read_aliases().get(ref)
+        if version is None:
+            raise KeyError(ref)
+        return version
+
+    # Reading
+
+    def load_model(self, ref: str) -> Any:
+        """
+        Load a model by version ID or alias; recently loaded versions come from memory.
+
+        Raises:
+            KeyError: Unknown alias or version
+        """
+        version = self.resolve(ref)
+        model = self._loaded.get(version)
+        if model is not None:
+            return model
+        with self._lock:
+            pending = self._pending.get(version)
+        if pending is not None:
+            pending.result()
+        path = os.path.join(self.versions_dir, version, 'model.pkl')
+        if not os.path.exists(path):
+            raise KeyError(ref)
+        model = joblib.load(path)
+        self._loaded.set(version, model)
+        return model
+
+    def get(self, ref: str) -> Optional[Dict[str, Any]]:
+        """Metadata of a version, or None if it is not stored (yet)."""
+        try:
+            version = self.resolve(ref)
+        except KeyError:
+            return None
+        try:
+            with open(os.path.join(self.versions_dir, version, 'meta.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def owned_by(self, ref: str, workspace_ids: Iterable[str]) -> bool:
+        """Whether a version (or alias) was registered by one of workspace_ids."""
+        meta = self.get(ref)
+        return meta is not None and meta.get('workspace_id') in set(workspace_ids)
+
+    def _versions(self) -> List[str]:
+        """Stored version IDs, newest first."""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        versions = [name for name in os.listdir(self.versions_dir) if _VERSION_ID.match(name)]
+        return sorted(versions, key=lambda v: os.path.getmtime(os.path.join(self.versions_dir, v)), reverse=True)
+
+    def list(self, limit: int = 20, workspace_ids: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Metadata of the newest stored versions, each with the aliases pointing at it.
+
+        Args:
+            limit: Maximum number of versions returned
+            workspace_ids: Only versions registered by these workspaces (default: all)
+        """
+        aliases = self._read_aliases()
+        owners = None if workspace_ids is None else set(workspace_ids)
+        versions = []
+        for version in self._versions():
+            if len(versions) >= limit:
+                break
+            meta = self.get(version)
+            if meta is None or (owners is not None and meta.get('workspace_id') not in owners):
+                continue
+            meta['aliases'] = sorted(alias for alias, target in aliases.items() if target == version)
+            versions.append(meta)
+        return versions
+
+    # Garbage collection
+
+    def collect_garbage(self) -> List[str]:
+        """
+        Delete versions beyond the newest max_versions that no alias points at and in_use() does not list.
+
+        Also removes temporary directories left by interrupted writes.
+
+        Returns:
+            Deleted version IDs
+        """
+        if not os.path.isdir(self.versions_dir):
+            return []
+        now = time.time()
+        for name in os.listdir(self.versions_dir):
+            path = os.path.join(self.versions_dir, name)
+            if name.startswith('.tmp-') and now - os.path.getmtime(path) > _STALE_TMP_SECONDS:
+                shutil.rmtree(path, ignore_errors=True)
+        with self._aliases_lock():
+            keep = set(self._read_aliases().values())
+            if self.in_use is not None:
+                keep.update(self.in_use())
+            deleted = [version for version in self._versions()[self.max_versions:] if version not in keep]
+            for version in deleted:
+                shutil.rmtree(os.path.join(self.versions_dir, version), ignore_errors=True)
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._pending)
+        return {'versions': len(self._versions()), 'pending_writes': pending, 'loaded': self._loaded.stats()}
+
+
+class _FileLock:
+    """Exclusive lock on a file, so processes sharing the registry update aliases one at a time."""
+
+    _thread_lock = threading.Lock()
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if fcntl is not None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, 'a')
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
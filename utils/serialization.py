@@ -0,0 +1,168 @@
+"""
+SERIALIZATION Module
+Enhanced utility module for customer segmentation analytics
+Last updated: 2026-10-19
+"""
+"""
+Fast JSON responses: numpy-aware encoding, pre-serialized fragments and compression
+"""
+
+import gzip
+import json
+import re
+import secrets
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional; the standard library encoder is used instead
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional; only gzip is offered without it
+    brotli = None
+
+
+# Placeholder strings for RawJSON values. Each call uses a random nonce, so
+# string content that happens to look like a placeholder is left alone
+_RAW_TOKEN = '\x00raw:{}:{}\x00'
+_RAW_PATTERN = re.compile(rb'"\\u0000raw:([0-9a-f]{16}):(\d+)\\u0000"')
+
+
+class RawJSON:
+    """
+    Already-serialized JSON embedded as-is in a response.
+
+    Lets a view hand over the output of e.g. plotly.io.to_json() without
+    parsing it back into Python objects only to encode it again.
+    """
+
+    __slots__ = ('data',)
+
+    def __init__(self, text: Any):
+        self.data = bytes(text) if isinstance(text, (bytes, bytearray)) else text.encode('utf-8')
+
+
+def _to_builtin(o: Any) -> Any:
+    """Convert numpy / pandas values the encoders do not handle natively."""
+    if isinstance(o, np.generic):
+        return o.item()
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    if isinstance(o, (pd.Series, pd.Index)):
+        return o.tolist()
+    if isinstance(o, pd.Timestamp):
+        return o.isoformat()
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    """
+    Serialize obj to UTF-8 JSON bytes.
+
+    Uses orjson when it is installed (numpy arrays are encoded natively and
+    NaN becomes null), else the standard library with a numpy-aware
+    fallback. RawJSON values anywhere in obj are spliced in verbatim.
+
+    Args:
+        obj: Value to encode
+        sort_keys: Sort dictionary keys
+
+    Returns:
+        Encoded JSON
+    """
+    raw: List[bytes] = []
+    nonce = secrets.token_hex(8)
+
+    def default(o: Any) -> Any:
+        if isinstance(o, RawJSON):
+            raw.append(o.data)
+            return _RAW_TOKEN.format(nonce, len(raw) - 1)
+        try:
+            return _to_builtin(o)
+        except TypeError:
+            return DefaultJSONProvider.default(o)
+
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        data = orjson.dumps(obj, default=default, option=option)
+    else:
+        data = json.dumps(obj, default=default, sort_keys=sort_keys, ensure_ascii=False,
+                          separators=(',', ':')).encode('utf-8')
+
+    if raw:
+        expected = nonce.encode('ascii')
+        data = _RAW_PATTERN.sub(lambda m: raw[int(m.group(2))] if m.group(1) == expected else m.group(0), data)
+    return data
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider built on dumps(); responses are encoded straight to bytes."""
+
+    sort_keys = False
+    compact = True
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return dumps(obj, sort_keys=kwargs.get('sort_keys', self.sort_keys)).decode('utf-8')
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj, sort_keys=self.sort_keys), mimetype=self.mimetype)
+
+
+def available_encodings() -> List[str]:
+    """Content encodings this process can produce, most preferred first."""
+    return (['br'] if brotli is not None else []) + ['gzip']
+
+
+def negotiate_encoding(accept_encoding: str, available: List[str] = None) -> Optional[str]:
+    """
+    Pick a content encoding from an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Raw header value, e.g. 'gzip, deflate, br;q=0.9'
+        available: Encodings to choose from, most preferred first
+
+    Returns:
+        The acceptable encoding with the highest q-value (ties go to the
+        server's preference), or None for identity
+    """
+    available = available_encodings() if available is None else available
+    weights: Dict[str, float] = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(data: bytes, encoding: str, gzip_level: int = 1, brotli_quality: int = 4) -> bytes:
+    """Compress a response body with 'gzip' or 'br'."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
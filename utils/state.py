@@ -9,6 +9,7 @@ from datetime import datetime
 from typing import Any, Dict, List
 
 
+# Single state file of earlier versions; saved states now live in one file per workspace
 STATE_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'model', 'app_state.pkl')
 
 
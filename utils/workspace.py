@@ -0,0 +1,447 @@
+"""
+WORKSPACE Module
+Enhanced utility module for customer segmentation analytics
+Last updated: 2026-10-19
+"""
+"""
+Per-session analysis workspaces with locking, a memory budget and disk eviction
+"""
+
+import itertools
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from utils.state import save_state, load_state
+
+
+DEFAULT_WORKSPACE = 'default'
+
+# Keys of the persisted analysis state (shared with /api/save-state files)
+STATE_KEYS = ('PROCESSED_DATA', 'ORIGINAL_DATA', 'CLUSTER_LABELS', 'KMEANS_MODEL', 'METADATA', 'REDUCED_DATA',
+              'SILHOUETTE_SCORES')
+
+_WORKSPACE_ID = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+_REAP_INTERVAL = 60  # seconds between idle-TTL scans
+
+# Dataset versions are unique across workspaces, so caches keyed by version
+# can be shared by every workspace without colliding
+_VERSIONS = itertools.count(1)
+
+
+def next_dataset_version() -> int:
+    """Return a process-wide unique dataset version."""
+    return next(_VERSIONS)
+
+
+class Workspace:
+    """
+    One analyst's analysis state: data, clustering results and metadata.
+
+    Callers hold `lock` while reading or replacing the state; WorkspaceStore
+    does this through checkout(). `dataset_version` changes whenever the
+    loaded data is replaced; `analysis_version` also changes when the
+    clustering results do.
+    """
+
+    def __init__(self, workspace_id: str):
+        self.workspace_id = workspace_id
+        self.processed_data = None
+        self.original_data = None
+        self.cluster_labels = None
+        self.kmeans_model = None
+        self.model_version = None  # registry version of kmeans_model, once registered
+        self.metadata = None
+        self.reduced_data = None  # processed_data after the optional PCA / random projection stage
+        self.silhouette_scores = None  # last optimal-k sweep for this dataset
+        self.sweep_job = None  # speculative sweep started after the last upload (not persisted)
+        self.dataset_version = next_dataset_version()
+        self.analysis_version = self.dataset_version
+        self.lock = threading.RLock()
+        self.created_at = time.time()
+        self.last_access = self.created_at
+        self.spill_path: Optional[str] = None  # set while the state lives on disk
+        self.restore_path: Optional[str] = None  # saved state loaded on the first checkout
+        self._active = 0
+        self._memory_key = None
+        self._memory_bytes = 0
+
+    @property
+    def resident(self) -> bool:
+        return self.spill_path is None
+
+    def bump_version(self) -> int:
+        """Mark the loaded data as replaced so per-version caches are not reused."""
+        self.dataset_version = self.analysis_version = next_dataset_version()
+        return self.dataset_version
+
+    def bump_analysis_version(self) -> int:
+        """Mark the clustering results as replaced; the dataset version is kept."""
+        self.analysis_version = next_dataset_version()
+        return self.analysis_version
+
+    def to_state(self) -> Dict[str, Any]:
+        """Analysis state in the save_state()/load_state() layout."""
+        return {
+            'PROCESSED_DATA': self.processed_data,
+            'ORIGINAL_DATA': self.original_data,
+            'CLUSTER_LABELS': self.cluster_labels,
+            'KMEANS_MODEL': self.kmeans_model,
+            'MODEL_VERSION': self.model_version,
+            'METADATA': self.metadata,
+            'REDUCED_DATA': self.reduced_data,
+            'SILHOUETTE_SCORES': self.silhouette_scores,
+        }
+
+    def restore(self, state: Dict[str, Any], bump: bool = True) -> None:
+        """Replace the analysis state from a save_state()-style dictionary."""
+        self.processed_data = state.get('PROCESSED_DATA')
+        self.original_data = state.get('ORIGINAL_DATA')
+        self.cluster_labels = state.get('CLUSTER_LABELS')
+        self.kmeans_model = state.get('KMEANS_MODEL')
+        self.model_version = state.get('MODEL_VERSION')
+        self.metadata = state.get('METADATA')
+        self.reduced_data = state.get('REDUCED_DATA')
+        self.silhouette_scores = state.get('SILHOUETTE_SCORES')
+        if bump:
+            self.bump_version()
+
+    def clear(self) -> None:
+        """Drop all loaded data and results."""
+        self.restore({})
+
+    def memory_bytes(self) -> int:
+        """
+        Approximate resident size: deep size of the frames plus the labels.
+
+        Recomputed only when the dataset or the labels change; frames shared
+        with the upload cache or other workspaces are counted in each.
+        """
+        if not self.resident:
+            return 0
+        key = (self.dataset_version, id(self.processed_data), id(self.reduced_data), id(self.cluster_labels))
+        if key != self._memory_key:
+            total = 0
+            for frame in (self.processed_data, self.original_data, self.reduced_data):
+                if frame is not None:
+                    total += int(frame.memory_usage(deep=True).sum())
+            if self.cluster_labels is not None:
+                total += int(getattr(self.cluster_labels, 'nbytes', 0))
+            self._memory_key = key
+            self._memory_bytes = total
+        return self._memory_bytes
+
+    def summary(self) -> Dict[str, Any]:
+        """Memory and status report for this workspace."""
+        return {
+            'workspace_id': self.workspace_id,
+            'resident': self.resident,
+            'memory_mb': round(self.memory_bytes() / 1024 / 1024, 3),
+            'data_loaded': self.original_data is not None or not self.resident,
+            'restore_pending': self.restore_path is not None,
+            'dataset_version': self.dataset_version,
+            'analysis_version': self.analysis_version,
+            'model_version': self.model_version,
+            'active_requests': self._active,
+            'idle_seconds': round(time.time() - self.last_access, 1)
+        }
+
+
+class WorkspaceStore:
+    """
+    Workspaces keyed by session or workspace ID, kept within a memory budget.
+
+    checkout() hands out a workspace under its own lock, so requests for one
+    workspace are serialized while different workspaces proceed in parallel.
+    After each checkout, least recently used idle workspaces are written to
+    spill_dir and dropped from memory until the resident total fits
+    memory_budget_bytes; the most recently used workspace always stays
+    resident. A spilled workspace is loaded back on its next checkout.
+    Saved states (/api/save-state) are kept per workspace in state_dir and
+    restored on the workspace's first checkout in this process.
+
+    Workspaces idle for longer than idle_ttl seconds are dropped, along with
+    spill files that old; beyond max_workspaces, the least recently used
+    idle workspaces are dropped, empty ones first. on_drop is called with
+    each dropped workspace.
+    """
+
+    def __init__(self, memory_budget_bytes: Optional[int] = None, spill_dir: str = None, state_dir: str = None,
+                 idle_ttl: Optional[float] = None, max_workspaces: Optional[int] = None,
+                 on_drop: Optional[Callable[[Workspace], None]] = None):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.spill_dir = spill_dir
+        self.state_dir = state_dir
+        self.idle_ttl = idle_ttl
+        self.max_workspaces = max_workspaces
+        self.on_drop = on_drop
+        self.evictions = 0
+        self.restores = 0
+        self.drops = 0
+        self._next_reap = 0.0
+        self._workspaces: 'OrderedDict[str, Workspace]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def validate_id(workspace_id: str) -> str:
+        if not isinstance(workspace_id, str) or not _WORKSPACE_ID.match(workspace_id):
+            raise ValueError("Workspace ID must be 1-64 letters, digits, '-' or '_'")
+        return workspace_id
+
+    def _spill_path(self, workspace_id: str) -> str:
+        return os.path.join(self.spill_dir, f'{workspace_id}.pkl')
+
+    def state_path(self, workspace_id: str) -> str:
+        """Saved-state file of a workspace."""
+        return os.path.join(self.state_dir, f'{self.validate_id(workspace_id)}.pkl')
+
+    def saved_workspaces(self) -> List[str]:
+        """IDs of the workspaces with a saved state in state_dir."""
+        if self.state_dir is None or not os.path.isdir(self.state_dir):
+            return []
+        return sorted(name[:-4] for name in os.listdir(self.state_dir)
+                      if name.endswith('.pkl') and _WORKSPACE_ID.match(name[:-4]))
+
+    def _acquire(self, workspace_id: str, create: bool = True) -> Optional[Workspace]:
+        with self._lock:
+            ws = self._workspaces.get(workspace_id)
+            if ws is None:
+                saved = self.state_dir is not None and os.path.exists(self.state_path(workspace_id))
+                if not create and not saved:
+                    return None
+                ws = Workspace(workspace_id)
+                if saved:
+                    ws.restore_path = self.state_path(workspace_id)
+                self._workspaces[workspace_id] = ws
+            self._workspaces.move_to_end(workspace_id)
+            ws._active += 1
+            ws.last_access = time.time()
+            return ws
+
+    def _release(self, ws: Workspace) -> None:
+        with self._lock:
+            ws._active -= 1
+            ws.last_access = time.time()
+
+    @contextmanager
+    def checkout(self, workspace_id: str, create: bool = True) -> Iterator[Workspace]:
+        """
+        Lock a workspace (creating or reloading it as needed) for one request.
+
+        Args:
+            workspace_id: Session or client-supplied workspace ID
+            create: Store a new workspace for an unknown ID; with False (read-only
+                requests), an unknown ID gets an empty workspace that is not kept
+
+        Yields:
+            The resident Workspace, held under its lock
+        """
+        ws = self._acquire(self.validate_id(workspace_id), create)
+        if ws is None:
+            yield Workspace(workspace_id)
+            return
+        try:
+            with ws.lock:
+                if not ws.resident:
+                    self._load(ws)
+                if ws.restore_path is not None:
+                    self._restore_saved(ws)
+                yield ws
+        finally:
+            self._release(ws)
+            self.enforce_budget()
+            self.reap()
+
+    def _load(self, ws: Workspace) -> None:
+        ws.restore(load_state(ws.spill_path), bump=False)
+        if os.path.exists(ws.spill_path):
+            os.remove(ws.spill_path)
+        ws.spill_path = None
+        self.restores += 1
+
+    def defer_restore(self, workspace_id: str, path: Optional[str] = None) -> bool:
+        """
+        Arrange for a saved state file to be loaded on the workspace's first checkout.
+
+        Unpickling a large state (and the modules it needs) is then paid by the
+        first request that uses the workspace instead of at start-up.
+
+        Args:
+            workspace_id: Workspace to restore into
+            path: State file; defaults to the workspace's own file in state_dir
+
+        Returns:
+            True if a saved state exists and is pending
+        """
+        if path is None:
+            if self.state_dir is None:
+                return False
+            path = self.state_path(workspace_id)
+        if not os.path.exists(path):
+            return False
+        with self._lock:
+            ws = self._workspaces.get(workspace_id)
+            if ws is None:
+                ws = self._workspaces[workspace_id] = Workspace(workspace_id)
+            ws.restore_path = path
+        return True
+
+    def _restore_saved(self, ws: Workspace) -> None:
+        state = load_state(ws.restore_path)
+        ws.restore_path = None
+        if state:
+            ws.restore(state)
+
+    def _spill(self, ws: Workspace) -> None:
+        path = self._spill_path(ws.workspace_id)
+        save_state(ws.to_state(), path)
+        model_version = ws.model_version
+        ws.restore({}, bump=False)
+        ws.model_version = model_version  # still referenced by the spilled state
+        ws.spill_path = path
+        self.evictions += 1
+
+    def resident_bytes(self) -> int:
+        with self._lock:
+            workspaces = list(self._workspaces.values())
+        return sum(ws.memory_bytes() for ws in workspaces)
+
+    def enforce_budget(self) -> int:
+        """
+        Spill idle workspaces, least recently used first, until within budget.
+
+        Returns:
+            Number of workspaces spilled
+        """
+        if self.memory_budget_bytes is None or self.spill_dir is None:
+            return 0
+        with self._lock:
+            workspaces = list(self._workspaces.values())
+        total = sum(ws.memory_bytes() for ws in workspaces)
+        spilled = 0
+        # The most recently used workspace (last) is never spilled
+        for ws in workspaces[:-1]:
+            if total <= self.memory_budget_bytes:
+                break
+            if ws._active or not ws.resident or not ws.lock.acquire(blocking=False):
+                continue
+            try:
+                if ws._active or not ws.resident:
+                    continue
+                freed = ws.memory_bytes()
+                if freed == 0:
+                    continue
+                self._spill(ws)
+                total -= freed
+                spilled += 1
+            finally:
+                ws.lock.release()
+        return spilled
+
+    def model_versions(self) -> List[str]:
+        """Registry versions referenced by the workspaces in this store, resident or spilled."""
+        with self._lock:
+            workspaces = list(self._workspaces.values())
+        return [ws.model_version for ws in workspaces if ws.model_version]
+
+    def reap(self) -> int:
+        """
+        Drop idle workspaces past idle_ttl, then idle ones beyond max_workspaces.
+
+        The TTL scan (and removal of spill files older than idle_ttl that no
+        workspace in this store owns) runs at most once a minute.
+
+        Returns:
+            Number of workspaces dropped
+        """
+        now = time.time()
+        expired = []
+        if self.idle_ttl is not None and now >= self._next_reap:
+            self._next_reap = now + _REAP_INTERVAL
+            with self._lock:
+                workspaces = list(self._workspaces.values())
+            expired = [ws.workspace_id for ws in workspaces if not ws._active and now - ws.last_access > self.idle_ttl]
+        dropped = sum(self.drop(workspace_id, idle_only=True) for workspace_id in expired)
+        if expired:
+            self._remove_stale_spills(now)
+        if self.max_workspaces is not None:
+            with self._lock:
+                # The most recently used workspace (last) is never dropped
+                workspaces = list(self._workspaces.values())[:-1]
+                excess = len(workspaces) + 1 - self.max_workspaces
+            if excess > 0:
+                empty = [ws for ws in workspaces if ws.resident and ws.restore_path is None and ws.original_data is None]
+                empty_ids = {ws.workspace_id for ws in empty}
+                for ws in empty + [ws for ws in workspaces if ws.workspace_id not in empty_ids]:
+                    if excess <= 0:
+                        break
+                    if self.drop(ws.workspace_id, idle_only=True):
+                        dropped += 1
+                        excess -= 1
+        return dropped
+
+    def _remove_stale_spills(self, now: float) -> None:
+        if self.spill_dir is None or not os.path.isdir(self.spill_dir):
+            return
+        with self._lock:
+            owned = {ws.spill_path for ws in self._workspaces.values() if ws.spill_path}
+        for name in os.listdir(self.spill_dir):
+            path = self._spill_path(name[:-4]) if name.endswith('.pkl') else None
+            try:
+                if path and path not in owned and now - os.path.getmtime(path) > self.idle_ttl:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def drop(self, workspace_id: str, idle_only: bool = False) -> bool:
+        """
+        Forget a workspace and delete its spill file.
+
+        Args:
+            workspace_id: Workspace to drop
+            idle_only: Keep the workspace if a request has it checked out
+
+        Returns:
+            True if the workspace was dropped
+        """
+        with self._lock:
+            ws = self._workspaces.get(workspace_id)
+            if ws is None or (idle_only and ws._active):
+                return False
+            del self._workspaces[workspace_id]
+            self.drops += 1
+        if ws.spill_path and os.path.exists(ws.spill_path):
+            os.remove(ws.spill_path)
+        if self.on_drop is not None:
+            self.on_drop(ws)
+        return True
+
+    def report(self, visible: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Memory usage per workspace and in total.
+
+        Args:
+            visible: Only list these workspaces (totals still cover all); None lists every one
+
+        Returns:
+            Dictionary with the budget, resident total, eviction counters and
+            one summary per listed workspace (most recently used last)
+        """
+        with self._lock:
+            workspaces = list(self._workspaces.values())
+        summaries: List[Dict[str, Any]] = [ws.summary() for ws in workspaces]
+        return {
+            'memory_budget_mb': round(self.memory_budget_bytes / 1024 / 1024, 1) if self.memory_budget_bytes else None,
+            'resident_mb': round(sum(s['memory_mb'] for s in summaries), 3),
+            'workspaces': [s for s in summaries if visible is None or s['workspace_id'] in visible],
+            'total_workspaces': len(summaries),
+            'resident_workspaces': sum(1 for s in summaries if s['resident']),
+            'spilled_workspaces': sum(1 for s in summaries if not s['resident']),
+            'evictions': self.evictions,
+            'restores': self.restores,
+            'drops': self.drops
+        }